@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+
+from storage import write_atomic
+
+# Retention policy applied after every snapshot: the newest KEEP_LAST
+# snapshots are kept, plus the newest snapshot of each of the last
+# KEEP_DAILY days that have one
+KEEP_LAST = 10
+KEEP_DAILY = 30
+
+
+class BackupStore:
+    """Content-addressed store of backup snapshots
+
+    Every version of a post is stored once under objects/, named by the
+    SHA-256 of its JSON. A snapshot is a small manifest under snapshots/
+    listing the hashes of the posts it contains, so taking a snapshot only
+    writes the posts that changed since an earlier one.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.snapshots_dir = os.path.join(root, "snapshots")
+        self.known_objects = None  # Hashes already on disk, read on first use
+
+    def snapshot(self, posts_data, created=None):
+        """Store a snapshot of posts_data, return (snapshot id, new posts written)"""
+        self._load_known_objects()
+        hashes = []
+        written = 0
+        for data in posts_data:
+            blob = json.dumps(data, sort_keys=True, separators=(",", ":")).encode("utf-8")
+            digest = hashlib.sha256(blob).hexdigest()
+            if digest not in self.known_objects:
+                path = self._object_path(digest)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                write_atomic(path, blob)
+                self.known_objects.add(digest)
+                written += 1
+            hashes.append(digest)
+
+        created = created or datetime.now()
+        snapshot_id = created.strftime("%Y%m%d-%H%M%S-%f")
+        manifest = {
+            "id": snapshot_id,
+            "created": created.strftime("%Y-%m-%d %H:%M:%S"),
+            "posts": hashes,
+        }
+        os.makedirs(self.snapshots_dir, exist_ok=True)
+        write_atomic(self._manifest_path(snapshot_id), json.dumps(manifest).encode("utf-8"))
+        return snapshot_id, written
+
+    def list_snapshots(self):
+        """Return id, creation time and post count of every snapshot, newest first"""
+        snapshots = []
+        for snapshot_id in self._snapshot_ids():
+            manifest = self._read_manifest(snapshot_id)
+            snapshots.append({
+                "id": snapshot_id,
+                "created": manifest["created"],
+                "count": len(manifest["posts"]),
+            })
+        return snapshots
+
+    def restore(self, snapshot_id):
+        """Return the posts of a snapshot as a list of dicts"""
+        posts_data = []
+        for digest in self._read_manifest(snapshot_id)["posts"]:
+            with open(self._object_path(digest), 'rb') as file:
+                posts_data.append(json.load(file))
+        return posts_data
+
+    def prune(self, keep_last=KEEP_LAST, keep_daily=KEEP_DAILY):
+        """Delete snapshots outside the retention policy and unreferenced posts"""
+        snapshot_ids = self._snapshot_ids()
+        keep = set(snapshot_ids[:keep_last])
+        days = []
+        for snapshot_id in snapshot_ids:
+            day = snapshot_id[:8]
+            if day not in days:
+                days.append(day)
+                if len(days) > keep_daily:
+                    break
+                keep.add(snapshot_id)
+
+        removed = [snapshot_id for snapshot_id in snapshot_ids if snapshot_id not in keep]
+        for snapshot_id in removed:
+            os.remove(self._manifest_path(snapshot_id))
+        if removed:
+            self._collect_garbage()
+        return len(removed)
+
+    def _collect_garbage(self):
+        referenced = set()
+        for snapshot_id in self._snapshot_ids():
+            referenced.update(self._read_manifest(snapshot_id)["posts"])
+        self._load_known_objects()
+        for digest in self.known_objects - referenced:
+            os.remove(self._object_path(digest))
+        self.known_objects &= referenced
+
+    def _snapshot_ids(self):
+        """Return every snapshot id, newest first"""
+        if not os.path.isdir(self.snapshots_dir):
+            return []
+        names = [name[:-5] for name in os.listdir(self.snapshots_dir) if name.endswith(".json")]
+        return sorted(names, reverse=True)
+
+    def _read_manifest(self, snapshot_id):
+        with open(self._manifest_path(snapshot_id), 'rb') as file:
+            return json.load(file)
+
+    def _load_known_objects(self):
+        if self.known_objects is not None:
+            return
+        self.known_objects = set()
+        if os.path.isdir(self.objects_dir):
+            for prefix in os.listdir(self.objects_dir):
+                for name in os.listdir(os.path.join(self.objects_dir, prefix)):
+                    if name.endswith(".json"):
+                        self.known_objects.add(name[:-5])
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest + ".json")
+
+    def _manifest_path(self, snapshot_id):
+        return os.path.join(self.snapshots_dir, snapshot_id + ".json")
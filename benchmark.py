@@ -0,0 +1,318 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tkinter as tk
+from datetime import datetime, timedelta
+
+from blog_core import Blog
+from html_export import render_markup, render_post_html
+from post_list_view import PostListView
+from storage import STORAGE_MODES, open_storage
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+# Operations timed for every corpus size, in run order
+OPERATIONS = ("save", "load", "matches_search", "search", "ranked_search", "fuzzy_search",
+              "refresh_post_list", "format_text_for_html", "export_html")
+# A slowdown beyond this fraction of the baseline fails the run
+DEFAULT_THRESHOLD = 0.25
+# Baseline timings shorter than this are too noisy to compare
+MIN_COMPARED_SECONDS = 0.005
+
+# Common words of the synthetic text, most frequent first; rarer made-up
+# words are appended so the vocabulary grows like real prose
+COMMON_WORDS = (
+    "the of and to a in is it that for on with as was this be by at from or an are "
+    "not have but they which one you were all we when there can has more if will "
+    "their what so about out up into time only other some them these two may then "
+    "first any like new now over also after back use way well work year day good "
+    "make most people how could just because post blog code data page write read "
+    "python design build test small fast simple list file search index cache user "
+    "app window text idea note travel food photo music garden book review project"
+).split()
+SYLLABLES = ("ka", "lo", "ri", "ten", "mar", "vi", "so", "ne", "qu", "dor", "el", "pa",
+             "tu", "ber", "gi", "an", "sol", "ve", "xi", "mo", "ra", "lin", "fe", "do")
+VOCABULARY_SIZE = 20000
+CATEGORIES = ("Tech", "Personal", "Travel", "Food", "Photography", "Books", "Music",
+              "Projects", "Notes", "Reviews", "Garden", "Misc")
+TAG_COUNT = 300
+MARKERS = ("**", "*", "__")
+CORPUS_START = datetime(2015, 1, 1)
+CORPUS_SPAN_SECONDS = 10 * 365 * 24 * 3600
+
+
+class StubListbox:
+    """Stand-in for a Tk Listbox, so the post list can be timed without a display"""
+
+    def __init__(self):
+        self.items = []
+
+    def config(self, **options):
+        pass
+
+    def insert(self, index, *labels):
+        if index == tk.END:
+            index = len(self.items)
+        self.items[index:index] = labels
+
+    def delete(self, first, last=None):
+        if last == tk.END:
+            last = len(self.items) - 1
+        del self.items[first:(first if last is None else last) + 1]
+
+    def after_idle(self, callback, *args):
+        pass
+
+
+def zipf_cum_weights(count, exponent=1.0):
+    """Return cumulative weights giving the item of rank r a weight of 1 / r ** exponent"""
+    total = 0.0
+    cum_weights = []
+    for rank in range(1, count + 1):
+        total += 1 / rank ** exponent
+        cum_weights.append(total)
+    return cum_weights
+
+
+class CorpusGenerator:
+    """Generate the same synthetic posts for the same seed
+
+    Words, categories and tags follow Zipf distributions, post lengths
+    vary from a line to several paragraphs, and some words carry the
+    editor's bold, italic and underline markers.
+    """
+
+    def __init__(self, seed):
+        self.random = random.Random(seed)
+        words = list(COMMON_WORDS)
+        known = set(words)
+        while len(words) < VOCABULARY_SIZE:
+            word = "".join(self.random.choices(SYLLABLES, k=self.random.randint(2, 4)))
+            if word not in known:
+                known.add(word)
+                words.append(word)
+        self.words = words
+        self.word_weights = zipf_cum_weights(len(words))
+        self.category_weights = zipf_cum_weights(len(CATEGORIES))
+        self.tags = words[100:100 + TAG_COUNT]
+        self.tag_weights = zipf_cum_weights(len(self.tags), 1.2)
+
+    def sentence(self):
+        words = self.random.choices(self.words, cum_weights=self.word_weights, k=self.random.randint(5, 18))
+        if self.random.random() < 0.15:
+            position = self.random.randrange(len(words))
+            marker = self.random.choice(MARKERS)
+            words[position] = f"{marker}{words[position]}{marker}"
+        return " ".join(words).capitalize() + "."
+
+    def post_data(self, post_id):
+        """Return the dict of one synthetic post"""
+        rand = self.random
+        title = " ".join(rand.choices(self.words, cum_weights=self.word_weights, k=rand.randint(2, 8)))
+        # Most posts are short, a few are long
+        paragraphs = min(12, int(rand.expovariate(1 / 2.5)) + 1)
+        content = "\n\n".join(" ".join(self.sentence() for _ in range(rand.randint(1, 6)))
+                              for _ in range(paragraphs))
+        timestamp = CORPUS_START + timedelta(seconds=rand.randrange(CORPUS_SPAN_SECONDS))
+        category = ""
+        if rand.random() < 0.9:
+            category = rand.choices(CATEGORIES, cum_weights=self.category_weights)[0]
+        tags = sorted(set(rand.choices(self.tags, cum_weights=self.tag_weights, k=rand.randint(0, 5))))
+        return {
+            "title": title.capitalize(),
+            "content": content,
+            "timestamp": timestamp.strftime("%Y-%m-%d %H:%M:%S"),
+            "category": category,
+            "tags": tags,
+            "id": post_id,
+        }
+
+    def queries(self):
+        """Return search queries from frequent to missing words"""
+        return [self.words[5], self.words[150], self.words[5000], f"{self.words[60]} {self.words[61]}",
+                "zzqx"]
+
+    def typo_queries(self):
+        """Return title words with one letter changed, as typed with a typo"""
+        queries = []
+        for word in (self.words[120], self.words[900], self.words[3000]):
+            position = len(word) // 2
+            queries.append(word[:position] + ("x" if word[position] != "x" else "y") + word[position + 1:])
+        return queries
+
+
+def generate_corpus(size, seed):
+    """Return size synthetic post dicts, the same ones for the same seed"""
+    generator = CorpusGenerator(seed)
+    return [generator.post_data(post_id) for post_id in range(1, size + 1)], generator
+
+
+def best_time(function, repeat):
+    """Return the shortest of repeat runs of function, in seconds"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run_size(size, seed, storage_mode, repeat, operations, progress=None):
+    """Time the operations on a corpus of size posts, return {operation: seconds}"""
+    posts_data, generator = generate_corpus(size, seed)
+    queries = generator.queries()
+    typo_queries = generator.typo_queries()
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="blog-benchmark-") as folder:
+        data_file = os.path.join(folder, "blog_posts.json")
+        backup_dir = os.path.join(folder, "blog_backups")
+
+        def save():
+            storage = open_storage(storage_mode, data_file)
+            storage.replace(posts_data)
+            storage.close()
+
+        def load():
+            blog = Blog(storage_mode, data_file, backup_dir)
+            blog.load()
+            blog.close()
+
+        # Everything but save and load runs against one loaded blog
+        save()
+        blog = Blog(storage_mode, data_file, backup_dir)
+        blog.load()
+        posts = list(blog.posts.values())
+
+        def matches_search():
+            for query in queries:
+                sum(1 for post in posts if post.matches_search(query))
+
+        def search():
+            for query in queries:
+                blog.search(query)
+
+        def ranked_search():
+            for query in queries:
+                blog.ranked_search(query)
+
+        def fuzzy_search():
+            for query in typo_queries:
+                blog.fuzzy_search(query)
+                blog.did_you_mean(query)
+            for query in queries:
+                blog.complete(query[:2])
+
+        def refresh_post_list():
+            # Show every post, narrow to a search and widen back again
+            view = PostListView(StubListbox())
+            view.set_items(posts)
+            view.set_items([blog.posts[post_id] for post_id in blog.search(queries[1])])
+            view.set_items(posts)
+
+        def format_text_for_html():
+            # Render every body without the render cache
+            for post in posts:
+                render_markup(post.content)
+
+        def export_html():
+            for data in blog.posts_data():
+                render_post_html(data)
+
+        timed = {"save": save, "load": load, "matches_search": matches_search, "search": search,
+                 "ranked_search": ranked_search, "fuzzy_search": fuzzy_search,
+                 "refresh_post_list": refresh_post_list, "format_text_for_html": format_text_for_html,
+                 "export_html": export_html}
+        # The ranked and fuzzy indexes are built on first use, which is timed
+        # separately from the queries
+        if "ranked_search" in operations:
+            results["ranked_index_build"] = best_time(lambda: blog.ranked_search(""), 1)
+        if "fuzzy_search" in operations:
+            results["fuzzy_index_build"] = best_time(blog.fuzzy_terms, 1)
+        for operation in operations:
+            results[operation] = best_time(timed[operation], repeat)
+            if progress is not None:
+                progress(size, operation, results[operation])
+        blog.close()
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Return (size, operation, baseline seconds, seconds) of every slowdown beyond threshold"""
+    slower = []
+    for size, timings in results.items():
+        for operation, seconds in timings.items():
+            before = baseline.get(size, {}).get(operation)
+            if before is None or before < MIN_COMPARED_SECONDS:
+                continue
+            if seconds > before * (1 + threshold):
+                slower.append((size, operation, before, seconds))
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the blog's operations on synthetic corpora")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES),
+                        help="comma separated numbers of posts (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=1, help="seed of the synthetic corpora (default: 1)")
+    parser.add_argument("--storage", choices=sorted(STORAGE_MODES), default="json",
+                        help="how posts are stored on disk (default: json)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="runs of each operation, the fastest is kept (default: 3)")
+    parser.add_argument("--ops", default=",".join(OPERATIONS),
+                        help="comma separated operations to time (default: all)")
+    parser.add_argument("--output", "-o", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="fail when an operation is slower than the baseline by more than "
+                             "this fraction (default: %(default)s)")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    operations = [operation.strip() for operation in args.ops.split(",") if operation.strip()]
+    unknown = [operation for operation in operations if operation not in OPERATIONS]
+    if unknown:
+        parser.error(f"unknown operations: {', '.join(unknown)}")
+
+    def progress(size, operation, seconds):
+        print(f"{size:>8}  {operation:<22} {seconds * 1000:>10.1f} ms", file=sys.stderr)
+
+    results = {}
+    for size in sizes:
+        results[str(size)] = run_size(size, args.seed, args.storage, args.repeat, operations, progress)
+    report = {
+        "created": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "storage": args.storage,
+        "repeat": args.repeat,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if (baseline.get("seed"), baseline.get("storage")) != (args.seed, args.storage):
+            print("Warning: the baseline used another seed or storage mode", file=sys.stderr)
+        slower = compare(results, baseline["results"], args.threshold)
+        for size, operation, before, seconds in slower:
+            print(f"SLOWER {size} posts {operation}: {before * 1000:.1f} ms -> {seconds * 1000:.1f} ms "
+                  f"({seconds / before - 1:+.0%})", file=sys.stderr)
+        if slower:
+            sys.exit(1)
+        print(f"No operation slower than the baseline by more than {args.threshold:.0%}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,66 +1,106 @@
 import tkinter as tk
 from tkinter import messagebox, simpledialog, filedialog
-import os
-import json
-from datetime import datetime
-import re
 from tkinter import ttk
 import webbrowser
-
-
-class BlogPost:
-    def __init__(self, title, content, timestamp=None, category="", tags=None):
-        self.title = title
-        self.content = content
-        if timestamp is None:
-            self.timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        else:
-            self.timestamp = timestamp
-        self.category = category
-        self.tags = tags if tags is not None else []
-
-    def to_dict(self):
-        return {
-            "title": self.title,
-            "content": self.content,
-            "timestamp": self.timestamp,
-            "category": self.category,
-            "tags": self.tags
-        }
-
-    @classmethod
-    def from_dict(cls, data):
-        return cls(
-            data["title"], 
-            data["content"], 
-            data["timestamp"],
-            data.get("category", ""),
-            data.get("tags", [])
-        )
-
-    def matches_search(self, query):
-        """Check if the post matches a search query"""
-        query = query.lower()
-        return (query in self.title.lower() or 
-                query in self.content.lower() or
-                query in self.category.lower() or
-                any(query in tag.lower() for tag in self.tags))
+import argparse
+import heapq
+import queue
+from bisect import bisect_left
+
+from blog_core import Blog, parse_tags
+from editor_buffer import EditorBuffer
+from html_export import render_post_html
+from instrumentation import TRACER, traced
+from memory_report import format_report, post_memory_report
+from post_list_view import PostListView, PostRows
+from preview_server import PreviewServer
+from site_builder import build_site
+from storage import STORAGE_MODES
+from text_stats import TextStatsTracker
+from write_behind import WriteBehindSaver
+
+# Delay before a search runs, so a burst of keystrokes triggers one search
+SEARCH_DEBOUNCE_MS = 150
+# Number of posts checked per idle callback while a search is running
+SEARCH_CHUNK_SIZE = 2000
+# How often finished background saves are reported to the status bar
+SAVER_POLL_MS = 100
+# How often handler latencies are shown while instrumentation is on
+LATENCY_REFRESH_MS = 1000
+# How often the UI looks for posts loaded in the background
+LOAD_POLL_MS = 50
+# Characters put in the editor per idle callback when a post is large
+EDITOR_SLICE_CHARS = 1 << 16
+# Sort orders of the post list, by the name shown in the selector
+SORT_ORDERS = {
+    "Created": "created",
+    "Newest first": "newest",
+    "Oldest first": "oldest",
+    "Title": "title",
+    "Category": "category",
+}
+
+
+class SnapshotDialog(simpledialog.Dialog):
+    """Ask which backup snapshot to restore"""
+
+    def __init__(self, parent, snapshots):
+        self.snapshots = snapshots
+        self.result = None
+        super().__init__(parent, "Restore Data")
+
+    def body(self, master):
+        tk.Label(master, text="Choose the backup to restore:").pack(anchor=tk.W)
+        self.listbox = tk.Listbox(master, width=40, height=10)
+        self.listbox.pack(fill=tk.BOTH, expand=True)
+        for snapshot in self.snapshots:
+            self.listbox.insert(tk.END, f"{snapshot['created']} ({snapshot['count']} posts)")
+        self.listbox.selection_set(0)
+        return self.listbox
+
+    def validate(self):
+        if not self.listbox.curselection():
+            messagebox.showwarning("Warning", "Please select a backup to restore.")
+            return False
+        return True
+
+    def apply(self):
+        self.result = self.snapshots[self.listbox.curselection()[0]]
 
 
 class EnhancedBlogApp:
-    def __init__(self, root):
+    def __init__(self, root, storage_mode="json"):
         self.root = root
         self.root.title(" personal blog")
         self.root.geometry("1100x750")
         
-        self.posts = []
-        self.current_post_index = None
-        self.filtered_posts = []  # For search functionality
-        self.filtered_indices = []  # Map filtered indices to original indices
+        self.current_post_id = None
+        self.filtered_ids = []  # Ids of the listed posts, in display order
+        self.filtered_keys = []  # Sort keys of filtered_ids, so rows are found by bisect; None when ranked
+        self.match_count = 0  # Number of posts matching a ranked search
+        self.sort_order = "created"  # Order of the posts list, a value of SORT_ORDERS
+        self.last_query = ""  # Query that produced filtered_ids
+        self.search_after_id = None  # Pending debounced search
+        self.search_job_id = None  # Next chunk of an in-flight search
+        self.import_message = None  # Latest progress of a running import
+        self.selected_category = None  # Category the list is limited to
+        self.selected_tags = []  # Tags every listed post must have
+        self.category_names = [None]  # Category of each sidebar row, None for all
+        self.tag_names = []  # Tag of each sidebar row
+        self.facet_labels = None  # Sidebar rows as last shown
+        self.loading = False  # Posts are being loaded in the background
+        self.load_finished = False  # Every batch of the load is queued
+        self.load_cancelled = False  # Set on exit to stop a load early
+        self.load_queue = queue.Queue()  # (batch of posts, fraction loaded) from the saver thread
+        self.editor_load_id = None  # Next slice of a large post going into the editor
+        self.editor_buffer = EditorBuffer()  # Text of the editor and the lines edited since it was shown
         
-        # Data file path
-        self.data_file = "blog_posts.json"
-        self.backup_file = "blog_posts_backup.json"
+        # Posts, storage, search and backups; the UI only presents them
+        self.blog = Blog(storage_mode)
+        # Writes run on a background thread so disk I/O never blocks the UI
+        self.saver = WriteBehindSaver(self.blog.storage, saved=self.on_saved, failed=self.on_save_failed)
+        self.blog.writer = self.saver
+        self.preview_server = PreviewServer()
 
         # Create menu
         self.create_menu()
@@ -72,6 +112,24 @@ class EnhancedBlogApp:
         self.main_frame = tk.Frame(root)
         self.main_frame.pack(pady=10, fill=tk.BOTH, expand=True)
 
+        # Sidebar to browse posts by category and tag
+        self.facet_frame = tk.Frame(self.main_frame)
+        self.facet_frame.pack(side=tk.LEFT, fill=tk.Y, padx=(10, 0))
+
+        self.category_facet_label = tk.Label(self.facet_frame, text="Categories", font=("Arial", 10, "bold"))
+        self.category_facet_label.pack(anchor=tk.W)
+        self.category_listbox = tk.Listbox(self.facet_frame, width=22, height=8, font=("Arial", 9),
+                                           exportselection=False)
+        self.category_listbox.pack(fill=tk.X, pady=(0, 10))
+        self.category_listbox.bind('<<ListboxSelect>>', self.on_facet_select)
+
+        self.tag_facet_label = tk.Label(self.facet_frame, text="Tags (all selected)", font=("Arial", 10, "bold"))
+        self.tag_facet_label.pack(anchor=tk.W)
+        self.tag_listbox = tk.Listbox(self.facet_frame, width=22, font=("Arial", 9),
+                                      selectmode=tk.MULTIPLE, exportselection=False)
+        self.tag_listbox.pack(fill=tk.BOTH, expand=True)
+        self.tag_listbox.bind('<<ListboxSelect>>', self.on_facet_select)
+
         # Left frame for posts list and search
         self.left_frame = tk.Frame(self.main_frame)
         self.left_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(10, 5))
@@ -92,10 +150,42 @@ class EnhancedBlogApp:
                                            font=("Arial", 8))
         self.clear_search_button.pack(side=tk.LEFT)
 
+        self.ranked_var = tk.BooleanVar(value=False)
+        self.ranked_check = tk.Checkbutton(self.search_frame, text="Rank", variable=self.ranked_var,
+                                           command=self.on_ranked_toggle, font=("Arial", 8))
+        self.ranked_check.pack(side=tk.LEFT, padx=(5, 0))
+
+        self.fuzzy_var = tk.BooleanVar(value=False)
+        self.fuzzy_check = tk.Checkbutton(self.search_frame, text="Fuzzy", variable=self.fuzzy_var,
+                                          command=self.on_fuzzy_toggle, font=("Arial", 8))
+        self.fuzzy_check.pack(side=tk.LEFT)
+
+        # Tab completes the last word from post titles and tags
+        self.search_entry.bind('<Tab>', self.complete_search)
+
+        # Correction offered when a search finds nothing
+        self.suggestion = None
+        self.suggestion_label = tk.Label(self.left_frame, text="", fg="blue", cursor="hand2", font=("Arial", 9))
+        self.suggestion_label.pack(anchor=tk.W)
+        self.suggestion_label.bind('<Button-1>', self.apply_suggestion)
+
         # Label for posts list
         self.posts_label = tk.Label(self.left_frame, text="Blog Posts", font=("Arial", 14, "bold"))
         self.posts_label.pack()
 
+        # Sort order of the posts list
+        self.sort_frame = tk.Frame(self.left_frame)
+        self.sort_frame.pack(fill=tk.X)
+
+        self.sort_label = tk.Label(self.sort_frame, text="Sort by:", font=("Arial", 10))
+        self.sort_label.pack(side=tk.LEFT)
+
+        self.sort_var = tk.StringVar(value="Created")
+        self.sort_combo = ttk.Combobox(self.sort_frame, textvariable=self.sort_var, values=list(SORT_ORDERS),
+                                       state="readonly", width=14)
+        self.sort_combo.pack(side=tk.LEFT, padx=(5, 0))
+        self.sort_combo.bind('<<ComboboxSelected>>', self.on_sort_change)
+
         # Listbox to display blog posts
         self.post_listbox = tk.Listbox(self.left_frame, width=50, height=20, font=("Arial", 10))
         self.post_listbox.pack(fill=tk.BOTH, expand=True, pady=(5, 0))
@@ -104,7 +194,8 @@ class EnhancedBlogApp:
         self.scrollbar = tk.Scrollbar(self.left_frame)
         self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
 
-        self.post_listbox.config(yscrollcommand=self.scrollbar.set)
+        # The list view renders rows in pages and forwards scrolling
+        self.post_list_view = PostListView(self.post_listbox, self.scrollbar)
         self.scrollbar.config(command=self.post_listbox.yview)
 
         # Bind selection event
@@ -136,14 +227,15 @@ class EnhancedBlogApp:
 
         # Word count label
         self.word_count_var = tk.StringVar()
-        self.word_count_var.set("Words: 0 | Characters: 0")
+        self.word_count_var.set("Words: 0 | Characters: 0 | Paragraphs: 0 | Reading time: 0 min")
         self.word_count_label = tk.Label(self.right_frame, textvariable=self.word_count_var, 
                                        font=("Arial", 9), fg="gray")
         self.word_count_label.pack(anchor=tk.E, pady=(2, 2))
 
-        # Bind text change event for word count
-        self.text_area.bind('<KeyRelease>', self.update_word_count)
-        self.text_area.bind('<Button-1>', self.update_word_count)
+        # Count the lines touched by every edit of the text area and keep
+        # the buffer in step, so the text is never read back in full
+        self.text_stats = TextStatsTracker(self.text_area, changed=self.update_word_count,
+                                           buffer=self.editor_buffer)
 
         # Category and tags frame
         self.meta_frame = tk.Frame(self.right_frame)
@@ -188,16 +280,35 @@ class EnhancedBlogApp:
                                        bg="#9C27B0", fg="white", font=("Arial", 10, "bold"), width=12)
         self.preview_button.pack(side=tk.LEFT, padx=5)
 
-        # Status bar
+        # Status bar, with handler latencies on the right while instrumentation is on
+        self.status_frame = tk.Frame(root)
+        self.status_frame.pack(side=tk.BOTTOM, fill=tk.X)
+
+        self.latency_var = tk.StringVar()
+        self.latency_label = tk.Label(self.status_frame, textvariable=self.latency_var, bd=1, relief=tk.SUNKEN,
+                                      anchor=tk.E)
+        self.latency_label.pack(side=tk.RIGHT)
+
+        # Shown while posts load in the background
+        self.load_progress_var = tk.DoubleVar()
+        self.load_progress = ttk.Progressbar(self.status_frame, orient=tk.HORIZONTAL, length=150,
+                                             mode="determinate", maximum=100, variable=self.load_progress_var)
+
         self.status_var = tk.StringVar()
         self.status_var.set("Welcome to Enhanced Blog App! Create your first post.")
-        self.status_bar = tk.Label(root, textvariable=self.status_var, bd=1, relief=tk.SUNKEN, anchor=tk.W)
-        self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
+        self.status_bar = tk.Label(self.status_frame, textvariable=self.status_var, bd=1, relief=tk.SUNKEN,
+                                   anchor=tk.W)
+        self.status_bar.pack(side=tk.LEFT, fill=tk.X, expand=True)
 
         # Load posts on startup
         self.load_posts()
         self.update_word_count(None)
 
+        # Report background saves and flush them before the window closes
+        self.root.protocol("WM_DELETE_WINDOW", self.exit_app)
+        self.poll_saver()
+        self.show_latency()
+
     def create_menu(self):
         """Create the menu bar"""
         menubar = tk.Menu(self.root)
@@ -211,11 +322,15 @@ class EnhancedBlogApp:
         file_menu.add_separator()
         file_menu.add_command(label="Export as HTML", command=self.export_as_html)
         file_menu.add_command(label="Export as PDF", command=self.export_as_pdf)
+        file_menu.add_command(label="Build Site", command=self.build_site)
         file_menu.add_separator()
         file_menu.add_command(label="Backup Data", command=self.backup_data)
         file_menu.add_command(label="Restore Data", command=self.restore_data)
         file_menu.add_separator()
-        file_menu.add_command(label="Exit", command=self.root.quit)
+        file_menu.add_command(label="Import Markdown Folder", command=self.import_markdown)
+        file_menu.add_command(label="Import JSONL File", command=self.import_jsonl)
+        file_menu.add_separator()
+        file_menu.add_command(label="Exit", command=self.exit_app)
 
         # Edit menu
         edit_menu = tk.Menu(menubar, tearoff=0)
@@ -230,6 +345,12 @@ class EnhancedBlogApp:
         view_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="View", menu=view_menu)
         view_menu.add_command(label="Refresh Posts", command=self.refresh_posts)
+        view_menu.add_command(label="Memory Usage", command=self.show_memory_usage)
+        view_menu.add_separator()
+        self.instrument_var = tk.BooleanVar(value=TRACER.enabled)
+        view_menu.add_checkbutton(label="Instrumentation", variable=self.instrument_var,
+                                  command=self.toggle_instrumentation)
+        view_menu.add_command(label="Export Trace...", command=self.export_trace)
 
         # Help menu
         help_menu = tk.Menu(menubar, tearoff=0)
@@ -305,167 +426,557 @@ class EnhancedBlogApp:
             # No text selected
             pass
 
-    def update_word_count(self, event):
+    @traced()
+    def update_word_count(self, event=None):
         """Update word and character count"""
-        content = self.text_area.get("1.0", tk.END)
-        words = len(content.split())
-        chars = len(content) - 1  # -1 for the extra newline
-        self.word_count_var.set(f"Words: {words} | Characters: {chars}")
+        stats = self.text_stats.stats
+        self.word_count_var.set(f"Words: {stats.words} | Characters: {stats.chars} | "
+                                f"Paragraphs: {stats.paragraphs} | Reading time: {stats.reading_minutes} min")
 
+    @traced()
     def on_search_change(self, *args):
         """Handle search input changes"""
-        query = self.search_var.get()
-        self.filter_posts(query)
+        # Stop a search for the old query, and restart the debounce timer so
+        # a burst of keystrokes runs one search
+        self.cancel_search()
+        self.search_after_id = self.root.after(SEARCH_DEBOUNCE_MS, self.run_pending_search)
+
+    @traced()
+    def run_pending_search(self):
+        """Run the search once typing has paused"""
+        self.search_after_id = None
+        self.filter_posts(self.search_var.get())
+
+    def cancel_search(self):
+        """Cancel a pending or in-flight search, return True if there was one"""
+        cancelled = False
+        if self.search_after_id is not None:
+            self.root.after_cancel(self.search_after_id)
+            self.search_after_id = None
+            cancelled = True
+        if self.search_job_id is not None:
+            self.root.after_cancel(self.search_job_id)
+            self.search_job_id = None
+            cancelled = True
+        return cancelled
 
     def filter_posts(self, query):
-        """Filter posts based on search query"""
+        """Filter posts based on search query and the selected facets"""
+        self.cancel_search()
+        facet_ids = self.blog.facets.filter(self.selected_category, self.selected_tags)
+        index = self.blog.sort_index(self.sort_order)
         if not query:
-            # If no query, show all posts
-            self.filtered_posts = self.posts.copy()
-            self.filtered_indices = list(range(len(self.posts)))
+            # If no query, show all posts of the selected facets
+            self.last_query = ""
+            if facet_ids is None:
+                self.set_filtered(index.ids())
+            else:
+                self.set_filtered(index.order(facet_ids))
+            return
+
+        if self.fuzzy_var.get():
+            # Typo-tolerant matching of titles and tags is fast enough to run at once
+            self.last_query = ""
+            self.set_filtered(index.order(self.blog.fuzzy_search(query, within=facet_ids)))
+            return
+
+        if self.ranked_var.get():
+            # Only the best matches are listed, by relevance instead of the sort order
+            self.last_query = ""
+            best, self.match_count = self.blog.ranked_search(query, within=facet_ids)
+            self.filtered_ids = best
+            self.filtered_keys = None
             self.refresh_post_list()
             return
 
-        # Filter posts that match the query
-        self.filtered_posts = []
-        self.filtered_indices = []
-        for i, post in enumerate(self.posts):
-            if post.matches_search(query):
-                self.filtered_posts.append(post)
-                self.filtered_indices.append(i)
-        
-        self.refresh_post_list()
+        if self.last_query and self.last_query in query:
+            # The new query only narrows the previous one, so every match
+            # is already among the previous results, in display order
+            candidates = self.filtered_ids
+        else:
+            candidates = self.blog.search_candidates(query)
+            if facet_ids is not None:
+                candidates = set(facet_ids).intersection(candidates)
+            # Matches come out in the order candidates are checked
+            candidates = index.order(candidates)
+
+        self.continue_search(query, candidates, 0, [])
+
+    @traced()
+    def continue_search(self, query, candidates, start, matches):
+        """Check the next chunk of candidates and schedule the rest"""
+        end = start + SEARCH_CHUNK_SIZE
+        matches.extend(self.blog.search(query, candidates[start:end]))
+        if end < len(candidates):
+            self.status_var.set(f"Searching... {end} of {len(candidates)} posts checked")
+            self.search_job_id = self.root.after(1, self.continue_search, query, candidates, end, matches)
+            return
+
+        self.search_job_id = None
+        self.last_query = query
+        self.set_filtered(matches)
 
     def clear_search(self):
         """Clear the search box and show all posts"""
         self.search_var.set("")
         self.filter_posts("")
 
+    def matches_filter(self, post):
+        """Return whether a post belongs in the list under the current search and facets"""
+        query = self.search_var.get()
+        if query and self.fuzzy_var.get():
+            if not self.blog.fuzzy_search(query, within={post.post_id}):
+                return False
+        elif query and not post.matches_search(query):
+            return False
+        return self.matches_filter_facets(post)
+
+    def matches_filter_facets(self, post):
+        """Return whether a post has the selected category and tags"""
+        if self.selected_category and post.category != self.selected_category:
+            return False
+        return all(tag in post.tags for tag in self.selected_tags)
+
+    @traced()
+    def on_facet_select(self, event):
+        """Limit the list to the selected category and tags"""
+        selection = self.category_listbox.curselection()
+        self.selected_category = self.category_names[selection[0]] if selection else None
+        self.selected_tags = [self.tag_names[row] for row in self.tag_listbox.curselection()]
+        # Earlier matches were limited by other facets
+        self.last_query = ""
+        self.filter_posts(self.search_var.get())
+
+    def refresh_facets(self):
+        """Show every category and tag with its number of posts"""
+        category_counts = self.blog.facets.category_counts()
+        tag_counts = self.blog.facets.tag_counts()
+        category_labels = ["All categories"] + [f"{name} ({count})" for name, count in category_counts]
+        tag_labels = [f"{name} ({count})" for name, count in tag_counts]
+        if self.facet_labels == (category_labels, tag_labels):
+            # Most edits change no category or tag
+            return
+        self.facet_labels = (category_labels, tag_labels)
+
+        self.category_names = [None] + [name for name, count in category_counts]
+        selected = (self.selected_category, self.selected_tags)
+        if self.selected_category not in self.category_names:
+            self.selected_category = None
+        self.category_listbox.delete(0, tk.END)
+        self.category_listbox.insert(tk.END, *category_labels)
+        self.category_listbox.selection_set(self.category_names.index(self.selected_category))
+
+        self.tag_names = [name for name, count in tag_counts]
+        self.selected_tags = [tag for tag in self.selected_tags if tag in self.blog.facets.tags]
+        self.tag_listbox.delete(0, tk.END)
+        self.tag_listbox.insert(tk.END, *tag_labels)
+        for tag in self.selected_tags:
+            self.tag_listbox.selection_set(bisect_left(self.tag_names, tag))
+
+        if (self.selected_category, self.selected_tags) != selected:
+            # The last post of a selected facet is gone, so list what the
+            # remaining selection matches
+            self.last_query = ""
+            self.filter_posts(self.search_var.get())
+
+    def complete_search(self, event):
+        """Complete the last word of the search with the most used title or tag word"""
+        query = self.search_var.get()
+        word = query.split()[-1] if query and not query[-1].isspace() else ""
+        completions = self.blog.complete(word, 1) if word else []
+        if completions:
+            self.search_var.set(query[:len(query) - len(word)] + completions[0])
+            self.search_entry.icursor(tk.END)
+        # Keep the focus in the search box
+        return "break"
+
+    def apply_suggestion(self, event):
+        """Search for the suggested correction"""
+        if self.suggestion:
+            self.search_var.set(self.suggestion)
+
+    def on_fuzzy_toggle(self):
+        """Switch between typo-tolerant and plain search results"""
+        if self.fuzzy_var.get():
+            self.ranked_var.set(False)
+        self.last_query = ""
+        self.filter_posts(self.search_var.get())
+
+    def on_ranked_toggle(self):
+        """Switch between ranked and plain search results"""
+        if self.ranked_var.get():
+            self.fuzzy_var.set(False)
+        self.last_query = ""
+        self.filter_posts(self.search_var.get())
+
+    @traced()
+    def on_sort_change(self, event=None):
+        """Show the listed posts in the selected order"""
+        self.sort_order = SORT_ORDERS[self.sort_var.get()]
+        if self.cancel_search():
+            # A running search walks the candidates in the old order, so
+            # search again in the new one
+            self.last_query = ""
+            self.filter_posts(self.search_var.get())
+            return
+        if self.filtered_keys is None:
+            # Ranked results keep their order
+            return
+        index = self.blog.sort_index(self.sort_order)
+        if len(self.filtered_ids) == len(self.blog.posts):
+            # Every post is listed, so the index already holds the order
+            self.set_filtered(index.ids())
+        else:
+            self.set_filtered(index.order(self.filtered_ids))
+
+    def set_filtered(self, post_ids):
+        """List the posts with post_ids, which are in display order"""
+        self.filtered_ids = post_ids
+        self.filtered_keys = self.blog.sort_index(self.sort_order).keys_of(post_ids)
+        self.refresh_post_list()
+
+    def filtered_row(self, key):
+        """Return the list row of the post with a sort key, or None if it is filtered out"""
+        if self.filtered_keys is None:
+            return None
+        row = bisect_left(self.filtered_keys, key)
+        if row < len(self.filtered_keys) and self.filtered_keys[row] == key:
+            return row
+        return None
+
+    def matching_posts(self, posts):
+        """Return the posts that belong in the list under the current search and facets"""
+        query = self.search_var.get()
+        if query and self.fuzzy_var.get():
+            # One fuzzy search for the whole batch
+            matched = set(self.blog.fuzzy_search(query, within={post.post_id for post in posts}))
+            return [post for post in posts
+                    if post.post_id in matched and self.matches_filter_facets(post)]
+        return [post for post in posts if self.matches_filter(post)]
+
+    def merge_filtered(self, posts):
+        """List several posts in their places in the sort order"""
+        index = self.blog.sort_index(self.sort_order)
+        new = sorted((index.key(post), post.post_id) for post in posts)
+        if not new:
+            return
+        if not self.filtered_keys or new[0][0] > self.filtered_keys[-1]:
+            # Posts loaded in id order under the created order go last
+            self.filtered_keys.extend(key for key, post_id in new)
+            self.filtered_ids.extend(post_id for key, post_id in new)
+        else:
+            merged = list(heapq.merge(zip(self.filtered_keys, self.filtered_ids), new))
+            self.filtered_keys = [key for key, post_id in merged]
+            self.filtered_ids = [post_id for key, post_id in merged]
+        self.refresh_post_list()
+
+    def insert_filtered(self, post):
+        """List a post in its place in the sort order"""
+        if self.filtered_keys is None:
+            return
+        key = self.blog.sort_index(self.sort_order).key(post)
+        row = bisect_left(self.filtered_keys, key)
+        self.filtered_keys.insert(row, key)
+        self.filtered_ids.insert(row, post.post_id)
+        self.post_list_view.insert_row(row)
+
+    def remove_filtered(self, row):
+        """Stop listing the post in a row"""
+        del self.filtered_keys[row]
+        del self.filtered_ids[row]
+        self.post_list_view.delete_row(row)
+
+    @traced("refresh_post_list", "ui")
     def refresh_post_list(self):
         """Refresh the post list display"""
-        # Clear listbox
-        self.post_listbox.delete(0, tk.END)
-        
-        # Populate with filtered posts
-        for post in self.filtered_posts:
-            self.post_listbox.insert(tk.END, f"{post.title} ({post.timestamp})")
-        
+        # Apply only the rows that changed
+        self.post_list_view.set_items(PostRows(self.filtered_ids, self.blog.posts))
+
+        # Offer a correction when a search finds nothing
+        query = self.search_var.get()
+        self.suggestion = self.blog.did_you_mean(query) if query.strip() and not self.filtered_ids else None
+        self.suggestion_label.config(text=f"Did you mean: {self.suggestion}?" if self.suggestion else "")
+
         # Update status
-        if self.search_var.get():
-            self.status_var.set(f"Showing {len(self.filtered_posts)} of {len(self.posts)} posts")
+        if self.filtered_keys is None:
+            self.status_var.set(f"Showing the {len(self.filtered_ids)} best of {self.match_count} "
+                                f"posts matching any word")
+        elif self.search_var.get() or self.selected_category or self.selected_tags:
+            self.status_var.set(f"Showing {len(self.filtered_ids)} of {len(self.blog.posts)} posts")
         else:
-            self.status_var.set(f"Showing all {len(self.posts)} posts")
+            self.status_var.set(f"Showing all {len(self.blog.posts)} posts")
 
     def refresh_posts(self):
         """Refresh the posts list"""
         self.clear_search()
-        self.status_var.set(f"Refreshed. Showing all {len(self.posts)} posts")
+        self.status_var.set(f"Refreshed. Showing all {len(self.blog.posts)} posts")
 
+    def show_memory_usage(self):
+        """Show how much memory the loaded posts use"""
+        report = post_memory_report(list(self.blog.posts.values()))
+        messagebox.showinfo("Memory Usage", format_report(report))
+
+    @traced()
     def load_posts(self):
-        """Load posts from a JSON file"""
+        """Load posts from storage in the background, listing them as they arrive"""
+        if not self.blog.storage.exists():
+            self.status_var.set("No existing posts found. Create your first post!")
+            return
+        self.loading = True
+        self.load_finished = False
+        # A search still running would list posts that are about to be replaced
+        self.cancel_search()
+        self.last_query = ""
+        self.blog.begin_load()
+        self.set_filtered([])
+        self.load_progress_var.set(0)
+        self.load_progress.pack(side=tk.RIGHT, padx=5)
+        self.status_var.set("Loading posts...")
+        # Storage is only used from the saver thread; changes queued while
+        # loading are written after it
+        self.saver.submit(self.read_posts, done=self.on_posts_read, failed=self.on_load_failed)
+        self.root.after(LOAD_POLL_MS, self.poll_load)
+
+    def read_posts(self):
+        """Queue the stored posts batch by batch for the UI (runs on the saver thread)"""
+        # Changes applied ahead of the load in the same batch are written
+        # first, or reading the file back would drop them
+        self.blog.storage.flush()
+        with TRACER.span("storage.load", "io"):
+            for posts, fraction in self.blog.iter_load():
+                if self.load_cancelled:
+                    break
+                self.load_queue.put((posts, fraction))
+
+    def on_posts_read(self, result):
+        """Note that the last batch is queued, so the load ends once the queue is drained"""
+        self.load_finished = True
+
+    def poll_load(self):
+        """Add the next batch of loaded posts, one batch per callback so the UI stays responsive"""
         try:
-            if os.path.exists(self.data_file):
-                with open(self.data_file, 'r') as file:
-                    posts_data = json.load(file)
-                    self.posts = [BlogPost.from_dict(data) for data in posts_data]
-                    
-                # Initialize filtered posts
-                self.filtered_posts = self.posts.copy()
-                self.filtered_indices = list(range(len(self.posts)))
-                
-                # Clear listbox and populate with loaded posts
-                self.post_listbox.delete(0, tk.END)
-                for post in self.filtered_posts:
-                    self.post_listbox.insert(tk.END, f"{post.title} ({post.timestamp})")
-                    
-                self.status_var.set(f"Loaded {len(self.posts)} posts from file.")
-            else:
-                self.status_var.set("No existing posts found. Create your first post!")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load posts: {str(e)}")
-            self.status_var.set("Error loading posts.")
-
-    def save_posts(self):
-        """Save posts to a JSON file"""
+            posts, fraction = self.load_queue.get_nowait()
+        except queue.Empty:
+            if self.load_finished:
+                self.finish_loading()
+            elif self.loading:
+                self.root.after(LOAD_POLL_MS, self.poll_load)
+            return
+        self.add_loaded_posts(posts, fraction)
+        self.root.after(1, self.poll_load)
+
+    @traced("add_loaded_posts", "ui")
+    def add_loaded_posts(self, posts, fraction):
+        """Add a batch of loaded posts and list the ones matching the search and facets"""
+        self.blog.add_loaded(posts)
+        if self.cancel_search():
+            # A running search would finish without the new posts
+            self.last_query = ""
+            self.filter_posts(self.search_var.get())
+        elif self.filtered_keys is not None:
+            self.merge_filtered(self.matching_posts(posts))
+        self.refresh_facets()
+        self.load_progress_var.set(fraction * 100)
+        self.status_var.set(f"Loading posts... {len(self.blog.posts)} loaded")
+
+    def finish_loading(self):
+        """Show every loaded post once the last batch is in"""
+        self.loading = False
+        self.load_progress.pack_forget()
         try:
-            posts_data = [post.to_dict() for post in self.posts]
-            with open(self.data_file, 'w') as file:
-                json.dump(posts_data, file, indent=2)
-            self.status_var.set(f"Saved {len(self.posts)} posts to file.")
+            reordered = self.blog.finish_load()
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to save posts: {str(e)}")
-            self.status_var.set("Error saving posts.")
+            self.on_load_failed(e)
+            return
+        if reordered or self.filtered_keys is None:
+            # Ranked results are ranked once over every post
+            self.last_query = ""
+            self.filter_posts(self.search_var.get())
+        self.refresh_facets()
+        self.status_var.set(f"Loaded {len(self.blog.posts)} posts from file.")
+
+    def on_load_failed(self, error):
+        self.loading = False
+        self.load_progress.pack_forget()
+        messagebox.showerror("Error", f"Failed to load posts: {str(error)}")
+        self.status_var.set("Error loading posts.")
+
+    def wait_for_loading(self):
+        """Warn and return True while posts are still loading"""
+        if self.loading:
+            messagebox.showwarning("Warning", "Posts are still loading. Try again in a moment.")
+            return True
+        return False
+
+    def poll_saver(self):
+        """Hand results of background saves to the UI"""
+        self.saver.poll()
+        if self.import_message is not None:
+            self.status_var.set(self.import_message)
+            self.import_message = None
+        self.root.after(SAVER_POLL_MS, self.poll_saver)
+
+    def on_saved(self, changes):
+        """Report that queued changes reached the disk"""
+        self.status_var.set(f"Saved {len(self.blog.posts)} posts to file.")
+
+    def on_save_failed(self, error):
+        """Report a background save that failed"""
+        messagebox.showerror("Error", f"Failed to save posts: {str(error)}")
+        self.status_var.set("Error saving posts.")
+
+    def toggle_instrumentation(self):
+        """Turn recording of handler timings on or off"""
+        if self.instrument_var.get():
+            TRACER.clear()
+            TRACER.enable()
+            self.status_var.set("Instrumentation on. Handler latencies are shown in the status bar.")
+        else:
+            TRACER.disable()
+            self.status_var.set("Instrumentation off.")
+        self.show_latency()
+
+    def show_latency(self):
+        """Show the p50 and p99 handler latency while instrumentation is on"""
+        if not TRACER.enabled:
+            self.latency_var.set("")
+            return
+        summary = TRACER.latency_summary()
+        if summary is None:
+            self.latency_var.set("No handler calls yet")
+        else:
+            p50, p99, count, slowest = summary
+            self.latency_var.set(f"p50 {p50:.1f} ms | p99 {p99:.1f} ms | {count} calls | slowest: {slowest}")
+        self.root.after(LATENCY_REFRESH_MS, self.show_latency)
+
+    def export_trace(self):
+        """Write the recorded spans as a Chrome trace"""
+        if not TRACER.events:
+            messagebox.showwarning("Warning", "Nothing recorded yet. Turn on View > Instrumentation first.")
+            return
+        file_path = filedialog.asksaveasfilename(defaultextension=".json",
+                                                 filetypes=[("Chrome trace", "*.json"), ("All files", "*.*")])
+        if file_path:
+            try:
+                TRACER.export_chrome_trace(file_path)
+                self.status_var.set(f"Exported {len(TRACER.events)} spans to {file_path}")
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to export trace: {str(e)}")
+
+    def exit_app(self):
+        """Write pending changes to disk and quit"""
+        self.status_var.set("Saving...")
+        self.load_cancelled = True
+        self.saver.close()
+        self.preview_server.close()
+        self.root.quit()
 
     def backup_data(self):
-        """Backup posts to a separate file"""
-        try:
-            posts_data = [post.to_dict() for post in self.posts]
-            with open(self.backup_file, 'w') as file:
-                json.dump(posts_data, file, indent=2)
-            messagebox.showinfo("Backup", f"Successfully backed up {len(self.posts)} posts!")
-            self.status_var.set(f"Backed up {len(self.posts)} posts.")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to backup posts: {str(e)}")
-            self.status_var.set("Error backing up posts.")
+        """Take a backup snapshot of the posts"""
+        if self.wait_for_loading():
+            return
+        posts_data = self.blog.posts_data()
+        self.status_var.set(f"Backing up {len(posts_data)} posts...")
+        # The snapshot is written on the saver thread
+        self.saver.submit(self.blog.write_backup, posts_data,
+                          done=self.on_backup_done, failed=self.on_backup_failed)
+
+    def on_backup_done(self, result):
+        count, written = result
+        messagebox.showinfo("Backup", f"Successfully backed up {count} posts ({written} changed)!")
+        self.status_var.set(f"Backed up {count} posts.")
+
+    def on_backup_failed(self, error):
+        messagebox.showerror("Error", f"Failed to backup posts: {str(error)}")
+        self.status_var.set("Error backing up posts.")
 
     def restore_data(self):
-        """Restore posts from backup file"""
+        """Restore posts from a backup snapshot"""
+        if self.wait_for_loading():
+            return
+        self.status_var.set("Reading backups...")
+        self.saver.submit(self.blog.list_backups, done=self.choose_backup, failed=self.on_restore_failed)
+
+    def choose_backup(self, snapshots):
+        """Ask which snapshot to restore and read it in the background"""
+        self.status_var.set("Ready")
+        if not snapshots:
+            messagebox.showwarning("Restore", "No backup file found!")
+            return
+        snapshot = SnapshotDialog(self.root, snapshots).result
+        if snapshot is None:
+            return
+        result = messagebox.askyesno("Confirm Restore", 
+                                   f"Are you sure you want to restore the backup from {snapshot['created']}? This will replace all current posts.")
+        if result:
+            self.status_var.set("Restoring posts...")
+            self.saver.submit(self.blog.read_backup, snapshot["id"],
+                              done=self.finish_restore, failed=self.on_restore_failed)
+
+    def finish_restore(self, posts_data):
+        """Replace the current posts with the ones read from the backup"""
         try:
-            if os.path.exists(self.backup_file):
-                result = messagebox.askyesno("Confirm Restore", 
-                                           "Are you sure you want to restore from backup? This will replace all current posts.")
-                if result:
-                    with open(self.backup_file, 'r') as file:
-                        posts_data = json.load(file)
-                        self.posts = [BlogPost.from_dict(data) for data in posts_data]
-                        
-                    # Save to main file and refresh
-                    self.save_posts()
-                    self.filtered_posts = self.posts.copy()
-                    self.filtered_indices = list(range(len(self.posts)))
-                    self.refresh_post_list()
-                    self.clear_editor()
-                    messagebox.showinfo("Restore", f"Successfully restored {len(self.posts)} posts!")
-            else:
-                messagebox.showwarning("Restore", "No backup file found!")
+            for post in self.blog.posts.values():
+                self.remove_preview(post)
+            # Queues the restored posts to be saved
+            self.blog.replace_posts(posts_data)
+            self.refresh_facets()
+            self.last_query = ""
+            self.filter_posts(self.search_var.get())
+            self.clear_editor()
+            messagebox.showinfo("Restore", f"Successfully restored {len(self.blog.posts)} posts!")
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to restore posts: {str(e)}")
-            self.status_var.set("Error restoring posts.")
+            self.on_restore_failed(e)
+
+    def on_restore_failed(self, error):
+        messagebox.showerror("Error", f"Failed to restore posts: {str(error)}")
+        self.status_var.set("Error restoring posts.")
+
+    def import_markdown(self):
+        """Import a folder of Markdown files with front matter"""
+        path = filedialog.askdirectory(title="Choose the folder of Markdown posts")
+        if path:
+            self.start_import(path)
+
+    def import_jsonl(self):
+        """Import a file with one JSON post per line"""
+        path = filedialog.askopenfilename(
+            filetypes=[("JSON Lines files", "*.jsonl"), ("All files", "*.*")]
+        )
+        if path:
+            self.start_import(path)
+
+    def start_import(self, path):
+        """Stream posts into storage on the saver thread"""
+        if self.wait_for_loading():
+            return
+        self.status_var.set("Importing posts...")
+        self.saver.submit(self.blog.import_posts, path, None, self.on_import_progress,
+                          done=self.on_import_done, failed=self.on_import_failed)
+
+    def on_import_progress(self, imported, skipped, elapsed):
+        # Runs on the saver thread, so it only leaves a message for poll_saver
+        self.import_message = (f"Importing... {imported} posts imported, {skipped} skipped "
+                               f"({imported / max(elapsed, 1e-9):.0f} posts/s)")
+
+    def on_import_done(self, result):
+        """Show the imported posts"""
+        # Read back in the background like at startup; changes queued during
+        # the import are written before the load runs
+        self.load_posts()
+        message = f"Imported {result['imported']} posts in {result['seconds']:.1f}s."
+        if result["skipped"]:
+            message += f"\n\nSkipped {result['skipped']}:\n" + "\n".join(result["errors"])
+        messagebox.showinfo("Import", message)
+
+    def on_import_failed(self, error):
+        messagebox.showerror("Error", f"Failed to import posts: {str(error)}")
+        self.status_var.set("Error importing posts.")
 
     def export_as_html(self):
         """Export current post as HTML"""
-        if self.current_post_index is not None:
-            post = self.posts[self.current_post_index]
-            html_content = f"""
-<!DOCTYPE html>
-<html>
-<head>
-    <title>{post.title}</title>
-    <style>
-        body {{ font-family: Arial, sans-serif; max-width: 800px; margin: 0 auto; padding: 20px; }}
-        h1 {{ color: #333; }}
-        .meta {{ color: #666; font-size: 0.9em; }}
-        .content {{ margin-top: 20px; line-height: 1.6; }}
-        .category {{ background: #e0e0e0; padding: 2px 6px; border-radius: 3px; }}
-        .tags {{ margin-top: 10px; }}
-        .tag {{ background: #4CAF50; color: white; padding: 2px 6px; border-radius: 3px; margin-right: 5px; }}
-    </style>
-</head>
-<body>
-    <h1>{post.title}</h1>
-    <div class="meta">
-        <span>Published: {post.timestamp}</span>
-        <span class="category">Category: {post.category}</span>
-    </div>
-    <div class="content">
-        {self.format_text_for_html(post.content)}
-    </div>
-    <div class="tags">
-        Tags: {' '.join(f'<span class="tag">{tag}</span>' for tag in post.tags)}
-    </div>
-</body>
-</html>
-            """
+        if self.current_post_id is not None:
+            post = self.blog.posts[self.current_post_id]
             
             file_path = filedialog.asksaveasfilename(
                 defaultextension=".html",
@@ -474,8 +985,7 @@ class EnhancedBlogApp:
             
             if file_path:
                 try:
-                    with open(file_path, 'w', encoding='utf-8') as f:
-                        f.write(html_content)
+                    self.blog.export_html(post, file_path)
                     messagebox.showinfo("Export", "Post exported as HTML successfully!")
                     self.status_var.set("Post exported as HTML.")
                 except Exception as e:
@@ -483,51 +993,71 @@ class EnhancedBlogApp:
         else:
             messagebox.showwarning("Export", "Select a post to export!")
 
-    def format_text_for_html(self, text):
-        """Simple formatting for HTML export"""
-        # Convert markdown-style formatting to HTML
-        text = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', text)  # Bold
-        text = re.sub(r'\*(.*?)\*', r'<em>\1</em>', text)  # Italic
-        text = re.sub(r'__(.*?)__', r'<u>\1</u>', text)  # Underline
-        # Convert newlines to paragraphs
-        paragraphs = text.split('\n\n')
-        return '\n\n'.join(f'<p>{p}</p>' for p in paragraphs if p.strip())
+    def build_site(self):
+        """Build a static HTML site of every post"""
+        if self.wait_for_loading():
+            return
+        output_dir = filedialog.askdirectory(title="Choose the site output folder")
+        if output_dir:
+            posts_data = self.blog.posts_data()
+            self.status_var.set(f"Building site from {len(posts_data)} posts...")
+            self.saver.submit(build_site, posts_data, output_dir,
+                              done=self.on_site_built, failed=self.on_build_failed)
+
+    def on_site_built(self, stats):
+        messagebox.showinfo("Build Site", f"Site built: {stats['rendered']} posts rendered, "
+                                          f"{stats['skipped']} unchanged, {stats['removed']} removed.")
+        self.status_var.set("Site built.")
+
+    def on_build_failed(self, error):
+        messagebox.showerror("Error", f"Failed to build site: {str(error)}")
+        self.status_var.set("Error building site.")
 
     def export_as_pdf(self):
         """Export current post as PDF (placeholder)"""
-        if self.current_post_index is not None:
+        if self.current_post_id is not None:
             messagebox.showinfo("Export", "PDF export feature would be implemented with a PDF library.\n\nThis is a placeholder for the functionality.")
         else:
             messagebox.showwarning("Export", "Select a post to export!")
 
     def create_post(self):
         """Create a new blog post"""
+        # New posts get ids after every stored one
+        if self.wait_for_loading():
+            return
         title = simpledialog.askstring("Post Title", "Enter the title of the post:")
         if title:
-            content = self.text_area.get("1.0", tk.END).strip()
+            content = self.editor_buffer.text().strip()
             if content:
                 # Get category and tags
                 category = self.category_var.get()
-                tags_str = self.tags_var.get()
-                tags = [tag.strip() for tag in tags_str.split(',') if tag.strip()]
-                
-                # Create new post
-                new_post = BlogPost(title, content, category=category, tags=tags)
-                self.posts.append(new_post)
+                tags = parse_tags(self.tags_var.get())
                 
-                # Add to filtered posts if it matches current search
-                if not self.search_var.get() or new_post.matches_search(self.search_var.get()):
-                    self.filtered_posts.append(new_post)
-                    self.filtered_indices.append(len(self.posts) - 1)
+                # Timed without the dialogs around it
+                with TRACER.span("create_post", "handler"):
+                    # Create new post and queue it to be saved
+                    try:
+                        new_post = self.blog.add_post(title, content, category, tags)
+                    except Exception as e:
+                        messagebox.showerror("Error", f"Failed to save posts: {str(e)}")
+                        self.status_var.set("Error saving posts.")
+                        return
+                    # A running search would finish without the new post, and
+                    # ranked results are ranked again
+                    restart_search = self.cancel_search() or self.filtered_keys is None
+
+                    # Add to filtered posts if it matches current search and facets
+                    if self.matches_filter(new_post):
+                        self.insert_filtered(new_post)
                 
-                # Update listbox
-                self.refresh_post_list()
+                    # Update facet counts
+                    self.refresh_facets()
                 
-                # Save posts
-                self.save_posts()
+                    if restart_search:
+                        self.filter_posts(self.search_var.get())
                 
                 # Clear editor
-                self.text_area.delete("1.0", tk.END)
+                self.show_in_editor("")
                 self.category_var.set("")
                 self.tags_var.set("")
                 
@@ -539,18 +1069,18 @@ class EnhancedBlogApp:
             if title is not None:  # User pressed OK but didn't enter title
                 messagebox.showwarning("Warning", "Title cannot be empty!")
 
+    @traced()
     def on_post_select(self, event):
         """Handle post selection from listbox"""
         selection = self.post_listbox.curselection()
         if selection:
             index = selection[0]
-            # Get the actual post index from filtered indices
-            self.current_post_index = self.filtered_indices[index]
-            post = self.posts[self.current_post_index]
+            # Get the post id of the selected row
+            self.current_post_id = self.filtered_ids[index]
+            post = self.blog.posts[self.current_post_id]
             
             # Display post content in text area
-            self.text_area.delete("1.0", tk.END)
-            self.text_area.insert("1.0", post.content)
+            self.show_in_editor(post.content)
             
             # Update category and tags
             self.category_var.set(post.category)
@@ -561,34 +1091,90 @@ class EnhancedBlogApp:
             
             self.status_var.set(f"Viewing post: {post.title}")
 
+    def show_in_editor(self, content):
+        """Show content in the text area, in slices over idle callbacks when it is large"""
+        self.cancel_editor_load()
+        self.text_area.delete("1.0", tk.END)
+        # The buffer holds the whole text at once, so putting it in the widget is no edit
+        self.editor_buffer.load(content, filling=True)
+        if len(content) > EDITOR_SLICE_CHARS:
+            self.insert_editor_slice(content, 0)
+        else:
+            self.text_area.insert("1.0", content)
+            self.editor_buffer.fill_done()
+
+    @traced("insert_editor_slice", "ui")
+    def insert_editor_slice(self, content, start):
+        """Append the next slice of a large post to the text area and schedule the rest"""
+        end = start + EDITOR_SLICE_CHARS
+        self.text_area.config(state=tk.NORMAL)
+        self.text_area.insert("end-1c", content[start:end])
+        if end < len(content):
+            # No typing into a half-shown post
+            self.text_area.config(state=tk.DISABLED)
+            self.editor_load_id = self.root.after_idle(self.insert_editor_slice, content, end)
+            return
+        self.editor_load_id = None
+        self.editor_buffer.fill_done()
+
+    def cancel_editor_load(self):
+        """Stop putting a large post in the editor"""
+        if self.editor_load_id is not None:
+            self.root.after_cancel(self.editor_load_id)
+            self.editor_load_id = None
+            self.text_area.config(state=tk.NORMAL)
+
     def edit_post(self):
         """Edit the selected blog post"""
-        if self.current_post_index is not None:
-            content = self.text_area.get("1.0", tk.END).strip()
+        # The selected post may not be loaded again yet
+        if self.wait_for_loading():
+            return
+        if self.current_post_id is not None:
+            # Unchanged text is the post's own; edited text is joined from the buffer's lines
+            text = self.editor_buffer.text()
+            content = text.strip()
+            post = self.blog.posts[self.current_post_id]
+            category = self.category_var.get()
+            tags = parse_tags(self.tags_var.get())
+            if (not self.editor_buffer.modified and category == post.category
+                    and tuple(tags) == post.tags):
+                # Nothing to write, and the post keeps its timestamp
+                self.status_var.set(f"No changes to save in: {post.title}")
+                return
             if content:
-                # Update the post
-                post = self.posts[self.current_post_index]
-                post.content = content
-                post.timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                post.category = self.category_var.get()
-                tags_str = self.tags_var.get()
-                post.tags = [tag.strip() for tag in tags_str.split(',') if tag.strip()]
+                # Timed without the dialogs around it
+                with TRACER.span("edit_post", "handler"):
+                    # Where the post is listed before the edit
+                    old_key = self.blog.sort_index(self.sort_order).key(post)
+                    # Update the post and queue it to be saved
+                    try:
+                        self.blog.update_post(post, content, category, tags)
+                    except Exception as e:
+                        messagebox.showerror("Error", f"Failed to save posts: {str(e)}")
+                        self.status_var.set("Error saving posts.")
+                        return
+                    # A running search would finish with stale matches, and
+                    # ranked results are ranked again
+                    restart_search = self.cancel_search() or self.filtered_keys is None
+                    # Later saves only count edits made from here on
+                    self.editor_buffer.load(text, self.editor_buffer.filling)
+
+                    # Update listbox entry
+                    row = self.filtered_row(old_key)
+                    if row is not None and self.blog.sort_index(self.sort_order).key(post) == old_key:
+                        self.post_list_view.update_row(row)
+                    elif row is not None:
+                        # The edit moved the post in the sort order
+                        self.remove_filtered(row)
+                        self.insert_filtered(post)
+                    elif self.matches_filter(post):
+                        # Post not in filtered list, add it since it matches
+                        self.insert_filtered(post)
+                    self.refresh_facets()
                 
-                # Update listbox entry
-                # Find the position in filtered posts
-                try:
-                    filtered_index = self.filtered_indices.index(self.current_post_index)
-                    self.post_listbox.delete(filtered_index)
-                    self.post_listbox.insert(filtered_index, f"{post.title} ({post.timestamp})")
-                except ValueError:
-                    # Post not in filtered list, add it if it matches search
-                    if not self.search_var.get() or post.matches_search(self.search_var.get()):
-                        self.filtered_posts.append(post)
-                        self.filtered_indices.append(self.current_post_index)
-                        self.refresh_post_list()
-                
-                # Save posts
-                self.save_posts()
+                    if restart_search:
+                        self.filter_posts(self.search_var.get())
+                    self.update_preview(post)
                 
                 self.status_var.set(f"Edited post: {post.title}")
                 messagebox.showinfo("Success", "Post updated successfully!")
@@ -599,38 +1185,40 @@ class EnhancedBlogApp:
 
     def delete_post(self):
         """Delete the selected blog post"""
-        if self.current_post_index is not None:
+        if self.wait_for_loading():
+            return
+        if self.current_post_id is not None:
             # Confirm deletion
-            post = self.posts[self.current_post_index]
+            post = self.blog.posts[self.current_post_id]
             result = messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete '{post.title}'?")
             
             if result:
-                # Remove from posts list
-                del self.posts[self.current_post_index]
+                # Timed without the dialogs around it
+                with TRACER.span("delete_post", "handler"):
+                    # Remove from posts and queue the removal to be saved
+                    try:
+                        self.blog.delete_post(post)
+                    except Exception as e:
+                        messagebox.showerror("Error", f"Failed to save posts: {str(e)}")
+                        self.status_var.set("Error saving posts.")
+                        return
+                    restart_search = self.cancel_search() or self.filtered_keys is None
                 
-                # Update filtered lists
-                # Remove from filtered posts if present
-                try:
-                    filtered_index = self.filtered_indices.index(self.current_post_index)
-                    del self.filtered_posts[filtered_index]
-                    del self.filtered_indices[filtered_index]
-                    
-                    # Update indices in filtered_indices that are greater than current_post_index
-                    self.filtered_indices = [i-1 if i > self.current_post_index else i for i in self.filtered_indices]
-                except ValueError:
-                    pass  # Not in filtered list
-                
-                # Remove from listbox
-                self.refresh_post_list()
+                    # Remove from filtered posts and the listbox if present
+                    row = self.filtered_row(self.blog.sort_index(self.sort_order).key(post))
+                    if row is not None:
+                        self.remove_filtered(row)
+                    self.refresh_facets()
                 
-                # Save posts
-                self.save_posts()
+                    if restart_search:
+                        self.filter_posts(self.search_var.get())
+                    self.remove_preview(post)
                 
                 # Clear editor
-                self.text_area.delete("1.0", tk.END)
+                self.show_in_editor("")
                 self.category_var.set("")
                 self.tags_var.set("")
-                self.current_post_index = None
+                self.current_post_id = None
                 
                 self.status_var.set(f"Deleted post: {post.title}")
                 messagebox.showinfo("Success", "Post deleted successfully!")
@@ -639,72 +1227,56 @@ class EnhancedBlogApp:
 
     def save_current_post(self):
         """Save the currently selected post"""
-        if self.current_post_index is not None:
+        if self.current_post_id is not None:
             self.edit_post()
         else:
             messagebox.showwarning("Warning", "Select a post to save!")
 
     def clear_editor(self):
         """Clear the text editor"""
-        self.text_area.delete("1.0", tk.END)
+        self.show_in_editor("")
         self.category_var.set("")
         self.tags_var.set("")
-        self.current_post_index = None
+        self.current_post_id = None
         self.update_word_count(None)
         self.status_var.set("Editor cleared.")
 
     def preview_post(self):
         """Preview the current post in HTML format"""
-        if self.current_post_index is not None:
-            post = self.posts[self.current_post_index]
-            title = post.title
-            content = post.content
-            category = post.category
-            tags = post.tags
-            timestamp = post.timestamp
+        if self.current_post_id is not None:
+            post = self.blog.posts[self.current_post_id]
             
-            # Create HTML content for preview
-            html_content = f"""<!DOCTYPE html>
-<html>
-<head>
-    <title>{title} - Preview</title>
-    <style>
-        body {{ font-family: Arial, sans-serif; max-width: 800px; margin: 0 auto; padding: 20px; }}
-        h1 {{ color: #333; }}
-        .meta {{ color: #666; font-size: 0.9em; }}
-        .content {{ margin-top: 20px; line-height: 1.6; }}
-        .category {{ background: #e0e0e0; padding: 2px 6px; border-radius: 3px; }}
-        .tags {{ margin-top: 10px; }}
-        .tag {{ background: #4CAF50; color: white; padding: 2px 6px; border-radius: 3px; margin-right: 5px; }}
-    </style>
-</head>
-<body>
-    <h1>{title}</h1>
-    <div class="meta">
-        <span>Published: {timestamp}</span>
-        <span class="category">Category: {category}</span>
-    </div>
-    <div class="content">
-        {self.format_text_for_html(content)}
-    </div>
-    <div class="tags">
-        Tags: {' '.join(f'<span class="tag">{tag}</span>' for tag in tags)}
-    </div>
-</body>
-</html>"""
-            
-            # Save to temporary file and open in browser
-            temp_file = "temp_preview.html"
             try:
-                with open(temp_file, 'w', encoding='utf-8') as f:
-                    f.write(html_content)
-                webbrowser.open(f'file://{os.path.abspath(temp_file)}')
-                self.status_var.set("Preview opened in browser.")
+                # Serve the preview from memory; an open preview reloads itself
+                key = self.preview_key(post)
+                url = self.preview_server.publish(key, render_post_html(post.to_dict(), " - Preview"))
+                if self.preview_server.claim_open(key):
+                    webbrowser.open(url)
+                    self.status_var.set("Preview opened in browser.")
+                else:
+                    self.status_var.set("Preview updated in browser.")
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to create preview: {str(e)}")
         else:
             messagebox.showwarning("Preview", "Select a post to preview!")
 
+    def preview_key(self, post):
+        """Return the key of a post's preview page"""
+        return str(post.post_id)
+
+    def update_preview(self, post):
+        """Republish the preview of a saved post if it was previewed"""
+        key = self.preview_key(post)
+        if self.preview_server.page(key) is not None:
+            try:
+                self.preview_server.publish(key, render_post_html(post.to_dict(), " - Preview"))
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to update preview: {str(e)}")
+
+    def remove_preview(self, post):
+        """Stop serving the preview of a post that no longer exists"""
+        self.preview_server.unpublish(self.preview_key(post))
+
     def show_about(self):
         """Show about dialog"""
         about_text = """
@@ -728,6 +1300,19 @@ A feature-rich blog application with:
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Personal blog application")
+    parser.add_argument("--storage", choices=sorted(STORAGE_MODES), default="json",
+                        help="how posts are stored on disk (default: json)")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="record handler timings from startup and write them to FILE as a Chrome trace on exit")
+    args = parser.parse_args()
+
+    if args.trace:
+        TRACER.enable()
     root = tk.Tk()
-    app = EnhancedBlogApp(root)
+    app = EnhancedBlogApp(root, storage_mode=args.storage)
     root.mainloop()
+    app.saver.close()
+    app.preview_server.close()
+    if args.trace:
+        TRACER.export_chrome_trace(args.trace)
@@ -0,0 +1,205 @@
+import argparse
+import re
+import sys
+
+from blog_core import BACKUP_DIR, DATA_FILE, Blog, parse_tags
+from search_index import COMPLETION_LIMIT, RANKED_LIMIT
+from storage import STORAGE_MODES
+
+
+def month_arg(text):
+    """Check a YYYY-MM month given on the command line"""
+    if not re.fullmatch(r"[0-9]{4}-[0-9]{2}", text):
+        raise argparse.ArgumentTypeError(f"not a YYYY-MM month: {text}")
+    return text
+
+
+def post_row(post):
+    """Return the line a post is listed as"""
+    category = f" [{post.category}]" if post.category else ""
+    return f"{post.post_id:>6}  {post.timestamp}  {post.title}{category}"
+
+
+def list_posts(blog, args):
+    post_ids = blog.facets.filter(args.category, args.tag)
+    for post_id in blog.posts if post_ids is None else post_ids:
+        print(post_row(blog.posts[post_id]))
+
+
+def list_facets(blog, args):
+    counts = blog.facets.tag_counts() if args.kind == "tags" else blog.facets.category_counts()
+    for name, count in counts:
+        print(f"{count:>6}  {name}")
+
+
+def search_posts(blog, args):
+    if args.ranked:
+        best, count = blog.ranked_search(args.query, args.limit)
+        for post_id in best:
+            print(post_row(blog.posts[post_id]))
+        print(f"Best {len(best)} of {count} posts matching any word", file=sys.stderr)
+        return
+    matches = blog.fuzzy_search(args.query) if args.fuzzy else blog.search(args.query)
+    for post_id in matches:
+        print(post_row(blog.posts[post_id]))
+    print(f"{len(matches)} of {len(blog.posts)} posts match", file=sys.stderr)
+    suggestion = None if matches else blog.did_you_mean(args.query)
+    if suggestion:
+        print(f"Did you mean: {suggestion}?", file=sys.stderr)
+
+
+def complete_word(blog, args):
+    for word in blog.complete(args.prefix, args.limit):
+        print(word)
+
+
+def add_post(blog, args):
+    if args.content is not None:
+        content = args.content
+    elif args.file is not None:
+        with open(args.file, encoding='utf-8') as f:
+            content = f.read()
+    else:
+        content = sys.stdin.read()
+    content = content.strip()
+    if not args.title.strip():
+        raise SystemExit("Title cannot be empty!")
+    if not content:
+        raise SystemExit("Content cannot be empty!")
+    post = blog.add_post(args.title, content, args.category, parse_tags(args.tags))
+    print(f"Created post {post.post_id}: {post.title}")
+
+
+def import_posts(blog, args):
+    def progress(imported, skipped, elapsed):
+        print(f"\rImported {imported} posts, skipped {skipped} "
+              f"({imported / max(elapsed, 1e-9):.0f} posts/s)", end="", file=sys.stderr, flush=True)
+
+    result = blog.import_posts(args.path, args.workers, progress)
+    print(file=sys.stderr)
+    for error in result["errors"]:
+        print(f"Skipped {error}", file=sys.stderr)
+    print(f"Imported {result['imported']} posts in {result['seconds']:.1f}s, "
+          f"skipped {result['skipped']}")
+
+
+def export_post(blog, args):
+    if args.site is not None:
+        # Imported here so other commands do not pay for the process pool
+        from site_builder import build_site
+        stats = build_site(blog.posts_data(), args.site, args.workers)
+        print(f"Built {len(blog.posts)} posts into {args.site}: {stats['rendered']} rendered, "
+              f"{stats['skipped']} unchanged, {stats['removed']} removed")
+        return
+    if args.post_id is None:
+        raise SystemExit("Give a post id or --site")
+    post = blog.get_post(args.post_id)
+    if post is None:
+        raise SystemExit(f"No post with id {args.post_id}")
+    output = args.output or f"post-{post.post_id}.html"
+    blog.export_html(post, output)
+    print(f"Exported post {post.post_id} to {output}")
+
+
+def backup_posts(blog, args):
+    count, written = blog.write_backup(blog.posts_data())
+    print(f"Backed up {count} posts ({written} changed)")
+
+
+def restore_posts(blog, args):
+    snapshots = blog.list_backups()
+    if args.snapshot is None:
+        for snapshot in snapshots:
+            print(f"{snapshot['id']}  {snapshot['created']}  ({snapshot['count']} posts)")
+        if not snapshots:
+            print("No backups found")
+        return
+    snapshot_ids = [snapshot["id"] for snapshot in snapshots]
+    snapshot_id = snapshot_ids[0] if args.snapshot == "latest" and snapshots else args.snapshot
+    if snapshot_id not in snapshot_ids:
+        raise SystemExit(f"No backup {args.snapshot}")
+    blog.replace_posts(blog.read_backup(snapshot_id))
+    print(f"Restored {len(blog.posts)} posts from backup {snapshot_id}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the blog posts without the GUI")
+    parser.add_argument("--data-file", default=DATA_FILE)
+    parser.add_argument("--storage", choices=sorted(STORAGE_MODES), default="json",
+                        help="how posts are stored on disk (default: json)")
+    parser.add_argument("--backup-dir", default=BACKUP_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("list", help="list posts")
+    command.add_argument("--category", help="only posts in this category")
+    command.add_argument("--tag", action="append", default=[],
+                         help="only posts with this tag, can be given more than once")
+    command.add_argument("--since", type=month_arg, metavar="YYYY-MM",
+                         help="only posts stamped in this month or later")
+    command.add_argument("--until", type=month_arg, metavar="YYYY-MM",
+                         help="only posts stamped in this month or earlier")
+    command.set_defaults(run=list_posts)
+
+    command = commands.add_parser("facets", help="count the posts of every category or tag")
+    command.add_argument("kind", choices=["categories", "tags"])
+    command.set_defaults(run=list_facets)
+
+    command = commands.add_parser("search", help="list posts matching a query")
+    command.add_argument("query")
+    command.add_argument("--ranked", action="store_true",
+                         help="list the posts matching any word, most relevant first")
+    command.add_argument("--limit", type=int, default=RANKED_LIMIT,
+                         help=f"number of ranked posts to list (default: {RANKED_LIMIT})")
+    command.add_argument("--fuzzy", action="store_true",
+                         help="match title and tag words despite typos, the last word as a prefix")
+    command.set_defaults(run=search_posts)
+
+    command = commands.add_parser("complete", help="list title and tag words starting with a prefix")
+    command.add_argument("prefix")
+    command.add_argument("--limit", type=int, default=COMPLETION_LIMIT)
+    command.set_defaults(run=complete_word)
+
+    command = commands.add_parser("add", help="create a post")
+    command.add_argument("--title", required=True)
+    command.add_argument("--content", help="post text (default: read --file or stdin)")
+    command.add_argument("--file", help="read the post text from this file")
+    command.add_argument("--category", default="")
+    command.add_argument("--tags", default="", help="comma separated tags")
+    command.set_defaults(run=add_post)
+
+    command = commands.add_parser("import", help="import a folder of Markdown files or a JSONL file")
+    command.add_argument("path")
+    command.add_argument("--workers", type=int, default=None,
+                         help="number of parse processes (default: one per CPU)")
+    command.set_defaults(run=import_posts)
+
+    command = commands.add_parser("export", help="export a post, or every post as a site, to HTML")
+    command.add_argument("post_id", type=int, nargs="?")
+    command.add_argument("--output", "-o", help="HTML file to write (default: post-<id>.html)")
+    command.add_argument("--site", metavar="DIR", help="build a static site of every post into DIR")
+    command.add_argument("--workers", type=int, default=None,
+                         help="number of site render processes (default: one per CPU)")
+    command.set_defaults(run=export_post)
+
+    command = commands.add_parser("backup", help="take a backup snapshot")
+    command.set_defaults(run=backup_posts)
+
+    command = commands.add_parser("restore", help="list backups, or restore one")
+    command.add_argument("snapshot", nargs="?", help='snapshot id, or "latest"')
+    command.set_defaults(run=restore_posts)
+
+    args = parser.parse_args(argv)
+    blog = Blog(args.storage, args.data_file, args.backup_dir)
+    try:
+        if args.command == "list" and (args.since or args.until):
+            # Sharded storage only reads the files of those months
+            blog.load_months(args.since, args.until)
+        else:
+            blog.load()
+        args.run(blog, args)
+    finally:
+        blog.close()
+
+
+if __name__ == "__main__":
+    main()
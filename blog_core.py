@@ -0,0 +1,341 @@
+import json
+import os
+import threading
+from datetime import datetime
+
+from backup_store import BackupStore
+from blog_post import BlogPost, assign_post_ids, timestamp_month
+from facet_index import FacetIndex
+from html_export import render_post_html
+from instrumentation import TRACER
+from search_index import COMPLETION_LIMIT, RANKED_LIMIT, WORD_RE, FuzzyTermIndex, RankedSearchIndex
+from sorted_index import SORT_KEYS, CreationOrder, SortedPostIndex
+from storage import iter_post_batches, open_storage
+
+DATA_FILE = "blog_posts.json"
+BACKUP_DIR = "blog_backups"
+# Single backup file written by older versions, imported as the first snapshot
+OLD_BACKUP_FILE = "blog_posts_backup.json"
+# Posts handed to the UI at a time while loading in the background
+LOAD_BATCH_SIZE = 2000
+
+
+def parse_tags(text):
+    """Split a comma separated list of tags"""
+    return [tag.strip() for tag in text.split(',') if tag.strip()]
+
+
+class Blog:
+    """The posts of a blog and everything done with them, without any UI
+
+    Changes are written through writer, which is the storage itself unless
+    a caller swaps in something with the same record/replace/flush methods,
+    such as a WriteBehindSaver. Nothing here imports tkinter, so scripts
+    and the command line start quickly and run without a display.
+    """
+
+    def __init__(self, storage_mode="json", data_file=DATA_FILE, backup_dir=BACKUP_DIR,
+                 old_backup_file=OLD_BACKUP_FILE):
+        self.storage = open_storage(storage_mode, data_file)
+        self.writer = self.storage
+        self.backup_store = BackupStore(backup_dir)
+        self.old_backup_file = old_backup_file
+        self.posts = {}  # Post id -> post, in id order
+        self.loaded = False  # posts holds every stored post, so changes keep the others
+        self.partial = False  # posts holds only some months, see load_months()
+        self.next_post_id = 1
+        # Bulk imports take ids from a background thread
+        self.id_lock = threading.Lock()
+        self.search_index = self.storage.create_search_index(self.posts)
+        self.facets = FacetIndex()
+        self.sort_indexes = {}  # Sort order -> index, built when the order is first used
+        self.ranked_index = None  # Built on the first ranked search
+        self.fuzzy_index = None  # Built on the first fuzzy search, suggestion or completion
+
+    def load(self):
+        """Load the stored posts, return False if nothing is stored yet"""
+        self.loaded = True
+        self.partial = False
+        if not self.storage.exists():
+            return False
+        with TRACER.span("storage.load", "io"):
+            posts = self.storage.load()
+        self.set_posts(posts)
+        return True
+
+    def ensure_loaded(self):
+        """Load the stored posts before the first change, so writing never drops any"""
+        if self.partial:
+            raise RuntimeError("Only some months of posts are loaded, so posts cannot be changed")
+        if not self.loaded:
+            self.load()
+
+    def load_months(self, first=None, last=None):
+        """Load only the posts stamped in months first..last (YYYY-MM, None for no bound)
+
+        Sharded storage reads just the files of those months, other storage
+        reads everything and drops the rest. The other posts are missing, so
+        use it for reading only: changes raise RuntimeError. Returns False
+        if nothing is stored yet.
+        """
+        if not self.storage.exists():
+            return False
+        self.loaded = False
+        self.partial = True
+        with TRACER.span("storage.load", "io"):
+            load_months = getattr(self.storage, "load_months", None)
+            if load_months is not None:
+                posts = load_months(first, last)
+            else:
+                posts = []
+                for post in self.storage.load():
+                    month = timestamp_month(post.timestamp)
+                    if month is not None and (first is None or month >= first) and (last is None or month <= last):
+                        posts.append(post)
+        self.set_posts(posts)
+        return True
+
+    def set_posts(self, posts):
+        self.posts = {post.post_id: post for post in posts}
+        with self.id_lock:
+            self.next_post_id = max(self.posts, default=0) + 1
+        with TRACER.span("index.build", "index"):
+            self.search_index = self.storage.create_search_index(self.posts)
+            self.facets = FacetIndex(self.posts.values())
+        self.sort_indexes = {}
+        self.ranked_index = None
+        self.fuzzy_index = None
+
+    def iter_load(self, batch_size=LOAD_BATCH_SIZE):
+        """Yield (batch of stored posts, fraction loaded) as storage reads them
+
+        The posts are not added; hand each batch to add_loaded() after
+        begin_load(), and call finish_load() at the end. Run it where
+        storage is used, i.e. on the saver thread when there is one.
+        """
+        iter_load = getattr(self.storage, "iter_load", None)
+        if iter_load is not None:
+            return iter_load(batch_size)
+        return iter_post_batches(self.storage.load(), batch_size)
+
+    def begin_load(self):
+        """Drop every post before the stored ones are added batch by batch"""
+        self.set_posts([])
+        # Changes are written after the load, on the same thread as it
+        self.loaded = True
+        self.partial = False
+
+    def add_loaded(self, posts):
+        """Add a batch of posts read by iter_load() to the posts and every index"""
+        indexes = self.indexes()
+        for post in posts:
+            self.posts[post.post_id] = post
+            self.search_index.add(post)
+            self.facets.add(post)
+            for index in indexes:
+                index.add(post)
+        if posts:
+            with self.id_lock:
+                self.next_post_id = max(self.next_post_id, max(post.post_id for post in posts) + 1)
+
+    def finish_load(self):
+        """Finish loading batch by batch, return True if the posts had to be put in id order"""
+        post_ids = list(self.posts)
+        if all(a < b for a, b in zip(post_ids, post_ids[1:])):
+            return False
+        # Only older files, whose posts get ids once all are read, arrive out of order
+        self.set_posts(sorted(self.posts.values(), key=lambda post: post.post_id))
+        return True
+
+    def posts_data(self):
+        """Return every post as a dict, in id order"""
+        return [post.to_dict() for post in self.posts.values()]
+
+    def get_post(self, post_id):
+        """Return the post with an id, or None"""
+        return self.posts.get(post_id)
+
+    def sort_index(self, order):
+        """Return the index keeping the posts in a sort order
+
+        order is "created" or a name in SORT_KEYS. Indexes are built on
+        first use and then kept up to date by every change.
+        """
+        index = self.sort_indexes.get(order)
+        if index is None:
+            if order == "created":
+                index = CreationOrder(self.posts)
+            else:
+                index = SortedPostIndex(SORT_KEYS[order], self.posts.values())
+            self.sort_indexes[order] = index
+        return index
+
+    def indexes(self):
+        """Return the indexes built on demand so far, which every change must update"""
+        indexes = list(self.sort_indexes.values())
+        if self.ranked_index is not None:
+            indexes.append(self.ranked_index)
+        if self.fuzzy_index is not None:
+            indexes.append(self.fuzzy_index)
+        return indexes
+
+    def allocate_ids(self, count=1):
+        """Reserve count new post ids, return the first"""
+        with self.id_lock:
+            post_id = self.next_post_id
+            self.next_post_id += count
+        return post_id
+
+    def add_post(self, title, content, category="", tags=()):
+        """Create a post and queue it to be saved"""
+        self.ensure_loaded()
+        post = BlogPost(title, content, category=category, tags=tags, post_id=self.allocate_ids())
+        self.writer.record("create", post.post_id, post.to_dict())
+        self.posts[post.post_id] = post
+        self.search_index.add(post)
+        self.facets.add(post)
+        for index in self.indexes():
+            index.add(post)
+        return post
+
+    def update_post(self, post, content, category, tags):
+        """Change a post, stamp it with the current time and queue it to be saved"""
+        self.ensure_loaded()
+        post.content = content
+        post.timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        post.category = category
+        post.tags = tags
+        self.search_index.update(post)
+        self.facets.update(post)
+        for index in self.indexes():
+            index.update(post)
+        self.writer.record("update", post.post_id, post.to_dict())
+
+    def delete_post(self, post):
+        """Remove a post and queue the removal to be saved"""
+        self.ensure_loaded()
+        self.writer.record("delete", post.post_id)
+        del self.posts[post.post_id]
+        self.search_index.remove(post)
+        self.facets.remove(post)
+        for index in self.indexes():
+            index.remove(post)
+
+    def replace_posts(self, posts_data):
+        """Replace every post, e.g. with the ones of a backup, and queue them to be saved"""
+        # Backups taken before posts had ids get them in list order
+        assign_post_ids(posts_data)
+        self.set_posts(BlogPost.from_dict(data) for data in posts_data)
+        self.loaded = True
+        self.partial = False
+        self.writer.replace(posts_data)
+
+    def import_posts(self, path, workers=None, progress=None):
+        """Stream the posts of a Markdown directory or JSONL file into storage
+
+        The imported posts are written straight to storage in batches and
+        are not kept in posts; load() shows them. Run it where storage
+        writes happen, i.e. on the saver thread when there is one.
+        """
+        self.ensure_loaded()
+        # Imported here so other commands do not pay for the process pool
+        from bulk_import import import_posts
+        return import_posts(self.storage, path, self.allocate_ids, workers, progress=progress)
+
+    def search_candidates(self, query):
+        """Return the ids of posts that may match query, ascending"""
+        if getattr(self.search_index, "reads_storage", False):
+            # Let queued writes reach the storage the search runs against
+            self.writer.flush()
+            # Storage also holds the posts a background load has not added yet
+            posts = self.posts
+            return [post_id for post_id in self.search_index.candidates(query) if post_id in posts]
+        return self.search_index.candidates(query)
+
+    def search(self, query, within=None):
+        """Return the ids of posts matching query, ascending
+
+        within limits the search to some candidate ids, by default every
+        post the index considers a candidate.
+        """
+        with TRACER.span("search.scan", "search"):
+            if within is None:
+                within = self.search_candidates(query)
+            return self.search_index.search(query, within)
+
+    def ranked_search(self, query, limit=RANKED_LIMIT, within=None):
+        """Return (ids of the posts best matching query, best first, number of matches)
+
+        Posts are ranked with BM25 over their title, tags, category and
+        content. within limits the search to a collection of ids.
+        """
+        if self.ranked_index is None:
+            self.ranked_index = RankedSearchIndex(self.posts.values())
+        if within is not None and not isinstance(within, (set, frozenset)):
+            within = set(within)
+        with TRACER.span("search.ranked", "search"):
+            return self.ranked_index.search(query, limit, within)
+
+    def fuzzy_terms(self):
+        """Return the index of title and tag words, building it on first use"""
+        if self.fuzzy_index is None:
+            self.fuzzy_index = FuzzyTermIndex(self.posts.values())
+        return self.fuzzy_index
+
+    def fuzzy_search(self, query, within=None):
+        """Return the ids of posts whose title or tags match every word of query, ascending
+
+        Words match despite a typo or two, and the last word also matches
+        as a prefix. within limits the search to a collection of ids.
+        """
+        if within is not None and not isinstance(within, (set, frozenset)):
+            within = set(within)
+        with TRACER.span("search.fuzzy", "search"):
+            return self.fuzzy_terms().search(query, within)
+
+    def did_you_mean(self, query):
+        """Return query with misspelled words replaced by known ones, or None if none are"""
+        terms = self.fuzzy_terms()
+        words = WORD_RE.findall(query.lower())
+        corrected = [terms.suggest(word) or word for word in words]
+        return " ".join(corrected) if corrected != words else None
+
+    def complete(self, prefix, limit=COMPLETION_LIMIT):
+        """Return up to limit title and tag words starting with prefix, most used first"""
+        return self.fuzzy_terms().completions(prefix.lower(), limit)
+
+    def export_html(self, post, path):
+        """Write the HTML page of a post to path"""
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(render_post_html(post.to_dict()))
+
+    def write_backup(self, posts_data):
+        """Store a snapshot of posts_data and prune old ones, return (count, new posts written)
+
+        Safe to run off the UI thread on a copy taken with posts_data().
+        """
+        self.import_old_backup()
+        snapshot_id, written = self.backup_store.snapshot(posts_data)
+        self.backup_store.prune()
+        return len(posts_data), written
+
+    def list_backups(self):
+        """Return the backup snapshots, newest first"""
+        self.import_old_backup()
+        return self.backup_store.list_snapshots()
+
+    def read_backup(self, snapshot_id):
+        """Return the posts of a backup snapshot as dicts"""
+        return self.backup_store.restore(snapshot_id)
+
+    def import_old_backup(self):
+        """Keep the backup file of older versions as the first snapshot"""
+        if os.path.exists(self.old_backup_file) and not self.backup_store.list_snapshots():
+            with open(self.old_backup_file, 'rb') as file:
+                posts_data = json.load(file)
+            created = datetime.fromtimestamp(os.path.getmtime(self.old_backup_file))
+            self.backup_store.snapshot(posts_data, created)
+
+    def close(self):
+        """Write pending changes and close the storage"""
+        self.writer.close()
@@ -0,0 +1,145 @@
+import re
+import sys
+from datetime import datetime, timedelta
+
+# Timestamps in this form are kept as numbers, anything else as given
+TIMESTAMP_RE = re.compile(r"[0-9]{4}-[0-9]{2}-[0-9]{2} [0-9]{2}:[0-9]{2}:[0-9]{2}\Z")
+# Timestamps are kept as seconds since this moment, counted in the same
+# wall-clock time they are displayed in, so they format back unchanged
+EPOCH = datetime(1970, 1, 1)
+ONE_SECOND = timedelta(seconds=1)
+
+
+def parse_timestamp(text):
+    """Return a timestamp as whole seconds, or the text itself if it has another format"""
+    if isinstance(text, str) and TIMESTAMP_RE.match(text):
+        try:
+            return (datetime.fromisoformat(text) - EPOCH) // ONE_SECOND
+        except ValueError:
+            pass
+    return text
+
+
+def format_timestamp(seconds):
+    """Return the display form of a timestamp kept as seconds"""
+    return str(EPOCH + timedelta(seconds=seconds))
+
+
+def timestamp_month(text):
+    """Return the YYYY-MM month of a timestamp, or None if it has another format"""
+    if isinstance(text, str) and TIMESTAMP_RE.match(text):
+        return text[:7]
+    return None
+
+
+def assign_post_ids(posts_data):
+    """Give post dicts without an id the next free ids and sort them by id
+
+    Ids are handed out in list order, so data written before posts had ids
+    always gets the same ones. Returns True if any id was assigned.
+    """
+    next_id = max((data["id"] for data in posts_data if data.get("id") is not None), default=0) + 1
+    assigned = False
+    for data in posts_data:
+        if data.get("id") is None:
+            data["id"] = next_id
+            next_id += 1
+            assigned = True
+    posts_data.sort(key=lambda data: data["id"])
+    return assigned
+
+
+class BlogPost:
+    # Archives hold many posts, so they carry no per-instance __dict__, keep
+    # their timestamp as an int and share one string per category and tag
+    __slots__ = ("post_id", "title", "_content", "content_loader", "_timestamp", "_category", "_tags")
+
+    def __init__(self, title, content, timestamp=None, category="", tags=None, post_id=None):
+        self.post_id = post_id  # Unique and never reused, set when the post is added
+        self.title = title
+        self.content = content  # Lazy posts pass None and set content_loader
+        self.content_loader = None
+        if timestamp is None:
+            self._timestamp = (datetime.now() - EPOCH) // ONE_SECOND
+        else:
+            self.timestamp = timestamp
+        self.category = category
+        self.tags = tags if tags is not None else ()
+
+    @classmethod
+    def lazy(cls, post_id, title, timestamp, category, tags, content_loader):
+        """Create a post whose content is only read when it is accessed"""
+        post = cls(title, None, timestamp, category, tags, post_id)
+        post.content_loader = content_loader
+        return post
+
+    @property
+    def content(self):
+        if self._content is None and self.content_loader is not None:
+            # Not cached, so resident memory stays proportional to metadata
+            return self.content_loader()
+        return self._content
+
+    @content.setter
+    def content(self, value):
+        self._content = value
+
+    @property
+    def timestamp(self):
+        if isinstance(self._timestamp, int):
+            return format_timestamp(self._timestamp)
+        return self._timestamp
+
+    @timestamp.setter
+    def timestamp(self, value):
+        self._timestamp = parse_timestamp(value)
+
+    @property
+    def seconds(self):
+        """The timestamp as whole seconds, or None if it is not in the standard form"""
+        return self._timestamp if isinstance(self._timestamp, int) else None
+
+    @property
+    def category(self):
+        return self._category
+
+    @category.setter
+    def category(self, value):
+        self._category = sys.intern(value)
+
+    @property
+    def tags(self):
+        return self._tags
+
+    @tags.setter
+    def tags(self, value):
+        self._tags = tuple(sys.intern(tag) for tag in value)
+
+    def to_dict(self):
+        return {
+            "id": self.post_id,
+            "title": self.title,
+            "content": self.content,
+            "timestamp": self.timestamp,
+            "category": self.category,
+            "tags": list(self.tags)
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data["title"], 
+            data["content"], 
+            data["timestamp"],
+            data.get("category", ""),
+            data.get("tags", []),
+            data.get("id")
+        )
+
+    def matches_search(self, query):
+        """Check if the post matches a search query"""
+        query = query.lower()
+        return (query in self.title.lower() or 
+                query in self.content.lower() or
+                query in self.category.lower() or
+                any(query in tag.lower() for tag in self.tags))
@@ -0,0 +1,224 @@
+import json
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+# Posts parsed and written to storage per commit
+BATCH_SIZE = 500
+# Largest share of the import time spent committing. Storage that rewrites
+# everything on flush, like the JSON file, then commits less often as it grows
+MAX_COMMIT_SHARE = 0.25
+# Below this many posts in the first batch, worker processes cost more than they save
+PARALLEL_THRESHOLD = 64
+MARKDOWN_EXTENSIONS = (".md", ".markdown")
+FRONT_MATTER_RE = re.compile(r"\A---[ \t]*\r?\n(.*?)\r?\n---[ \t]*(?:\r?\n|\Z)", re.S)
+DATE_RE = re.compile(r"\d{4}-\d{2}-\d{2}\Z")
+
+
+def iter_sources(path):
+    """Yield (kind, value, label) for every post in a Markdown directory or JSONL file
+
+    Markdown files are yielded by path and read by whoever parses them;
+    JSONL posts are yielded one line at a time. Nothing is read ahead.
+    """
+    if os.path.isdir(path):
+        for folder, subfolders, files in os.walk(path):
+            subfolders.sort()
+            for name in sorted(files):
+                if name.lower().endswith(MARKDOWN_EXTENSIONS):
+                    file_path = os.path.join(folder, name)
+                    yield "markdown", file_path, file_path
+    else:
+        with open(path, encoding='utf-8') as file:
+            for number, line in enumerate(file, 1):
+                if line.strip():
+                    yield "jsonl", line, f"{path}:{number}"
+
+
+def parse_front_matter(text):
+    """Parse the simple key: value front matter of a Markdown file
+
+    Values may be quoted, lists may be written [a, b], a, b or as
+    indented "- item" lines.
+    """
+    fields = {}
+    key = None
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        if stripped.startswith("- ") and key is not None and line[:1] in " \t-":
+            fields.setdefault(key, [])
+            if isinstance(fields[key], list):
+                fields[key].append(unquote(stripped[2:]))
+            continue
+        name, colon, value = stripped.partition(":")
+        if not colon:
+            raise ValueError(f"Bad front matter line: {stripped}")
+        key = name.strip().lower()
+        value = value.strip()
+        if value.startswith("[") and value.endswith("]"):
+            fields[key] = [unquote(item) for item in value[1:-1].split(",") if item.strip()]
+        elif value:
+            fields[key] = unquote(value)
+    return fields
+
+
+def unquote(value):
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    return value
+
+
+def as_tags(value):
+    if isinstance(value, str):
+        return [tag.strip() for tag in value.split(",") if tag.strip()]
+    return [str(tag).strip() for tag in value if str(tag).strip()]
+
+
+def as_timestamp(value, default):
+    """Return a front matter date in the form posts use, or default"""
+    if not value:
+        return default
+    if DATE_RE.match(value):
+        return value + " 00:00:00"
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).strftime("%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        return value
+
+
+def parse_markdown(file_path):
+    """Return the post dict of a Markdown file with optional front matter"""
+    with open(file_path, encoding='utf-8') as file:
+        text = file.read()
+    fields = {}
+    match = FRONT_MATTER_RE.match(text)
+    if match:
+        fields = parse_front_matter(match.group(1))
+        text = text[match.end():]
+    content = text.strip()
+    title = fields.get("title")
+    if not title and content.startswith("# "):
+        # Fall back to a leading heading, which then is not repeated in the body
+        title, _, content = content.partition("\n")
+        title = title[2:].strip()
+        content = content.strip()
+    modified = datetime.fromtimestamp(os.path.getmtime(file_path)).strftime("%Y-%m-%d %H:%M:%S")
+    return {
+        "title": title or os.path.splitext(os.path.basename(file_path))[0],
+        "content": content,
+        "timestamp": as_timestamp(fields.get("date") or fields.get("timestamp"), modified),
+        "category": fields.get("category", ""),
+        "tags": as_tags(fields.get("tags", [])),
+    }
+
+
+def parse_jsonl(line):
+    """Return the post dict of one JSONL line"""
+    data = json.loads(line)
+    if not isinstance(data, dict):
+        raise ValueError("Expected a JSON object")
+    return {
+        "title": str(data["title"]),
+        "content": str(data["content"]),
+        "timestamp": str(data.get("timestamp") or datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
+        "category": str(data.get("category") or ""),
+        "tags": as_tags(data.get("tags") or []),
+    }
+
+
+def parse_source(source):
+    """Return (post dict, None) or (None, error message) for one source (runs in a worker process)"""
+    kind, value, label = source
+    try:
+        data = parse_markdown(value) if kind == "markdown" else parse_jsonl(value)
+        if not data["title"].strip() or not data["content"]:
+            raise ValueError("Title and content cannot be empty")
+        return data, None
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        return None, f"{label}: {e}"
+
+
+def iter_batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def parse_batches(sources, workers=None, batch_size=BATCH_SIZE):
+    """Yield the parse results of sources, one list per batch
+
+    With a worker pool, the next batch is parsed while the caller commits
+    the current one. At most two batches are ever held in memory.
+    """
+    batches = iter_batches(sources, batch_size)
+    first = next(batches, None)
+    if first is None:
+        return
+    if workers == 1 or len(first) < PARALLEL_THRESHOLD:
+        yield [parse_source(source) for source in first]
+        for batch in batches:
+            yield [parse_source(source) for source in batch]
+        return
+
+    # Spawned workers never inherit the GUI's threads or open storage
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        chunksize = max(1, batch_size // (4 * (workers or os.cpu_count() or 1)))
+        pending = pool.map(parse_source, first, chunksize=chunksize)
+        for batch in batches:
+            parsed = pool.map(parse_source, batch, chunksize=chunksize)
+            yield list(pending)
+            pending = parsed
+        yield list(pending)
+
+
+def import_posts(storage, path, allocate_ids, workers=None, batch_size=BATCH_SIZE, progress=None):
+    """Stream the posts of a Markdown directory or JSONL file into storage
+
+    allocate_ids(count) returns the first of count new post ids. Batches
+    are committed with one storage flush each, or fewer when flushes are
+    slow. progress(imported, skipped, elapsed seconds) is called after each
+    batch. Returns the number of posts imported and skipped, the first few
+    errors and the time taken.
+    """
+    started = time.perf_counter()
+    imported = 0
+    errors = []
+    skipped = 0
+    committed_at = started
+    commit_seconds = 0.0
+    for results in parse_batches(iter_sources(path), workers, batch_size):
+        posts_data = [data for data, error in results if data is not None]
+        for data, error in results:
+            if error is not None:
+                skipped += 1
+                if len(errors) < 10:
+                    errors.append(error)
+        if posts_data:
+            post_id = allocate_ids(len(posts_data))
+            for data in posts_data:
+                data["id"] = post_id
+                storage.record("create", post_id, data)
+                post_id += 1
+            imported += len(posts_data)
+            now = time.perf_counter()
+            if (now - committed_at) * MAX_COMMIT_SHARE >= commit_seconds:
+                storage.flush()
+                committed_at = time.perf_counter()
+                commit_seconds = committed_at - now
+        if progress is not None:
+            progress(imported, skipped, time.perf_counter() - started)
+    storage.flush()
+    return {"imported": imported, "skipped": skipped, "errors": errors,
+            "seconds": time.perf_counter() - started}
@@ -0,0 +1,82 @@
+class EditorBuffer:
+    """The editor's text as lines, with the runs of lines edited since it was loaded
+
+    Fed the same line replacements as TextStats, so the text is known
+    without reading it back from the widget. Each run also keeps how many
+    loaded lines it replaced, so modified compares only the edited runs
+    with what was loaded and an edit typed back does not count; only when
+    a run differs is the whole text compared. The lines are only split out
+    on the first edit, and until then text() is the loaded text itself.
+    While a large text is still being inserted into the widget in slices,
+    the buffer already holds all of it and ignores those inserts.
+    """
+
+    def __init__(self, text=""):
+        self.load(text)
+
+    def load(self, text, filling=False):
+        """Start over from text; with filling, ignore edits until fill_done()"""
+        self.loaded_text = text
+        self._lines = None
+        self._loaded_lines = None
+        self.dirty = []  # Sorted, disjoint (first, last, loaded count) runs of edited lines, counted from 0
+        self.filling = filling
+
+    def fill_done(self):
+        """The widget holds the whole loaded text, so its edits count again"""
+        self.filling = False
+
+    @property
+    def lines(self):
+        if self._lines is None:
+            self._loaded_lines = self.loaded_text.split("\n")
+            self._lines = list(self._loaded_lines)
+        return self._lines
+
+    @property
+    def modified(self):
+        """Whether the text differs from the loaded one, checked run by run"""
+        shift = 0
+        for first, last, count in self.dirty:
+            loaded_first = first - shift
+            if self._lines[first:last] != self._loaded_lines[loaded_first:loaded_first + count]:
+                # Edits that moved lines across runs can still add up to the loaded text
+                return self.text() != self.loaded_text
+            shift += (last - first) - count
+        return False
+
+    def text(self):
+        """Return the editor's text, without the widget's final newline"""
+        if not self.dirty:
+            return self.loaded_text
+        return "\n".join(self.lines)
+
+    def reset(self, text):
+        """Take the whole text as edited"""
+        if self.filling:
+            return
+        self.lines  # Split out the loaded lines before they are replaced
+        count = len(self._loaded_lines)
+        self._lines = text.split("\n")
+        self.dirty = [(0, len(self._lines), count)] if text != self.loaded_text else []
+
+    def replace_lines(self, first, last, lines):
+        """Replace lines first..last-1 (counted from 0) with lines and mark them edited"""
+        if self.filling:
+            return
+        self.lines[first:last] = lines
+        shift = len(lines) - (last - first)
+        start, end = first, last
+        count = 0  # Lines the joined runs added over the loaded ones
+        before, after = [], []
+        for run_first, run_last, run_count in self.dirty:
+            if run_last < first:
+                before.append((run_first, run_last, run_count))
+            elif run_first > last:
+                after.append((run_first + shift, run_last + shift, run_count))
+            else:
+                # Touching or overlapping runs join the edited one
+                start = min(start, run_first)
+                end = max(end, run_last)
+                count += (run_last - run_first) - run_count
+        self.dirty = before + [(start, end + shift, (end - start) - count)] + after
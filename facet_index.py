@@ -0,0 +1,63 @@
+class FacetIndex:
+    """Post ids by exact category and tag
+
+    Kept up to date on every create, update and delete, so facet counts
+    are set sizes and combined facet filters are set intersections.
+    """
+
+    def __init__(self, posts=()):
+        self.categories = {}  # Category -> ids of its posts
+        self.tags = {}  # Tag -> ids of the posts that have it
+        self.post_facets = {}  # Post id -> (category, tags) as indexed
+        for post in posts:
+            self.add(post)
+
+    def add(self, post):
+        category, tags = post.category, tuple(dict.fromkeys(post.tags))
+        self.post_facets[post.post_id] = (category, tags)
+        if category:
+            self.categories.setdefault(category, set()).add(post.post_id)
+        for tag in tags:
+            self.tags.setdefault(tag, set()).add(post.post_id)
+
+    def update(self, post):
+        self.remove(post)
+        self.add(post)
+
+    def remove(self, post):
+        # Facets of the post as indexed, which an in-place edit may have changed
+        category, tags = self.post_facets.pop(post.post_id, ("", ()))
+        if category:
+            self._discard(self.categories, category, post.post_id)
+        for tag in tags:
+            self._discard(self.tags, tag, post.post_id)
+
+    def category_counts(self):
+        """Return (category, number of posts) pairs, by name"""
+        return sorted((name, len(ids)) for name, ids in self.categories.items())
+
+    def tag_counts(self):
+        """Return (tag, number of posts) pairs, by name"""
+        return sorted((name, len(ids)) for name, ids in self.tags.items())
+
+    def filter(self, category=None, tags=()):
+        """Return the ids of posts in category having every tag, ascending
+
+        Returns None when no facet is given, meaning every post.
+        """
+        sets = [self.tags.get(tag, set()) for tag in tags]
+        if category:
+            sets.append(self.categories.get(category, set()))
+        if not sets:
+            return None
+        # Intersecting from the smallest set keeps the work proportional to it
+        sets.sort(key=len)
+        return sorted(sets[0].intersection(*sets[1:]))
+
+    @staticmethod
+    def _discard(facets, name, post_id):
+        ids = facets.get(name)
+        if ids is not None:
+            ids.discard(post_id)
+            if not ids:
+                del facets[name]
@@ -0,0 +1,136 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from html import escape
+
+PAGE_STYLE = """
+        body { font-family: Arial, sans-serif; max-width: 800px; margin: 0 auto; padding: 20px; }
+        h1 { color: #333; }
+        .meta { color: #666; font-size: 0.9em; }
+        .content { margin-top: 20px; line-height: 1.6; }
+        .category { background: #e0e0e0; padding: 2px 6px; border-radius: 3px; }
+        .tags { margin-top: 10px; }
+        .tag { background: #4CAF50; color: white; padding: 2px 6px; border-radius: 3px; margin-right: 5px; }
+        .posts { list-style: none; padding: 0; }
+        .posts li { margin-bottom: 8px; }"""
+
+# Formatting markers inserted by the editor's Bold, Italic and Underline buttons
+MARKUP_TAGS = {"**": "strong", "*": "em", "__": "u"}
+MARKER_RE = re.compile(r"\*\*|\*|__")
+# Number of rendered post bodies kept in memory
+RENDER_CACHE_SIZE = 256
+
+
+def render_line(line):
+    """Render the markers of one escaped line in a single pass
+
+    A marker opens a span that the next identical marker on the line
+    closes. Spans nest, and markers left open are output as plain text.
+    """
+    stack = [(None, [])]  # (open marker, output parts) of each open span
+
+    def unwind(depth):
+        # Markers left open above depth become plain text
+        while len(stack) > depth:
+            marker, parts = stack.pop()
+            stack[-1][1].append(marker)
+            stack[-1][1].extend(parts)
+
+    position = 0
+    for match in MARKER_RE.finditer(line):
+        marker = match.group()
+        if match.start() > position:
+            stack[-1][1].append(line[position:match.start()])
+        position = match.end()
+        depth = len(stack) - 1
+        while depth and stack[depth][0] != marker:
+            depth -= 1
+        if not depth:
+            stack.append((marker, []))
+            continue
+        unwind(depth + 1)
+        marker, parts = stack.pop()
+        tag = MARKUP_TAGS[marker]
+        stack[-1][1].append(f"<{tag}>{''.join(parts)}</{tag}>")
+    if position < len(line):
+        stack[-1][1].append(line[position:])
+    unwind(1)
+    return ''.join(stack[0][1])
+
+
+def render_markup(text):
+    """Render editor markup as escaped HTML paragraphs"""
+    paragraphs = []
+    for paragraph in escape(text).split('\n\n'):
+        if '*' in paragraph or '__' in paragraph:
+            # Spans never cross a line break
+            paragraph = '\n'.join(render_line(line) for line in paragraph.split('\n'))
+        if paragraph.strip():
+            paragraphs.append(f'<p>{paragraph}</p>')
+    return '\n\n'.join(paragraphs)
+
+
+class RenderCache:
+    """Bounded LRU cache of rendered post bodies keyed by a hash of the text"""
+
+    def __init__(self, size=RENDER_CACHE_SIZE):
+        self.size = size
+        self.entries = OrderedDict()
+        # Used from both the UI and the saver thread
+        self.lock = threading.Lock()
+
+    def render(self, text):
+        key = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+        with self.lock:
+            html = self.entries.get(key)
+            if html is not None:
+                self.entries.move_to_end(key)
+                return html
+        html = render_markup(text)
+        with self.lock:
+            self.entries[key] = html
+            if len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+        return html
+
+
+render_cache = RenderCache()
+
+
+def format_text_for_html(text):
+    """Simple formatting for HTML export"""
+    return render_cache.render(text)
+
+
+def render_page(title, body):
+    """Wrap body in a complete HTML page, title must already be escaped"""
+    return f"""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>{title}</title>
+    <style>{PAGE_STYLE}
+    </style>
+</head>
+<body>
+{body}
+</body>
+</html>"""
+
+
+def render_post_html(data, title_suffix=""):
+    """Return the HTML page of a post given as a dict"""
+    tags = ' '.join(f'<span class="tag">{escape(tag)}</span>' for tag in data.get("tags", []))
+    body = f"""    <h1>{escape(data["title"])}</h1>
+    <div class="meta">
+        <span>Published: {escape(data["timestamp"])}</span>
+        <span class="category">Category: {escape(data.get("category", ""))}</span>
+    </div>
+    <div class="content">
+        {format_text_for_html(data["content"])}
+    </div>
+    <div class="tags">
+        Tags: {tags}
+    </div>"""
+    return render_page(escape(data["title"] + title_suffix), body)
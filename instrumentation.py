@@ -0,0 +1,154 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# Spans kept for trace export; the oldest are dropped first
+MAX_EVENTS = 200000
+# Latest durations kept per span name for the latency percentiles
+LATENCY_WINDOW = 1000
+
+
+def percentile(sorted_values, fraction):
+    """Return the nearest-rank percentile of a sorted list"""
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class Span:
+    """Time a block and record it with the tracer when the block ends"""
+
+    __slots__ = ("tracer", "name", "category", "start")
+
+    def __init__(self, tracer, name, category):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.tracer.record(self.name, self.category, self.start, time.perf_counter_ns() - self.start)
+        return False
+
+
+class NullSpan:
+    """Span handed out while tracing is off, which does nothing"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_SPAN = NullSpan()
+
+
+class Tracer:
+    """Record timing spans of the app's hot paths
+
+    Off until enabled, when a traced call costs one attribute check.
+    Spans may be recorded from any thread: each is one append to a bounded
+    deque, plus one to the recent durations of its name, which feed the
+    p50/p99 latencies. The spans export as Chrome trace_event JSON, which
+    chrome://tracing and Perfetto show as a timeline per thread.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.clear()
+
+    def clear(self):
+        """Drop every recorded span"""
+        self.events = deque(maxlen=MAX_EVENTS)  # (name, category, start ns, duration ns, thread id)
+        self.latencies = {}  # Span name -> deque of recent durations in ns
+        self.categories = {}  # Span name -> category
+        self.thread_names = {}  # Thread id -> name
+        self.origin = time.perf_counter_ns()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def span(self, name, category="app"):
+        """Return a context manager recording the time spent in its block"""
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, category)
+
+    def record(self, name, category, start, duration):
+        """Record a span that started at perf_counter_ns() start and lasted duration ns"""
+        thread_id = threading.get_ident()
+        if thread_id not in self.thread_names:
+            self.thread_names[thread_id] = threading.current_thread().name
+        self.events.append((name, category, start, duration, thread_id))
+        latencies = self.latencies.get(name)
+        if latencies is None:
+            self.categories[name] = category
+            latencies = self.latencies.setdefault(name, deque(maxlen=LATENCY_WINDOW))
+        latencies.append(duration)
+
+    def latency_summary(self, category="handler"):
+        """Return (p50 ms, p99 ms, number of spans, name with the worst p99) of a category, or None"""
+        durations = []
+        worst_name, worst_p99 = None, -1
+        for name, latencies in list(self.latencies.items()):
+            if self.categories.get(name) != category or not latencies:
+                continue
+            values = sorted(latencies)
+            durations.extend(values)
+            p99 = percentile(values, 0.99)
+            if p99 > worst_p99:
+                worst_name, worst_p99 = name, p99
+        if not durations:
+            return None
+        durations.sort()
+        return (percentile(durations, 0.5) / 1e6, percentile(durations, 0.99) / 1e6,
+                len(durations), worst_name)
+
+    def chrome_trace(self):
+        """Return the recorded spans as a Chrome trace_event document"""
+        pid = os.getpid()
+        events = [{"name": name, "cat": category, "ph": "X", "pid": pid, "tid": thread_id,
+                   "ts": (start - self.origin) / 1000, "dur": duration / 1000}
+                  for name, category, start, duration, thread_id in list(self.events)]
+        for thread_id, thread_name in list(self.thread_names.items()):
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": thread_id,
+                           "args": {"name": thread_name}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, path):
+        """Write the recorded spans to path as Chrome trace_event JSON"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f)
+
+
+# The tracer of the whole process, so any module can add spans to it
+TRACER = Tracer()
+
+
+def traced(name=None, category="handler"):
+    """Decorate a function to record a span for every call while tracing is on"""
+    def decorate(function):
+        span_name = name or function.__name__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not TRACER.enabled:
+                return function(*args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                TRACER.record(span_name, category, start, time.perf_counter_ns() - start)
+        return wrapper
+    return decorate
@@ -0,0 +1,210 @@
+import json
+import mmap
+import os
+import threading
+
+from blog_post import BlogPost, assign_post_ids
+from search_index import ScanSearchIndex
+from storage import check_loaded, write_atomic
+
+# Never compact the content file while it holds less garbage than this
+MIN_COMPACT_BYTES = 1024 * 1024
+
+
+class LazyStorage:
+    """Keep post metadata in a small index and post bodies in a content file
+
+    blog_posts.meta.json lists the id, title, timestamp, category, tags and
+    the byte offset and length of each post's body. The bodies are
+    appended to a content file that is read through mmap only when a
+    post's content is accessed, so loading costs the size of the metadata,
+    not of the text. Edits append a new body and leave the old one as
+    garbage; the content file is rewritten once garbage outweighs live
+    data. The metadata names the content file it refers to, and a new
+    content file is only ever switched to by atomically replacing the
+    metadata, so a crash never leaves offsets pointing at the wrong file.
+    """
+
+    def __init__(self, data_file):
+        base = os.path.splitext(data_file)[0]
+        self.data_file = data_file
+        self.meta_file = base + ".meta.json"
+        self.content_prefix = base + ".content."
+        self.content_file = None
+        self.retired_files = []  # Content files to delete once unreferenced
+        self.entries = {}  # Post id -> metadata of the post, in id order
+        self.garbage_bytes = 0
+        self.dirty = False
+        self.loaded = False  # entries list every stored post
+        self.writer = None
+        self.content_size = 0
+        self.map = None
+        self.lock = threading.Lock()
+
+    def exists(self):
+        return os.path.exists(self.meta_file) or os.path.exists(self.data_file)
+
+    def load(self):
+        """Return the stored posts with their content loaded on demand"""
+        if not os.path.exists(self.meta_file):
+            # First use: build the index and content file from the JSON data
+            with open(self.data_file, 'rb') as file:
+                posts_data = json.load(file)
+            assign_post_ids(posts_data)
+            self.replace(posts_data)
+            self.flush()
+        else:
+            with open(self.meta_file, 'rb') as file:
+                meta = json.load(file)
+            self.garbage_bytes = meta.get("garbage_bytes", 0)
+            self._open_content(os.path.join(os.path.dirname(self.meta_file), meta["content_file"]))
+            # Indexes written before posts had ids get them in list order
+            assigned = assign_post_ids(meta["posts"])
+            self.entries = {entry["id"]: entry for entry in meta["posts"]}
+            if assigned:
+                self._write_meta()
+        self.loaded = True
+        return [self._post(entry) for entry in self.entries.values()]
+
+    def replace(self, posts_data):
+        """Replace every stored post"""
+        with self.lock:
+            self._start_content_file()
+            self.entries = {data["id"]: self._append(data) for data in posts_data}
+            self.garbage_bytes = 0
+            self.dirty = True
+            self.loaded = True
+
+    def record(self, op, post_id, data=None):
+        """Record that a post was created, updated or deleted"""
+        check_loaded(self)
+        with self.lock:
+            if self.writer is None:
+                self._start_content_file()
+            if op == "create":
+                self.entries[post_id] = self._append(data)
+            elif op == "update":
+                entry = self.entries[post_id]
+                self.garbage_bytes += entry["length"]
+                # Update in place so loaders holding the entry see the new body
+                entry.update(self._append(data))
+            elif op == "delete":
+                self.garbage_bytes += self.entries.pop(post_id)["length"]
+            else:
+                raise ValueError(f"Unknown record type: {op}")
+            self.dirty = True
+
+    def flush(self):
+        """Write new bodies and the metadata index to disk"""
+        if not self.dirty:
+            return
+        self.writer.flush()
+        os.fsync(self.writer.fileno())
+        if self.garbage_bytes > max(MIN_COMPACT_BYTES, self.content_size - self.garbage_bytes):
+            self.compact()
+        else:
+            self._write_meta()
+        self.dirty = False
+
+    def compact(self):
+        """Copy the live bodies into a new content file and switch to it"""
+        with self.lock:
+            entries = list(self.entries.values())
+            bodies = [self._read_bytes(entry) for entry in entries]
+            self._start_content_file()
+            for entry, body in zip(entries, bodies):
+                entry["offset"] = self.content_size
+                self.writer.write(body)
+                self.content_size += len(body)
+            self.writer.flush()
+            os.fsync(self.writer.fileno())
+            self.garbage_bytes = 0
+            self._write_meta()
+
+    def create_search_index(self, posts):
+        """Return an index that scans bodies on demand instead of caching them"""
+        return ScanSearchIndex(posts)
+
+    def close(self):
+        self.flush()
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+    def content_loader(self, entry):
+        """Return a function that reads the body described by entry"""
+        def load_content():
+            with self.lock:
+                return self._read_bytes(entry).decode("utf-8")
+        return load_content
+
+    def _post(self, entry):
+        return BlogPost.lazy(entry["id"], entry["title"], entry["timestamp"], entry["category"],
+                             entry["tags"], self.content_loader(entry))
+
+    def _append(self, data):
+        body = data["content"].encode("utf-8")
+        self.writer.write(body)
+        entry = {
+            "id": data["id"],
+            "title": data["title"],
+            "timestamp": data["timestamp"],
+            "category": data.get("category", ""),
+            "tags": data.get("tags", []),
+            "offset": self.content_size,
+            "length": len(body),
+        }
+        self.content_size += len(body)
+        return entry
+
+    def _read_bytes(self, entry):
+        end = entry["offset"] + entry["length"]
+        if entry["length"] == 0:
+            return b""
+        if self.map is None or end > len(self.map):
+            # The body was appended after the file was mapped
+            self.writer.flush()
+            self._remap()
+        return self.map[entry["offset"]:end]
+
+    def _remap(self):
+        if self.map is not None:
+            self.map.close()
+        with open(self.content_file, 'rb') as file:
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _open_content(self, path):
+        if self.writer is not None:
+            self.writer.close()
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        self.content_file = path
+        self.writer = open(path, 'ab')
+        self.content_size = self.writer.tell()
+
+    def _start_content_file(self):
+        generation = 0
+        if self.content_file is not None:
+            generation = int(self.content_file.rsplit(".", 1)[1]) + 1
+            self.retired_files.append(self.content_file)
+        path = f"{self.content_prefix}{generation}"
+        # Truncate anything left behind by an interrupted compaction
+        open(path, 'wb').close()
+        self._open_content(path)
+
+    def _write_meta(self):
+        meta = {
+            "content_file": os.path.basename(self.content_file),
+            "garbage_bytes": self.garbage_bytes,
+            "posts": list(self.entries.values()),
+        }
+        write_atomic(self.meta_file, json.dumps(meta).encode("utf-8"))
+        # Only now is nothing on disk referring to the old content files
+        for path in self.retired_files:
+            if os.path.exists(path):
+                os.remove(path)
+        self.retired_files = []
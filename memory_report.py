@@ -0,0 +1,79 @@
+import argparse
+import sys
+
+from storage import STORAGE_MODES, open_storage
+
+# Fields of a post reported separately, in display order
+REPORT_FIELDS = ("title", "_content", "_timestamp", "_category", "_tags")
+FIELD_LABELS = {"title": "Titles", "_content": "Content", "_timestamp": "Timestamps",
+                "_category": "Categories", "_tags": "Tags"}
+
+
+def deep_size(obj, seen):
+    """Return the bytes used by obj and what it holds, skipping ids in seen
+
+    Shared objects, such as interned category and tag strings, are only
+    counted the first time they are reached.
+    """
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (tuple, list, set, frozenset)):
+        size += sum(deep_size(item, seen) for item in obj)
+    elif isinstance(obj, dict):
+        size += sum(deep_size(key, seen) + deep_size(value, seen) for key, value in obj.items())
+    return size
+
+
+def post_memory_report(posts):
+    """Return the bytes the posts use in memory, in total and per field
+
+    Lazy posts are measured as they are held, without loading their content.
+    """
+    seen = set()
+    fields = dict.fromkeys(REPORT_FIELDS, 0)
+    objects = 0
+    for post in posts:
+        objects += deep_size(post, seen)
+        for field in REPORT_FIELDS:
+            fields[field] += deep_size(getattr(post, field), seen)
+    total = objects + sum(fields.values())
+    return {"posts": len(posts), "total": total, "objects": objects, "fields": fields}
+
+
+def format_report(report):
+    """Return a report as lines of text"""
+    count = report["posts"]
+    lines = [f"{count} posts use {format_bytes(report['total'])} "
+             f"({format_bytes(report['total'] // max(count, 1))} per post)",
+             f"  Post objects: {format_bytes(report['objects'])}"]
+    for field, size in report["fields"].items():
+        lines.append(f"  {FIELD_LABELS[field]}: {format_bytes(size)}")
+    return "\n".join(lines)
+
+
+def format_bytes(size):
+    if size < 1024:
+        return f"{size} bytes"
+    for unit in ("KB", "MB", "GB"):
+        size /= 1024
+        if size < 1024 or unit == "GB":
+            return f"{size:.1f} {unit}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report how much memory the loaded posts use")
+    parser.add_argument("--data-file", default="blog_posts.json")
+    parser.add_argument("--storage", choices=sorted(STORAGE_MODES), default="json",
+                        help="how posts are stored on disk (default: json)")
+    args = parser.parse_args()
+
+    storage = open_storage(args.storage, args.data_file)
+    posts = storage.load() if storage.exists() else []
+    print(format_report(post_memory_report(posts)))
+    storage.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import tkinter as tk
+
+from instrumentation import TRACER
+
+# Number of rows rendered up front and added each time the list is scrolled
+# near its end
+PAGE_SIZE = 500
+# Fraction of the rendered rows scrolled past before the next page is added
+FILL_THRESHOLD = 0.9
+
+
+def row_text(post):
+    """Return the listbox text for a post"""
+    return f"{post.title} ({post.timestamp})"
+
+
+class PostRows:
+    """Read-only sequence of the posts with the given ids, without copying them
+
+    Changes made to the id list in place show through.
+    """
+
+    def __init__(self, post_ids, posts):
+        self.post_ids = post_ids
+        self.posts = posts  # Post id -> post
+
+    def __len__(self):
+        return len(self.post_ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.posts[post_id] for post_id in self.post_ids[index]]
+        return self.posts[self.post_ids[index]]
+
+
+class PostListView:
+    """Keep a Listbox in sync with a sequence of posts
+
+    Only a prefix of the sequence is rendered; more rows are added as the
+    user scrolls towards the end. Replacing the sequence applies just the
+    row removals and insertions between the old and new rendered rows
+    instead of clearing and refilling the whole Listbox.
+    """
+
+    def __init__(self, listbox, scrollbar=None, page_size=PAGE_SIZE):
+        self.listbox = listbox
+        self.scrollbar = scrollbar
+        self.page_size = page_size
+        self.items = []   # Full sequence being shown
+        self.rows = []    # Posts currently rendered in the listbox
+        self.labels = []  # Text of the rendered rows
+        self.render_id = None  # Queued render of the next page
+        self.listbox.config(yscrollcommand=self.on_scroll)
+
+    def __len__(self):
+        return len(self.items)
+
+    def set_items(self, items):
+        """Show a new sequence of posts, touching only rows that changed"""
+        with TRACER.span("listbox.update", "ui"):
+            self._set_items(items)
+
+    def _set_items(self, items):
+        self.items = items
+        target = min(len(items), max(len(self.rows), self.page_size))
+        new_rows = items[:target]
+        new_labels = [row_text(post) for post in new_rows]
+
+        new_position = {post: i for i, post in enumerate(new_rows)}
+        kept = [new_position[post] for post in self.rows if post in new_position]
+        if any(a >= b for a, b in zip(kept, kept[1:])):
+            # The order changed, so a diff would not save anything
+            self.listbox.delete(0, tk.END)
+            if new_labels:
+                self.listbox.insert(tk.END, *new_labels)
+        else:
+            self._apply_diff(new_position, new_rows, new_labels)
+
+        self.rows = list(new_rows)
+        self.labels = new_labels
+
+    def update_row(self, index):
+        """Re-render one row after its post was edited in place"""
+        if index < len(self.rows):
+            label = row_text(self.rows[index])
+            if label != self.labels[index]:
+                self.listbox.delete(index)
+                self.listbox.insert(index, label)
+                self.labels[index] = label
+
+    def insert_row(self, index):
+        """Show a post that was inserted into the sequence at index"""
+        # Rows stay a prefix of the sequence, so a post past them is only
+        # rendered when every other post already is
+        if index < len(self.rows) or len(self.rows) == len(self.items) - 1:
+            post = self.items[index]
+            label = row_text(post)
+            self.listbox.insert(index, label)
+            self.rows.insert(index, post)
+            self.labels.insert(index, label)
+
+    def delete_row(self, index):
+        """Remove the row of a post that was removed from the sequence at index"""
+        if index < len(self.rows):
+            self.listbox.delete(index)
+            del self.rows[index]
+            del self.labels[index]
+
+    def render_more(self):
+        """Render the next page of rows, return True if any were added"""
+        start = len(self.rows)
+        if start >= len(self.items):
+            return False
+        new_rows = self.items[start:start + self.page_size]
+        new_labels = [row_text(post) for post in new_rows]
+        self.listbox.insert(tk.END, *new_labels)
+        self.rows.extend(new_rows)
+        self.labels.extend(new_labels)
+        return True
+
+    def on_scroll(self, first, last):
+        """Forward scrolling to the scrollbar and fill rows near the end"""
+        if self.scrollbar is not None:
+            self.scrollbar.set(first, last)
+        if (float(last) >= FILL_THRESHOLD and len(self.rows) < len(self.items)
+                and self.render_id is None):
+            # Let Tk finish the current scroll before growing the list; the
+            # scroll events until then would only queue the same page again
+            self.render_id = self.listbox.after_idle(self.render_queued)
+
+    def render_queued(self):
+        self.render_id = None
+        self.render_more()
+
+    def _apply_diff(self, new_position, new_rows, new_labels):
+        # Remove rows that are gone (or whose text changed), bottom up so the
+        # indices of the remaining runs stay valid
+        kept = set()
+        end = None
+        for i in range(len(self.rows) - 1, -1, -1):
+            j = new_position.get(self.rows[i])
+            if j is not None and new_labels[j] == self.labels[i]:
+                kept.add(j)
+                if end is not None:
+                    self.listbox.delete(i + 1, end)
+                    end = None
+            elif end is None:
+                end = i
+        if end is not None:
+            self.listbox.delete(0, end)
+
+        # The listbox now holds the kept rows in order; insert the new runs
+        start = None
+        for j in range(len(new_rows) + 1):
+            if j < len(new_rows) and j not in kept:
+                if start is None:
+                    start = j
+            elif start is not None:
+                self.listbox.insert(start, *new_labels[start:j])
+                start = None
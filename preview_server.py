@@ -0,0 +1,157 @@
+import hashlib
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# Seconds a page's reload check waits for a change before answering anyway
+CHANGE_WAIT_TIMEOUT = 25
+
+# Seconds a page still counts as open without waiting for a change: while a
+# browser starts and loads it, or reloads it after a change
+OPEN_GRACE = 10
+
+# Added to every page: asks the server for the page's next version and
+# reloads when it differs from the one being shown
+RELOAD_SCRIPT = """<script>
+(function poll(etag) {
+    fetch("/changes/%(key)s?etag=" + encodeURIComponent(etag))
+        .then(function (response) { return response.text(); })
+        .then(function (current) { if (current !== etag) location.reload(); else poll(etag); })
+        .catch(function () { setTimeout(function () { poll(etag); }, 2000); });
+})("%(etag)s");
+</script>
+"""
+
+
+class PreviewServer:
+    """Serve post previews from memory on a local HTTP server
+
+    Pages are published under a stable URL per key. Publishing a new
+    version wakes the pages open in the browser, which reload themselves,
+    so a post is only ever opened in one tab. The server runs on a daemon
+    thread and is started on first use.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.host = host
+        self.port = port
+        self.pages = {}  # Key -> (etag, page bytes)
+        self.watchers = {}  # Key -> number of open pages waiting for a change
+        self.last_seen = {}  # Key -> when a page was last opened or stopped waiting
+        self.condition = threading.Condition()
+        self.httpd = None
+        self.thread = None
+        self.closed = False
+
+    def start(self):
+        if self.httpd is None:
+            self.httpd = ThreadingHTTPServer((self.host, self.port), PreviewHandler)
+            self.httpd.preview = self
+            self.port = self.httpd.server_address[1]
+            self.thread = threading.Thread(target=self.httpd.serve_forever, name="preview-server",
+                                           daemon=True)
+            self.thread.start()
+
+    def url(self, key):
+        return f"http://{self.host}:{self.port}/posts/{key}"
+
+    def publish(self, key, html):
+        """Serve html under key, reloading the page where it is open"""
+        self.start()
+        etag = hashlib.sha1(html.encode("utf-8")).hexdigest()
+        script = RELOAD_SCRIPT % {"key": key, "etag": etag}
+        head, body_end, tail = html.rpartition("</body>")
+        page = head + script + body_end + tail if body_end else html + script
+        with self.condition:
+            self.pages[key] = (etag, page.encode("utf-8"))
+            self.condition.notify_all()
+        return self.url(key)
+
+    def unpublish(self, key):
+        with self.condition:
+            self.last_seen.pop(key, None)
+            if self.pages.pop(key, None) is not None:
+                self.condition.notify_all()
+
+    def claim_open(self, key):
+        """Return True if the page of key should be opened in a browser
+
+        Checked and marked open in one step, so opening twice in quick
+        succession only asks for one browser tab.
+        """
+        now = time.monotonic()
+        with self.condition:
+            if self.watchers.get(key, 0) > 0 or now - self.last_seen.get(key, -OPEN_GRACE) < OPEN_GRACE:
+                return False
+            self.last_seen[key] = now
+            return True
+
+    def page(self, key):
+        """Return the (etag, page bytes) of key, or None"""
+        with self.condition:
+            return self.pages.get(key)
+
+    def wait_for_change(self, key, etag, timeout=CHANGE_WAIT_TIMEOUT):
+        """Wait until the page of key no longer has etag, return its current etag"""
+        def current():
+            entry = self.pages.get(key)
+            return entry[0] if entry is not None else ""
+        with self.condition:
+            self.watchers[key] = self.watchers.get(key, 0) + 1
+            try:
+                self.condition.wait_for(lambda: self.closed or current() != etag, timeout)
+            finally:
+                self.watchers[key] -= 1
+                self.last_seen[key] = time.monotonic()
+            return current()
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.thread.join()
+            self.httpd = None
+
+
+class PreviewHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        preview = self.server.preview
+        url = urlsplit(self.path)
+        kind, _, key = url.path.strip("/").partition("/")
+        if kind == "posts":
+            entry = preview.page(key)
+            if entry is None:
+                self.send_error(HTTPStatus.NOT_FOUND, "No preview for this post")
+                return
+            etag, page = entry
+            if self.headers.get("If-None-Match") == f'"{etag}"':
+                self.send_response(HTTPStatus.NOT_MODIFIED)
+                self.send_header("ETag", f'"{etag}"')
+                self.end_headers()
+                return
+            self.send_body(page, "text/html; charset=utf-8", etag)
+        elif kind == "changes":
+            etag = parse_qs(url.query).get("etag", [""])[0]
+            self.send_body(preview.wait_for_change(key, etag).encode("ascii"), "text/plain")
+        else:
+            self.send_error(HTTPStatus.NOT_FOUND)
+
+    def send_body(self, body, content_type, etag=None):
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        # Always revalidate, unchanged pages are answered with 304
+        self.send_header("Cache-Control", "no-cache")
+        if etag is not None:
+            self.send_header("ETag", f'"{etag}"')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Keep the request log out of the application's console
+        pass
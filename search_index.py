@@ -0,0 +1,426 @@
+import heapq
+import math
+import re
+import sys
+from bisect import bisect_left, insort
+
+
+WORD_RE = re.compile(r"\w+")
+FIELD_SEPARATOR = "\x00"
+# Weight of a word in each field of a post when ranking
+FIELD_BOOSTS = {"title": 3.0, "tags": 2.0, "category": 2.0, "content": 1.0}
+# BM25 term frequency saturation and length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Number of best matches a ranked search returns
+RANKED_LIMIT = 100
+# Number of words a prefix completion returns
+COMPLETION_LIMIT = 10
+
+
+def searchable_text(post):
+    """Build the lowercased text a query is matched against"""
+    # Fields are joined with a separator that never appears in a query,
+    # so a match can never span two fields (same as matches_search)
+    parts = [post.title, post.content, post.category]
+    parts.extend(post.tags)
+    return FIELD_SEPARATOR.join(parts).lower()
+
+
+def trigrams(text):
+    """Return the set of 3-character substrings of text"""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def edit_distance(a, b, limit):
+    """Return the Levenshtein distance of a and b, or limit + 1 if it is larger"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char in enumerate(a, 1):
+        current = [i]
+        for j, other in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char != other)))
+        if min(current) > limit:
+            # Every later row is at least as far
+            return limit + 1
+        previous = current
+    return min(previous[-1], limit + 1)
+
+
+def typo_limit(word):
+    """Return the number of typos tolerated in a query word"""
+    if len(word) <= 2:
+        return 0
+    return 1 if len(word) <= 5 else 2
+
+
+class PostSearchIndex:
+    """Inverted word index answering BlogPost.matches_search queries
+
+    Posts are indexed by id. Queries are narrowed down to candidate posts
+    using the words they contain and every candidate is verified against
+    the stored lowercased text, so the results are exactly the posts for
+    which matches_search would return True.
+    """
+
+    def __init__(self, posts=()):
+        self.clear()
+        for post in posts:
+            self.add(post)
+
+    def clear(self):
+        """Remove every post from the index"""
+        self._texts = {}        # post id -> searchable text
+        self._postings = {}     # word -> set of post ids
+        self._word_grams = {}   # trigram -> set of words
+
+    def __len__(self):
+        return len(self._texts)
+
+    def add(self, post):
+        """Index a new post"""
+        self._index_text(post.post_id, searchable_text(post))
+
+    def update(self, post):
+        """Re-index a post whose fields were changed in place"""
+        self._unindex_text(post.post_id)
+        self._index_text(post.post_id, searchable_text(post))
+
+    def remove(self, post):
+        """Drop a post from the index"""
+        self._unindex_text(post.post_id)
+
+    def candidates(self, query):
+        """Return the sorted ids of the posts that may match query"""
+        ids = self._candidates(query.lower())
+        return sorted(self._texts if ids is None else ids)
+
+    def search(self, query, within=None):
+        """Return the ids of the posts matching query
+
+        If within is given, only those ids are checked (in the given order),
+        otherwise every candidate for the query is. Ids of posts removed
+        since within was made never match.
+        """
+        if FIELD_SEPARATOR in query:
+            # It would only match where two fields are joined
+            return []
+        if within is None:
+            within = self.candidates(query)
+        query = query.lower()
+        texts = self._texts
+        return [post_id for post_id in within if post_id in texts and query in texts[post_id]]
+
+    def _index_text(self, post_id, text):
+        self._texts[post_id] = text
+        for word in set(WORD_RE.findall(text)):
+            posting = self._postings.get(word)
+            if posting is None:
+                posting = self._postings[word] = set()
+                for gram in trigrams(word):
+                    self._word_grams.setdefault(gram, set()).add(word)
+            posting.add(post_id)
+
+    def _unindex_text(self, post_id):
+        text = self._texts.pop(post_id)
+        for word in set(WORD_RE.findall(text)):
+            posting = self._postings[word]
+            posting.discard(post_id)
+            if not posting:
+                del self._postings[word]
+                for gram in trigrams(word):
+                    words = self._word_grams[gram]
+                    words.discard(word)
+                    if not words:
+                        del self._word_grams[gram]
+
+    def _candidates(self, query):
+        """Return a superset of the matching post ids, or None"""
+        # A word run inside the query that is bounded by non-word characters
+        # must line up with a word boundary in the post, which tells us how
+        # the run relates to a word of the post: equal, prefix, suffix or
+        # substring. The post must contain at least one such word.
+        result = None
+        for match in WORD_RE.finditer(query):
+            run = match.group()
+            left_bounded = match.start() > 0
+            right_bounded = match.end() < len(query)
+            if left_bounded and right_bounded:
+                ids = self._postings.get(run, set())
+            elif len(run) < 3:
+                continue  # Too short to be selective
+            else:
+                ids = set()
+                for word in self._words_containing(run):
+                    if left_bounded and not word.startswith(run):
+                        continue
+                    if right_bounded and not word.endswith(run):
+                        continue
+                    ids.update(self._postings[word])
+            result = ids if result is None else result & ids
+            if not result:
+                break
+        return result
+
+    def _words_containing(self, run):
+        """Return the indexed words that contain run (len(run) >= 3)"""
+        grams = sorted((self._word_grams.get(gram, set()) for gram in trigrams(run)), key=len)
+        words = set(grams[0])
+        for other in grams[1:]:
+            words &= other
+            if not words:
+                break
+        return [word for word in words if run in word]
+
+
+class ScanSearchIndex:
+    """Search by checking posts one by one, without caching their text
+
+    Used when post bodies live on disk and are loaded on demand, so the
+    app never holds every body in memory. Pairs with the chunked search in
+    the app, which keeps the scan from blocking the UI.
+    """
+
+    def __init__(self, posts):
+        self.posts = posts  # The app's live mapping of id -> post
+
+    def add(self, post):
+        pass
+
+    def update(self, post):
+        pass
+
+    def remove(self, post):
+        pass
+
+    def candidates(self, query):
+        """Return the ids of every post"""
+        return list(self.posts)
+
+    def search(self, query, within=None):
+        """Return the ids of the posts matching query"""
+        if within is None:
+            within = self.candidates(query)
+        posts = self.posts
+        return [post_id for post_id in within
+                if post_id in posts and posts[post_id].matches_search(query)]
+
+
+class RankedSearchIndex:
+    """Rank posts against the words of a query with BM25
+
+    Term frequencies are weighted per field by FIELD_BOOSTS and document
+    lengths by the same boosts, so a word in the title counts for more
+    than one in the body. The postings, document frequencies and lengths
+    are kept up to date on every change, so a query only walks the
+    postings of its own words and a heap picks the best few matches
+    without sorting the rest.
+    """
+
+    def __init__(self, posts=()):
+        self._postings = {}       # word -> {post id: weighted term frequency}
+        self._words = {}          # post id -> distinct words as indexed
+        self._lengths = {}        # post id -> weighted number of words
+        self._total_length = 0.0
+        for post in posts:
+            self.add(post)
+
+    def __len__(self):
+        return len(self._lengths)
+
+    def add(self, post):
+        """Index a new post"""
+        frequencies = {}
+        length = 0.0
+        for field, boost in FIELD_BOOSTS.items():
+            if field == "tags":
+                words = WORD_RE.findall(" ".join(post.tags).lower())
+            else:
+                words = WORD_RE.findall(getattr(post, field).lower())
+            length += boost * len(words)
+            for word in words:
+                frequencies[word] = frequencies.get(word, 0.0) + boost
+        for word, frequency in frequencies.items():
+            posting = self._postings.get(word)
+            if posting is None:
+                posting = self._postings[sys.intern(word)] = {}
+            posting[post.post_id] = frequency
+        self._words[post.post_id] = tuple(sys.intern(word) for word in frequencies)
+        self._lengths[post.post_id] = length
+        self._total_length += length
+
+    def update(self, post):
+        """Re-index a post whose fields were changed in place"""
+        self.remove(post)
+        self.add(post)
+
+    def remove(self, post):
+        """Drop a post from the index"""
+        length = self._lengths.pop(post.post_id, None)
+        if length is None:
+            return
+        self._total_length -= length
+        # Words as indexed, which an in-place edit may have changed
+        for word in self._words.pop(post.post_id):
+            posting = self._postings[word]
+            del posting[post.post_id]
+            if not posting:
+                del self._postings[word]
+
+    def search(self, query, limit=RANKED_LIMIT, within=None):
+        """Return (ids of the best matches, best first, number of posts matching)
+
+        A post matches if it contains any word of the query. within limits
+        the search to a set of ids.
+        """
+        count = len(self._lengths)
+        if not count:
+            return [], 0
+        average_length = self._total_length / count or 1.0
+        lengths = self._lengths
+        scores = {}
+        for word in set(WORD_RE.findall(query.lower())):
+            posting = self._postings.get(word)
+            if not posting:
+                continue
+            idf = math.log(1 + (count - len(posting) + 0.5) / (len(posting) + 0.5))
+            for post_id, frequency in posting.items():
+                if within is not None and post_id not in within:
+                    continue
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[post_id] / average_length)
+                scores[post_id] = scores.get(post_id, 0.0) + idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+        # Ties go to the newer post
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], item[0]))
+        return [post_id for post_id, score in best], len(scores)
+
+
+class FuzzyTermIndex:
+    """Typo-tolerant and prefix matching of the words in post titles and tags
+
+    Each distinct word is indexed by the trigrams of the word padded with
+    two spaces. An edit changes at most 3 of them, so two words within d
+    edits share all but at most 3 * d, and counting shared trigrams gives
+    a short list of candidate words, which are then checked with an edit
+    distance that gives up as soon as it exceeds the limit. The words are
+    also kept in a sorted list so prefixes are completed with a binary
+    search.
+    """
+
+    def __init__(self, posts=()):
+        self._postings = {}      # word -> set of post ids
+        self._words = {}         # post id -> distinct words as indexed
+        self._word_grams = {}    # trigram of the padded word -> set of words
+        self._sorted_words = []  # every indexed word, sorted
+        for post in posts:
+            self.add(post)
+
+    def __len__(self):
+        return len(self._words)
+
+    def add(self, post):
+        """Index a new post"""
+        words = set(WORD_RE.findall(post.title.lower()))
+        for tag in post.tags:
+            words.update(WORD_RE.findall(tag.lower()))
+        for word in words:
+            posting = self._postings.get(word)
+            if posting is None:
+                word = sys.intern(word)
+                posting = self._postings[word] = set()
+                for gram in trigrams(f"  {word}  "):
+                    self._word_grams.setdefault(gram, set()).add(word)
+                insort(self._sorted_words, word)
+            posting.add(post.post_id)
+        self._words[post.post_id] = tuple(words)
+
+    def update(self, post):
+        """Re-index a post whose fields were changed in place"""
+        self.remove(post)
+        self.add(post)
+
+    def remove(self, post):
+        """Drop a post from the index"""
+        # Words as indexed, which an in-place edit may have changed
+        for word in self._words.pop(post.post_id, ()):
+            posting = self._postings[word]
+            posting.discard(post.post_id)
+            if not posting:
+                del self._postings[word]
+                for gram in trigrams(f"  {word}  "):
+                    words = self._word_grams[gram]
+                    words.discard(word)
+                    if not words:
+                        del self._word_grams[gram]
+                del self._sorted_words[bisect_left(self._sorted_words, word)]
+
+    def similar_words(self, word, limit=None):
+        """Return {indexed word: edit distance} for the words within limit edits of word
+
+        limit defaults to typo_limit(word).
+        """
+        if limit is None:
+            limit = typo_limit(word)
+        if limit == 0:
+            return {word: 0} if word in self._postings else {}
+        grams = trigrams(f"  {word}  ")
+        shared = {}
+        for gram in grams:
+            for other in self._word_grams.get(gram, ()):
+                shared[other] = shared.get(other, 0) + 1
+        needed = max(1, len(grams) - 3 * limit)
+        similar = {}
+        for other, count in shared.items():
+            if count >= needed:
+                distance = edit_distance(word, other, limit)
+                if distance <= limit:
+                    similar[other] = distance
+        return similar
+
+    def completions(self, prefix, limit=COMPLETION_LIMIT):
+        """Return up to limit indexed words starting with prefix, most used first"""
+        return [word for count, word in heapq.nsmallest(
+            limit, ((-len(self._postings[word]), word) for word in self._prefixed(prefix)))]
+
+    def suggest(self, word):
+        """Return the indexed word closest to word, preferring widely used ones, or None"""
+        if word in self._postings:
+            return word
+        similar = self.similar_words(word)
+        if not similar:
+            return None
+        return min(similar, key=lambda other: (similar[other], -len(self._postings[other]), other))
+
+    def search(self, query, within=None):
+        """Return the sorted ids of the posts matching every word of query
+
+        A query word matches a word of a post's title or tags that is
+        within typo_limit edits of it; the last word also matches any word
+        it is a prefix of, so results keep up while a word is being typed.
+        within limits the search to a set of ids.
+        """
+        words = WORD_RE.findall(query.lower())
+        if not words:
+            return []
+        result = None
+        for position, word in enumerate(words):
+            matched = list(self.similar_words(word))
+            if position == len(words) - 1:
+                matched.extend(self._prefixed(word))
+            ids = set()
+            for other in matched:
+                ids.update(self._postings[other])
+            result = ids if result is None else result & ids
+            if not result:
+                return []
+        if within is not None:
+            result &= within
+        return sorted(result)
+
+    def _prefixed(self, prefix):
+        """Yield the indexed words starting with prefix, in order"""
+        words = self._sorted_words
+        for i in range(bisect_left(words, prefix), len(words)):
+            if not words[i].startswith(prefix):
+                break
+            yield words[i]
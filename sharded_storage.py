@@ -0,0 +1,231 @@
+import heapq
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from blog_post import BlogPost, assign_post_ids, timestamp_month
+from search_index import PostSearchIndex
+from storage import check_loaded, encode_posts, iter_post_batches, write_atomic
+
+# Shard of the posts whose timestamp is not in the standard form
+UNDATED_SHARD = "undated"
+# Shard files read at once while loading
+LOAD_THREADS = 4
+
+
+def shard_name(data):
+    """Return the shard a post dict belongs in, the YYYY-MM month of its timestamp"""
+    return timestamp_month(data.get("timestamp")) or UNDATED_SHARD
+
+
+def read_shard_file(path):
+    with open(path, 'rb') as file:
+        return json.load(file)
+
+
+class ShardedStorage:
+    """Keep posts in one JSON file per month, listed in a small manifest
+
+    blog_posts.manifest.json names the file of every month in the
+    blog_posts.shards folder, with its number of posts and lowest and
+    highest id. A flush rewrites only the shards changed since the last
+    one; an edit restamps a post, so it touches the post's old month and
+    the current one. Changed shards are written under new file names and
+    only switched to by atomically replacing the manifest, so a crash
+    never leaves a post in two shards or in none.
+    """
+
+    def __init__(self, data_file):
+        base = os.path.splitext(data_file)[0]
+        self.data_file = data_file
+        self.manifest_file = base + ".manifest.json"
+        self.shard_dir = base + ".shards"
+        self.manifest = {}  # Shard name -> file, count, first_id and last_id as on disk
+        self.generation = 0  # Bumped on every flush, and part of the file names it writes
+        self.shards = {}  # Shard name -> {post id: post dict}
+        self.post_shards = {}  # Post id -> shard name
+        self.dirty_shards = set()
+        self.retired_files = []  # Shard files to delete once the manifest no longer names them
+        self.loaded = False  # shards holds every stored post, which load_months() does not do
+
+    def exists(self):
+        return os.path.exists(self.manifest_file) or os.path.exists(self.data_file)
+
+    def load(self):
+        """Return the stored posts"""
+        if not os.path.exists(self.manifest_file):
+            return self._split_data_file()
+        names = self._use_manifest(self._read_manifest())
+        posts_data = []
+        for name, shard in zip(names, self._read_shards(self.manifest, names)):
+            self._set_shard(name, shard)
+            posts_data.extend(shard)
+        posts_data.sort(key=lambda data: data["id"])
+        self.loaded = True
+        return [BlogPost.from_dict(data) for data in posts_data]
+
+    def iter_load(self, batch_size):
+        """Yield (batch of posts, fraction loaded) as shards are read, in id order"""
+        if not os.path.exists(self.manifest_file):
+            return iter_post_batches(self._split_data_file(), batch_size)
+        return self._iter_shards(batch_size)
+
+    def load_months(self, first=None, last=None):
+        """Return the posts of months first..last (YYYY-MM, None for no bound), reading only their shards
+
+        The posts read are not kept, so nothing can be changed through them:
+        until load() or replace(), record() and flush() raise RuntimeError.
+        """
+        if not os.path.exists(self.manifest_file):
+            self._split_data_file()
+        manifest = self._read_manifest()["shards"]
+        names = [name for name in sorted(manifest) if name != UNDATED_SHARD
+                 and (first is None or name >= first) and (last is None or name <= last)]
+        posts_data = [data for shard in self._read_shards(manifest, names) for data in shard]
+        posts_data.sort(key=lambda data: data["id"])
+        return [BlogPost.from_dict(data) for data in posts_data]
+
+    def replace(self, posts_data):
+        """Replace every stored post"""
+        # Every shard on disk is rewritten, or deleted if no post is left in it
+        self.dirty_shards = set(self.manifest) | set(self.shards)
+        self.shards = {}
+        self.post_shards = {}
+        self.loaded = True
+        for data in posts_data:
+            self._add(data)
+
+    def record(self, op, post_id, data=None):
+        """Record that a post was created, updated or deleted"""
+        check_loaded(self)
+        name = self.post_shards.get(post_id)
+        if op == "create":
+            if name is not None:
+                raise ValueError(f"Post {post_id} already exists")
+        elif op not in ("update", "delete"):
+            raise ValueError(f"Unknown record type: {op}")
+        elif name is None:
+            raise KeyError(f"No post with id {post_id}")
+        else:
+            del self.shards[name][post_id]
+            del self.post_shards[post_id]
+            self.dirty_shards.add(name)
+        if op != "delete":
+            self._add(data)
+
+    def flush(self):
+        """Write the changed shards, then the manifest that switches to them"""
+        if not self.dirty_shards:
+            return
+        # The manifest is rewritten from the shards held here
+        check_loaded(self)
+        self.generation += 1
+        os.makedirs(self.shard_dir, exist_ok=True)
+        for name in sorted(self.dirty_shards):
+            old = self.manifest.pop(name, None)
+            if old is not None:
+                self.retired_files.append(old["file"])
+            shard = self.shards.get(name)
+            if not shard:
+                self.shards.pop(name, None)
+                continue
+            ids = sorted(shard)
+            file_name = f"{name}.{self.generation}.json"
+            write_atomic(os.path.join(self.shard_dir, file_name),
+                         encode_posts([shard[post_id] for post_id in ids]))
+            self.manifest[name] = {"file": file_name, "count": len(ids), "first_id": ids[0], "last_id": ids[-1]}
+        self._write_manifest()
+        self.dirty_shards = set()
+
+    def create_search_index(self, posts):
+        """Return the index used to answer searches over posts, a mapping of id -> post"""
+        return PostSearchIndex(posts.values())
+
+    def close(self):
+        self.flush()
+
+    def _add(self, data):
+        name = shard_name(data)
+        self.shards.setdefault(name, {})[data["id"]] = data
+        self.post_shards[data["id"]] = name
+        self.dirty_shards.add(name)
+
+    def _set_shard(self, name, posts_data):
+        self.shards[name] = {data["id"]: data for data in posts_data}
+        for data in posts_data:
+            self.post_shards[data["id"]] = name
+
+    def _split_data_file(self):
+        """First use: split the single JSON file into shards, return its posts"""
+        with open(self.data_file, 'rb') as file:
+            posts_data = json.load(file)
+        assign_post_ids(posts_data)
+        self.replace(posts_data)
+        self.flush()
+        return [BlogPost.from_dict(data) for data in posts_data]
+
+    def _read_manifest(self):
+        with open(self.manifest_file, 'rb') as file:
+            return json.load(file)
+
+    def _use_manifest(self, manifest):
+        """Take the shards of a manifest as the ones on disk, return their names"""
+        self.generation = manifest["generation"]
+        self.manifest = manifest["shards"]
+        self.shards = {}
+        self.post_shards = {}
+        self.dirty_shards = set()
+        self.loaded = False
+        # Files of a flush that never reached the manifest
+        listed = {info["file"] for info in self.manifest.values()}
+        self.retired_files = [file_name for file_name in os.listdir(self.shard_dir) if file_name not in listed]
+        return sorted(self.manifest)
+
+    def _read_shards(self, manifest, names):
+        """Return the post dicts of each named shard, reading several files at once"""
+        paths = [os.path.join(self.shard_dir, manifest[name]["file"]) for name in names]
+        with ThreadPoolExecutor(max_workers=LOAD_THREADS) as pool:
+            return list(pool.map(read_shard_file, paths))
+
+    def _iter_shards(self, batch_size):
+        names = self._use_manifest(self._read_manifest())
+        total = max(1, sum(info["count"] for info in self.manifest.values()))
+        # Shards whose id ranges overlap, e.g. a month holding old posts
+        # edited in it, are merged before their posts are handed out
+        names.sort(key=lambda name: self.manifest[name]["first_id"])
+        groups = []
+        last_id = 0
+        for name in names:
+            if groups and self.manifest[name]["first_id"] <= last_id:
+                groups[-1].append(name)
+            else:
+                groups.append([name])
+            last_id = max(last_id, self.manifest[name]["last_id"])
+        handed_out = 0
+        paths = [os.path.join(self.shard_dir, self.manifest[name]["file"]) for name in names]
+        with ThreadPoolExecutor(max_workers=LOAD_THREADS) as pool:
+            # Files are read ahead while earlier shards are handed out
+            shards = pool.map(read_shard_file, paths)
+            for group in groups:
+                group_data = []
+                for name in group:
+                    posts_data = next(shards)
+                    self._set_shard(name, posts_data)
+                    group_data.append(posts_data)
+                posts = [BlogPost.from_dict(data) for data in
+                         heapq.merge(*group_data, key=lambda data: data["id"])]
+                for start in range(0, len(posts), batch_size):
+                    batch = posts[start:start + batch_size]
+                    handed_out += len(batch)
+                    yield batch, min(1.0, handed_out / total)
+        self.loaded = True
+
+    def _write_manifest(self):
+        manifest = {"generation": self.generation, "shards": self.manifest}
+        write_atomic(self.manifest_file, json.dumps(manifest, indent=2).encode("utf-8"))
+        # Only now is nothing on disk referring to the old shard files
+        for file_name in self.retired_files:
+            path = os.path.join(self.shard_dir, file_name)
+            if os.path.exists(path):
+                os.remove(path)
+        self.retired_files = []
@@ -0,0 +1,169 @@
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from html import escape
+
+from html_export import render_page, render_post_html
+from storage import STORAGE_MODES, open_storage, write_atomic
+
+MANIFEST_NAME = ".build_manifest.json"
+# Bump when the page templates change so the next build renders every post
+TEMPLATE_VERSION = 2
+# Below this many changed posts starting worker processes costs more than it saves
+PARALLEL_THRESHOLD = 64
+SLUG_RE = re.compile(r"[^a-z0-9]+")
+
+
+def slugify(text):
+    """Return a file name friendly version of text"""
+    return SLUG_RE.sub("-", text.lower()).strip("-") or "untitled"
+
+
+def name_slug(name):
+    """Return a file name for a category or tag page, unique to the exact name"""
+    # Names that slugify alike, such as "C++" and "C#", "Python" and "python"
+    # or any two non-ASCII names, are told apart by a hash of the name
+    digest = hashlib.sha1(name.encode("utf-8")).hexdigest()[:8]
+    return f"{slugify(name)}-{digest}"
+
+
+def post_path(data):
+    """Return the path of a post's page, relative to the output directory"""
+    return f"posts/{data['id']}-{slugify(data['title'])}.html"
+
+
+def content_hash(data):
+    """Return a hash of everything a post's page is rendered from"""
+    blob = json.dumps([TEMPLATE_VERSION, data], sort_keys=True).encode("utf-8")
+    return hashlib.sha256(blob).hexdigest()
+
+
+def render_post_page(data):
+    """Render the page of one post (runs in a worker process)"""
+    return render_post_html(data)
+
+
+def render_index(title, entries, root, links=()):
+    """Render a page listing posts newest first, and optionally other index pages"""
+    items = '\n'.join(f'        <li><a href="{root}{path}">{escape(data["title"])}</a> '
+                      f'<span class="meta">{escape(data["timestamp"])}</span></li>'
+                      for data, path in sorted(entries, key=lambda entry: entry[0]["timestamp"],
+                                               reverse=True))
+    body = f"""    <h1>{escape(title)}</h1>
+    <ul class="posts">
+{items}
+    </ul>"""
+    for heading, pages in links:
+        page_links = ' '.join(f'<a class="tag" href="{root}{path}">{escape(name)} ({count})</a>'
+                              for name, path, count in pages)
+        body += f"""
+    <h2>{heading}</h2>
+    <div class="tags">{page_links}</div>"""
+    return render_page(escape(title), body)
+
+
+def build_site(posts_data, output_dir, workers=None):
+    """Render posts_data as a static site in output_dir
+
+    Posts whose content hash matches the previous build's manifest are not
+    rendered again, and pages of posts that no longer exist are removed.
+    Returns the number of posts rendered, skipped and removed.
+    """
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    try:
+        with open(manifest_path, 'rb') as file:
+            previous = json.load(file)
+    except (OSError, ValueError):
+        previous = {}
+
+    manifest = {}  # Page path -> hash of what it was rendered from
+    entries = []  # (post data, page path) of every post
+    jobs = []  # (page path, post data) of posts to render
+    for data in posts_data:
+        path = post_path(data)
+        manifest[path] = content_hash(data)
+        entries.append((data, path))
+        if previous.get(path) != manifest[path] or not os.path.exists(os.path.join(output_dir, path)):
+            jobs.append((path, data))
+
+    if len(jobs) >= PARALLEL_THRESHOLD and workers != 1:
+        # Spawned workers never inherit the GUI's threads or open storage
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            chunksize = max(1, len(jobs) // (8 * (workers or os.cpu_count() or 1)))
+            pages = list(pool.map(render_post_page, [data for path, data in jobs], chunksize=chunksize))
+    else:
+        pages = [render_post_page(data) for path, data in jobs]
+
+    for (path, data), html in zip(jobs, pages):
+        write_page(output_dir, path, html)
+
+    # Index pages are cheap to render and only written when they changed
+    categories = {}
+    tags = {}
+    for data, path in entries:
+        if data.get("category"):
+            categories.setdefault(data["category"], []).append((data, path))
+        for tag in data.get("tags", []):
+            tags.setdefault(tag, []).append((data, path))
+    category_pages = [(name, f"categories/{name_slug(name)}.html", group)
+                      for name, group in sorted(categories.items())]
+    tag_pages = [(name, f"tags/{name_slug(name)}.html", group)
+                 for name, group in sorted(tags.items())]
+
+    index_pages = {"index.html": render_index("All Posts", entries, "", [
+        ("Categories", [(name, path, len(group)) for name, path, group in category_pages]),
+        ("Tags", [(name, path, len(group)) for name, path, group in tag_pages]),
+    ])}
+    for name, path, group in category_pages:
+        index_pages[path] = render_index(f"Category: {name}", group, "../")
+    for name, path, group in tag_pages:
+        index_pages[path] = render_index(f"Tag: {name}", group, "../")
+    for path, html in index_pages.items():
+        digest = hashlib.sha256(html.encode("utf-8")).hexdigest()
+        if previous.get(path) != digest or not os.path.exists(os.path.join(output_dir, path)):
+            write_page(output_dir, path, html)
+        manifest[path] = digest
+
+    removed = 0
+    for path in previous:
+        if path not in manifest and os.path.exists(os.path.join(output_dir, path)):
+            os.remove(os.path.join(output_dir, path))
+            removed += 1
+
+    # Written last, so an interrupted build re-renders whatever it missed
+    write_atomic(manifest_path, json.dumps(manifest, indent=2).encode("utf-8"))
+    return {"rendered": len(jobs), "skipped": len(entries) - len(jobs), "removed": removed}
+
+
+def write_page(output_dir, path, html):
+    full_path = os.path.join(output_dir, path)
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    with open(full_path, 'w', encoding='utf-8') as f:
+        f.write(html)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a static HTML site from the blog posts")
+    parser.add_argument("--data-file", default="blog_posts.json")
+    parser.add_argument("--storage", choices=sorted(STORAGE_MODES), default="json",
+                        help="how posts are stored on disk (default: json)")
+    parser.add_argument("--output", default="site", help="output directory (default: site)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="number of render processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    storage = open_storage(args.storage, args.data_file)
+    posts_data = [post.to_dict() for post in storage.load()] if storage.exists() else []
+    storage.close()
+    stats = build_site(posts_data, args.output, args.workers)
+    print(f"Built {len(posts_data)} posts into {args.output}: {stats['rendered']} rendered, "
+          f"{stats['skipped']} unchanged, {stats['removed']} removed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+from bisect import bisect_left, insort
+
+
+def newest_key(post):
+    # Timestamps in another form than the standard one sort last
+    seconds = post.seconds
+    return (seconds is None, -(seconds or 0), -post.post_id)
+
+
+def oldest_key(post):
+    seconds = post.seconds
+    return (seconds is None, seconds or 0, post.post_id)
+
+
+def title_key(post):
+    return (post.title.casefold(), post.post_id)
+
+
+def category_key(post):
+    return (post.category.casefold(), post.title.casefold(), post.post_id)
+
+
+# Sort orders of the post list by name; every key includes the post id, so
+# no two posts ever have the same key
+SORT_KEYS = {
+    "newest": newest_key,
+    "oldest": oldest_key,
+    "title": title_key,
+    "category": category_key,
+}
+
+
+class CreationOrder:
+    """Posts in the order they were created, which is id order and needs no index"""
+
+    def __init__(self, posts):
+        self.posts = posts  # Post id -> post, in id order
+
+    def key(self, post):
+        return post.post_id
+
+    def keys_of(self, post_ids):
+        return list(post_ids)
+
+    def ids(self):
+        return list(self.posts)
+
+    def order(self, post_ids):
+        return sorted(post_ids)
+
+    def add(self, post):
+        pass
+
+    def update(self, post):
+        pass
+
+    def remove(self, post):
+        pass
+
+
+class SortedPostIndex:
+    """Post ids kept in the order of a sort key
+
+    (key, post id) entries are held in a list kept sorted with bisect, so
+    adding, moving or removing a post costs a binary search and one list
+    insert or delete instead of a sort. The key each post was indexed
+    under is remembered, so posts edited in place are found again.
+    """
+
+    def __init__(self, key, posts=()):
+        self.key = key
+        self.post_keys = {post.post_id: key(post) for post in posts}  # Post id -> key as indexed
+        self.entries = sorted((key, post_id) for post_id, key in self.post_keys.items())
+
+    def keys_of(self, post_ids):
+        post_keys = self.post_keys
+        return [post_keys[post_id] for post_id in post_ids]
+
+    def ids(self):
+        return [post_id for key, post_id in self.entries]
+
+    def order(self, post_ids):
+        """Return post_ids in index order"""
+        return sorted(post_ids, key=self.post_keys.__getitem__)
+
+    def add(self, post):
+        key = self.key(post)
+        self.post_keys[post.post_id] = key
+        insort(self.entries, (key, post.post_id))
+
+    def update(self, post):
+        if self.post_keys.get(post.post_id) != self.key(post):
+            self.remove(post)
+            self.add(post)
+
+    def remove(self, post):
+        key = self.post_keys.pop(post.post_id, None)
+        if key is not None:
+            del self.entries[bisect_left(self.entries, (key, post.post_id))]
@@ -0,0 +1,293 @@
+import argparse
+import json
+import os
+import sqlite3
+import threading
+
+from blog_post import BlogPost, assign_post_ids
+from storage import encode_posts, write_atomic
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS categories (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS tags (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS posts (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    content TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    category_id INTEGER REFERENCES categories(id)
+);
+CREATE INDEX IF NOT EXISTS posts_timestamp ON posts(timestamp);
+CREATE INDEX IF NOT EXISTS posts_category ON posts(category_id);
+CREATE TABLE IF NOT EXISTS post_tags (
+    post_id INTEGER NOT NULL REFERENCES posts(id),
+    position INTEGER NOT NULL,
+    tag_id INTEGER NOT NULL REFERENCES tags(id),
+    PRIMARY KEY (post_id, position)
+);
+CREATE INDEX IF NOT EXISTS post_tags_tag ON post_tags(tag_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS posts_search USING fts5(
+    title, content, category, tags, tokenize='trigram case_sensitive 1'
+);
+"""
+
+# The search table holds the text lowercased by Python, because the trigram
+# tokenizer's own case folding differs from str.lower for many characters
+# (İ, final sigma, scripts newer than its tables). The older posts_fts table
+# held the text as written and is rebuilt into posts_search when found.
+SEARCH_COLUMNS = "title, content, category, tags"
+
+# Tags are stored in one FTS column separated by a character a search query
+# cannot contain, so a match never spans two tags
+TAG_SEPARATOR = "\n"
+
+
+def python_lower(text):
+    """Lowercase text in SQL the way matches_search does"""
+    return text.lower() if text is not None else None
+
+
+class SqliteStorage:
+    """Store posts in an SQLite database with an FTS5 search index
+
+    Posts live in blog_posts.db next to the JSON data file, with categories
+    and tags in their own indexed tables. load() only reads the metadata of
+    each post; the body is fetched from the database when it is accessed.
+    The database is created from the JSON data file the first time it is
+    opened, and export_json() writes the JSON format back out. The id of a
+    post is its row id.
+    """
+
+    def __init__(self, data_file):
+        self.data_file = data_file
+        self.db_file = os.path.splitext(data_file)[0] + ".db"
+        self.connection = None
+        # Writes come from the saver thread while the UI thread reads bodies
+        self.lock = threading.RLock()
+
+    def exists(self):
+        return os.path.exists(self.db_file) or os.path.exists(self.data_file)
+
+    def connect(self, import_existing=True):
+        """Open the database, importing the JSON data file into a new one"""
+        if self.connection is None:
+            self.connection = sqlite3.connect(self.db_file, check_same_thread=False)
+            self.connection.create_function("python_lower", 1, python_lower, deterministic=True)
+            self.connection.executescript(SCHEMA)
+            if self.connection.execute(
+                    "SELECT 1 FROM sqlite_master WHERE name = 'posts_fts'").fetchone():
+                self._rebuild_search()
+            (count,) = self.connection.execute("SELECT COUNT(*) FROM posts").fetchone()
+            if import_existing and count == 0 and os.path.exists(self.data_file):
+                self.import_json(self.data_file)
+        return self.connection
+
+    def load(self):
+        """Return the stored posts with their content loaded on demand"""
+        with self.lock:
+            connection = self.connect()
+            tags = {}
+            for post_id, name in connection.execute(
+                    "SELECT post_tags.post_id, tags.name FROM post_tags "
+                    "JOIN tags ON tags.id = post_tags.tag_id "
+                    "ORDER BY post_tags.post_id, post_tags.position"):
+                tags.setdefault(post_id, []).append(name)
+
+            posts = []
+            for post_id, title, timestamp, category in connection.execute(
+                    "SELECT posts.id, posts.title, posts.timestamp, categories.name FROM posts "
+                    "LEFT JOIN categories ON categories.id = posts.category_id "
+                    "ORDER BY posts.id"):
+                posts.append(BlogPost.lazy(post_id, title, timestamp, category or "",
+                                           tags.get(post_id, []), self.content_loader(post_id)))
+            return posts
+
+    def content_loader(self, post_id):
+        """Return a function that reads the content of a post"""
+        def load_content():
+            with self.lock:
+                row = self.connect().execute(
+                    "SELECT content FROM posts WHERE id = ?", (post_id,)).fetchone()
+            return row[0] if row is not None else ""
+        return load_content
+
+    def replace(self, posts_data):
+        """Replace every stored post"""
+        with self.lock:
+            connection = self.connect()
+            for table in ("post_tags", "posts_search", "posts"):
+                connection.execute(f"DELETE FROM {table}")
+            for data in posts_data:
+                self._insert(data)
+
+    def record(self, op, post_id, data=None):
+        """Record that a post was created, updated or deleted"""
+        with self.lock:
+            self.connect()
+            if op == "create":
+                self._insert(data)
+            elif op == "update":
+                self._delete(post_id)
+                self._insert(data)
+            elif op == "delete":
+                self._delete(post_id)
+            else:
+                raise ValueError(f"Unknown record type: {op}")
+
+    def flush(self):
+        """Commit pending changes"""
+        with self.lock:
+            if self.connection is not None:
+                self.connection.commit()
+
+    def create_search_index(self, posts):
+        """Return an index that answers searches with the FTS table"""
+        return SqliteSearchIndex(self)
+
+    def close(self):
+        with self.lock:
+            if self.connection is not None:
+                self.connection.commit()
+                self.connection.close()
+                self.connection = None
+
+    def search(self, query):
+        """Return the ids of the posts containing query"""
+        query = query.lower()
+        with self.lock:
+            connection = self.connect()
+            if len(query) >= 3:
+                # The trigram tokenizer turns a phrase into a substring match
+                phrase = '"' + query.replace('"', '""') + '"'
+                rows = connection.execute(
+                    "SELECT rowid FROM posts_search WHERE posts_search MATCH ?", (phrase,))
+            else:
+                # Too short for trigrams, fall back to a scan
+                rows = connection.execute(
+                    "SELECT rowid FROM posts_search WHERE instr(title, ?1) OR instr(content, ?1) "
+                    "OR instr(category, ?1) OR instr(tags, ?1)", (query,))
+            return [rowid for (rowid,) in rows]
+
+    def import_json(self, path):
+        """Replace the stored posts with the posts of a JSON data file"""
+        with open(path, 'rb') as file:
+            posts_data = json.load(file)
+        assign_post_ids(posts_data)
+        self.connect(import_existing=False)
+        self.replace(posts_data)
+        self.connection.commit()
+        return len(posts_data)
+
+    def export_json(self, path):
+        """Write every stored post to a JSON data file"""
+        posts_data = [post.to_dict() for post in self.load()]
+        write_atomic(path, encode_posts(posts_data))
+        return len(posts_data)
+
+    def _insert(self, data):
+        connection = self.connection
+        post_id = data["id"]
+        category = data.get("category", "")
+        category_id = self._name_id("categories", category) if category else None
+        connection.execute(
+            "INSERT INTO posts (id, title, content, timestamp, category_id) VALUES (?, ?, ?, ?, ?)",
+            (post_id, data["title"], data["content"], data["timestamp"], category_id))
+        tags = data.get("tags", [])
+        connection.executemany(
+            "INSERT INTO post_tags (post_id, position, tag_id) VALUES (?, ?, ?)",
+            [(post_id, position, self._name_id("tags", tag)) for position, tag in enumerate(tags)])
+        connection.execute(
+            f"INSERT INTO posts_search (rowid, {SEARCH_COLUMNS}) VALUES (?, ?, ?, ?, ?)",
+            (post_id, data["title"].lower(), data["content"].lower(), category.lower(),
+             TAG_SEPARATOR.join(tags).lower()))
+
+    def _delete(self, post_id):
+        for table, column in (("post_tags", "post_id"), ("posts_search", "rowid"), ("posts", "id")):
+            self.connection.execute(f"DELETE FROM {table} WHERE {column} = ?", (post_id,))
+
+    def _rebuild_search(self):
+        """Fill posts_search from the stored posts and drop the old posts_fts table"""
+        connection = self.connection
+        connection.execute("DELETE FROM posts_search")
+        connection.execute(
+            f"INSERT INTO posts_search (rowid, {SEARCH_COLUMNS}) "
+            "SELECT posts.id, python_lower(posts.title), python_lower(posts.content), "
+            "python_lower(coalesce(categories.name, '')), python_lower(coalesce("
+            "(SELECT group_concat(tags.name, ?1) FROM post_tags JOIN tags ON tags.id = post_tags.tag_id "
+            "WHERE post_tags.post_id = posts.id), '')) "
+            "FROM posts LEFT JOIN categories ON categories.id = posts.category_id",
+            (TAG_SEPARATOR,))
+        connection.execute("DROP TABLE posts_fts")
+        connection.commit()
+
+    def _name_id(self, table, name):
+        self.connection.execute(f"INSERT OR IGNORE INTO {table} (name) VALUES (?)", (name,))
+        (name_id,) = self.connection.execute(
+            f"SELECT id FROM {table} WHERE name = ?", (name,)).fetchone()
+        return name_id
+
+
+class SqliteSearchIndex:
+    """Search index backed by the FTS table of an SqliteStorage
+
+    The FTS table is kept up to date by the storage itself, so the
+    add/update/remove hooks have nothing to do.
+    """
+
+    # Queued writes must reach the database before a search runs
+    reads_storage = True
+
+    def __init__(self, storage):
+        self.storage = storage
+        self.cached_query = None
+        self.cached_ids = None
+
+    def add(self, post):
+        self.cached_query = None
+
+    def update(self, post):
+        self.cached_query = None
+
+    def remove(self, post):
+        self.cached_query = None
+
+    def candidates(self, query):
+        """Return the sorted ids of the posts matching query"""
+        return sorted(self.storage.search(query))
+
+    def search(self, query, within=None):
+        """Return the ids of the posts matching query"""
+        if within is None:
+            return self.candidates(query)
+        if query != self.cached_query:
+            # One FTS query serves every chunk of a chunked search
+            self.cached_ids = set(self.storage.search(query))
+            self.cached_query = query
+        return [post_id for post_id in within if post_id in self.cached_ids]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move posts between blog_posts.json and SQLite")
+    parser.add_argument("command", choices=["import", "export"],
+                        help="import the JSON file into the database, or export it back")
+    parser.add_argument("--data-file", default="blog_posts.json")
+    args = parser.parse_args()
+
+    storage = SqliteStorage(args.data_file)
+    if args.command == "import":
+        count = storage.import_json(args.data_file)
+        print(f"Imported {count} posts into {storage.db_file}")
+    else:
+        count = storage.export_json(args.data_file)
+        print(f"Exported {count} posts to {args.data_file}")
+    storage.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+import hashlib
+import io
+import json
+import os
+from bisect import bisect_left
+
+from blog_post import BlogPost, assign_post_ids
+from search_index import PostSearchIndex
+
+# Characters read from the data file at a time when it is parsed incrementally
+READ_CHUNK_SIZE = 1 << 16
+
+
+def write_atomic(path, data):
+    """Write bytes to path through a temp file and an atomic rename"""
+    temp_path = path + ".tmp"
+    with open(temp_path, 'wb') as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+
+
+def encode_posts(posts_data):
+    """Serialize a list of post dicts the way blog_posts.json is written"""
+    return json.dumps(posts_data, indent=2).encode("utf-8")
+
+
+def iter_json_array(file, chunk_size=READ_CHUNK_SIZE):
+    """Yield the items of the JSON array in a text file as they are parsed
+
+    Only the item being parsed is held as text, so the first items are
+    available long before a large file has been read.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    expected = "["
+    while True:
+        while position < len(buffer) and buffer[position].isspace():
+            position += 1
+        if position == len(buffer):
+            buffer = file.read(chunk_size)
+            position = 0
+            if not buffer:
+                raise ValueError("The data file ends in the middle of the post list")
+            continue
+        char = buffer[position]
+        if expected == "[":
+            if char != "[":
+                raise ValueError("The data file does not hold a list of posts")
+            position += 1
+            expected = "item or ]"
+        elif char == "]" and expected != "item":
+            return
+        elif expected == ", or ]":
+            if char != ",":
+                raise ValueError(f"Unexpected {char!r} between posts in the data file")
+            position += 1
+            expected = "item"
+        else:
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+                # A number ending with the buffer, or cut off after its "." or
+                # exponent as in "1." or "1e+", may go on in the next chunk
+                rest = len(buffer) - end
+                complete = rest > 2 or (rest > 0 and not (
+                    type(item) in (int, float) and buffer[end:].strip(".eE+-") == ""))
+            except json.JSONDecodeError:
+                complete = False
+            if not complete:
+                # The item may run past the buffer; read on, at least doubling
+                # the buffer so a large item is not parsed over and over
+                chunk = file.read(max(chunk_size, len(buffer) - position))
+                if chunk:
+                    buffer = buffer[position:] + chunk
+                    position = 0
+                    continue
+                # At the end of the file, so the item is as complete as it gets
+                item, end = decoder.raw_decode(buffer, position)
+            yield item
+            position = end
+            expected = ", or ]"
+
+
+def check_loaded(storage):
+    """Refuse to change stored posts that were never loaded, as the next flush would drop them"""
+    if not storage.loaded:
+        if storage.exists():
+            raise RuntimeError("Load the stored posts before changing them")
+        # Nothing is stored yet, so there is nothing to lose
+        storage.loaded = True
+
+
+def iter_post_batches(posts, batch_size):
+    """Yield (batch of posts, fraction of posts handed out) for a loaded list"""
+    for start in range(0, len(posts), batch_size):
+        yield posts[start:start + batch_size], min(1.0, (start + batch_size) / len(posts))
+
+
+def apply_record(posts_data, ids, op, post_id, data):
+    """Apply one create/update/delete record to a list of post dicts
+
+    ids holds the id of each post dict, in ascending order.
+    """
+    position = bisect_left(ids, post_id)
+    found = position < len(ids) and ids[position] == post_id
+    if op == "create":
+        if found:
+            raise ValueError(f"Post {post_id} already exists")
+        ids.insert(position, post_id)
+        posts_data.insert(position, data)
+    elif op not in ("update", "delete"):
+        raise ValueError(f"Unknown record type: {op}")
+    elif not found:
+        raise KeyError(f"No post with id {post_id}")
+    elif op == "update":
+        posts_data[position] = data
+    else:
+        del ids[position]
+        del posts_data[position]
+
+
+class JsonStorage:
+    """Keep every post in a single JSON array that is rewritten on flush"""
+
+    def __init__(self, data_file):
+        self.data_file = data_file
+        self.posts_data = []
+        self.ids = []  # Id of each post in posts_data
+        self.dirty = False
+        self.loaded = False  # posts_data holds every stored post
+
+    def exists(self):
+        return os.path.exists(self.data_file)
+
+    def load(self):
+        """Return the stored posts"""
+        with open(self.data_file, 'rb') as file:
+            self.posts_data = json.load(file)
+        assign_post_ids(self.posts_data)
+        self.ids = [data["id"] for data in self.posts_data]
+        self.dirty = False
+        self.loaded = True
+        return [BlogPost.from_dict(data) for data in self.posts_data]
+
+    def iter_load(self, batch_size):
+        """Yield (batch of posts, fraction of the file read) while parsing the file"""
+        self.posts_data = []
+        unnumbered = []  # Posts written before posts had ids
+        batch = []
+        size = max(1, os.path.getsize(self.data_file))
+        with open(self.data_file, 'rb') as raw:
+            for data in iter_json_array(io.TextIOWrapper(raw, encoding='utf-8')):
+                self.posts_data.append(data)
+                if data.get("id") is None:
+                    unnumbered.append(data)
+                    continue
+                batch.append(BlogPost.from_dict(data))
+                if len(batch) >= batch_size:
+                    yield batch, min(1.0, raw.tell() / size)
+                    batch = []
+        # Ids are handed out once every post is known, as load() does
+        assign_post_ids(self.posts_data)
+        batch.extend(BlogPost.from_dict(data) for data in unnumbered)
+        self.ids = [data["id"] for data in self.posts_data]
+        self.dirty = False
+        self.loaded = True
+        if batch:
+            yield batch, 1.0
+
+    def replace(self, posts_data):
+        """Replace every stored post, given in id order"""
+        self.posts_data = list(posts_data)
+        self.ids = [data["id"] for data in self.posts_data]
+        self.dirty = True
+        self.loaded = True
+
+    def record(self, op, post_id, data=None):
+        """Record that a post was created, updated or deleted"""
+        check_loaded(self)
+        apply_record(self.posts_data, self.ids, op, post_id, data)
+        self.dirty = True
+
+    def flush(self):
+        """Write pending changes to disk"""
+        if self.dirty:
+            write_atomic(self.data_file, encode_posts(self.posts_data))
+            self.dirty = False
+
+    def create_search_index(self, posts):
+        """Return the index used to answer searches over posts, a mapping of id -> post"""
+        return PostSearchIndex(posts.values())
+
+    def close(self):
+        self.flush()
+
+
+class JournalStorage(JsonStorage):
+    """Append changes to a journal next to the JSON snapshot
+
+    Each create/update/delete is appended to the journal as one JSON line,
+    so a save costs the size of the change instead of the whole archive.
+    When the journal grows past half the snapshot size it is folded into
+    a new snapshot. The journal starts with the hash of the snapshot it
+    applies to, which makes a crash between writing the snapshot and
+    resetting the journal harmless: a stale journal is simply ignored.
+    """
+
+    # Never compact while the journal is smaller than this
+    MIN_COMPACT_BYTES = 1024 * 1024
+
+    def __init__(self, data_file):
+        super().__init__(data_file)
+        self.journal_file = os.path.splitext(data_file)[0] + ".journal"
+        self.journal = None
+        self.journal_bytes = 0
+        self.snapshot_bytes = 0
+
+    def exists(self):
+        return os.path.exists(self.data_file) or os.path.exists(self.journal_file)
+
+    def load(self):
+        """Return the snapshot with the journal replayed on top"""
+        snapshot = b""
+        if os.path.exists(self.data_file):
+            with open(self.data_file, 'rb') as file:
+                snapshot = file.read()
+        self.posts_data = json.loads(snapshot) if snapshot else []
+        self.snapshot_bytes = len(snapshot)
+        digest = hashlib.sha1(snapshot).hexdigest()
+        self.ids = [data.get("id") for data in self.posts_data]
+
+        replayed = self._replay(digest)
+        if replayed is None:
+            self._reset_journal(digest)
+        else:
+            if self.journal is not None:
+                self.journal.close()
+            self.journal = open(self.journal_file, 'ab')
+            self.journal_bytes = replayed
+        self.dirty = False
+        self.loaded = True
+        if assign_post_ids(self.posts_data):
+            # Data written before posts had ids gets them in list order; write
+            # them down before any record refers to them
+            self.ids = [data["id"] for data in self.posts_data]
+            self.compact()
+        return [BlogPost.from_dict(data) for data in self.posts_data]
+
+    def iter_load(self, batch_size):
+        """Yield (batch of posts, fraction handed out) once the journal is replayed"""
+        # Any journal record may change any post, so nothing can be handed
+        # out before the whole snapshot is read and the journal replayed
+        return iter_post_batches(self.load(), batch_size)
+
+    def replace(self, posts_data):
+        super().replace(posts_data)
+        # The open journal applies to the old snapshot, so the next record
+        # starts a new one from the replaced posts
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+
+    def record(self, op, post_id, data=None):
+        check_loaded(self)
+        if self.journal is None:
+            # Replaced or never stored, so start from a snapshot of what we have
+            self.compact()
+        apply_record(self.posts_data, self.ids, op, post_id, data)
+        line = json.dumps({"op": op, "id": post_id, "post": data}).encode("utf-8") + b"\n"
+        self.journal.write(line)
+        self.journal_bytes += len(line)
+
+    def flush(self):
+        if self.dirty:
+            # A full replace is cheaper to write as a new snapshot
+            self.compact()
+            return
+        if self.journal is None:
+            return
+        self.journal.flush()
+        os.fsync(self.journal.fileno())
+        if self.journal_bytes > max(self.MIN_COMPACT_BYTES, self.snapshot_bytes // 2):
+            self.compact()
+
+    def compact(self):
+        """Fold the journal into a new snapshot and start an empty journal"""
+        snapshot = encode_posts(self.posts_data)
+        write_atomic(self.data_file, snapshot)
+        self.snapshot_bytes = len(snapshot)
+        self._reset_journal(hashlib.sha1(snapshot).hexdigest())
+        self.dirty = False
+
+    def close(self):
+        self.flush()
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+
+    def _replay(self, digest):
+        """Apply the journal to posts_data, return its valid size or None if stale"""
+        if not os.path.exists(self.journal_file):
+            return None
+        size = 0
+        with open(self.journal_file, 'rb') as file:
+            for number, line in enumerate(file):
+                if not line.endswith(b"\n"):
+                    break  # Torn write at the end of the journal
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                if number == 0:
+                    if entry.get("snapshot") != digest:
+                        return None  # Already folded into the snapshot
+                else:
+                    apply_record(self.posts_data, self.ids, entry["op"], entry["id"], entry["post"])
+                size += len(line)
+        if size == 0:
+            return None
+        if size < os.path.getsize(self.journal_file):
+            # Drop the torn tail so new records start on a clean line
+            with open(self.journal_file, 'r+b') as file:
+                file.truncate(size)
+        return size
+
+    def _reset_journal(self, digest):
+        if self.journal is not None:
+            self.journal.close()
+        header = json.dumps({"snapshot": digest}).encode("utf-8") + b"\n"
+        write_atomic(self.journal_file, header)
+        self.journal = open(self.journal_file, 'ab')
+        self.journal_bytes = len(header)
+
+
+STORAGE_MODES = ("json", "journal", "sqlite", "lazy", "sharded")
+
+
+def open_storage(mode, data_file):
+    """Create the storage backend for a mode name"""
+    if mode == "json":
+        return JsonStorage(data_file)
+    if mode == "journal":
+        return JournalStorage(data_file)
+    if mode == "sqlite":
+        # Imported here because the SQLite backend builds on this module
+        from sqlite_storage import SqliteStorage
+        return SqliteStorage(data_file)
+    if mode == "lazy":
+        from lazy_storage import LazyStorage
+        return LazyStorage(data_file)
+    if mode == "sharded":
+        from sharded_storage import ShardedStorage
+        return ShardedStorage(data_file)
+    raise ValueError(f"Unknown storage mode: {mode}")
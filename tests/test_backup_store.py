@@ -0,0 +1,68 @@
+import os
+from datetime import datetime, timedelta
+
+from backup_store import BackupStore
+
+
+def post_dict(post_id, **fields):
+    data = {"id": post_id, "title": f"Post {post_id}", "content": "Body «unicode»",
+            "timestamp": "2024-01-02 03:04:05", "category": "Dev", "tags": ["a"]}
+    data.update(fields)
+    return data
+
+
+def object_count(store):
+    return sum(len(files) for _, _, files in os.walk(store.objects_dir))
+
+
+def test_snapshot_round_trip_and_listing(tmp_path):
+    store = BackupStore(str(tmp_path))
+    first = [post_dict(1), post_dict(2)]
+    second = [post_dict(1), post_dict(2, title="Edited"), post_dict(3)]
+    first_id, _ = store.snapshot(first, datetime(2024, 1, 2, 3, 4, 5))
+    second_id, _ = store.snapshot(second, datetime(2024, 1, 3, 3, 4, 5))
+    assert store.restore(first_id) == first
+    assert store.restore(second_id) == second
+    assert store.list_snapshots() == [
+        {"id": second_id, "created": "2024-01-03 03:04:05", "count": 3},
+        {"id": first_id, "created": "2024-01-02 03:04:05", "count": 2},
+    ]
+
+
+def test_snapshot_writes_only_changed_posts(tmp_path):
+    store = BackupStore(str(tmp_path))
+    assert store.snapshot([post_dict(1), post_dict(2)])[1] == 2
+    assert store.snapshot([post_dict(1), post_dict(2)])[1] == 0
+    assert store.snapshot([post_dict(1), post_dict(2, title="Edited")])[1] == 1
+    # A new store reads the known posts back from disk
+    assert BackupStore(str(tmp_path)).snapshot([post_dict(2, title="Edited")])[1] == 0
+    assert object_count(store) == 3
+
+
+def test_prune_keeps_last_and_newest_of_each_day(tmp_path):
+    store = BackupStore(str(tmp_path))
+    start = datetime(2024, 1, 1, 12)
+    ids = []
+    for day in range(5):
+        for hour in range(3):
+            created = start + timedelta(days=day, hours=hour)
+            ids.append(store.snapshot([post_dict(1, title=f"{day} {hour}")], created)[0])
+
+    assert store.prune(keep_last=4, keep_daily=3) == 15 - 5
+    newest_first = ids[::-1]
+    # The last four, plus the newest of the days before them among the last three days
+    kept = newest_first[:4] + [newest_first[6]]
+    assert [snapshot["id"] for snapshot in store.list_snapshots()] == kept
+    # Posts only the removed snapshots held are gone
+    assert object_count(store) == len(kept)
+    for snapshot_id in kept:
+        assert len(store.restore(snapshot_id)) == 1
+
+
+def test_prune_without_removals_keeps_everything(tmp_path):
+    store = BackupStore(str(tmp_path))
+    store.snapshot([post_dict(1)], datetime(2024, 1, 1))
+    store.snapshot([post_dict(2)], datetime(2024, 1, 2))
+    assert store.prune() == 0
+    assert len(store.list_snapshots()) == 2
+    assert object_count(store) == 2
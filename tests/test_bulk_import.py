@@ -0,0 +1,100 @@
+import json
+import os
+
+import pytest
+
+from bulk_import import import_posts, parse_front_matter, parse_jsonl, parse_markdown, parse_source
+from storage import open_storage
+
+
+def write(path, text):
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(text)
+    return str(path)
+
+
+def test_front_matter_values_and_lists():
+    fields = parse_front_matter(
+        "Title: \"Quoted: title\"\n"
+        "# A comment\n"
+        "tags: [one, 'two', ]\n"
+        "category: Dev\n"
+        "aliases:\n"
+        "  - first\n"
+        "  - \"second\"\n"
+        "empty:\n")
+    assert fields == {"title": "Quoted: title", "tags": ["one", "two"], "category": "Dev",
+                      "aliases": ["first", "second"]}
+    with pytest.raises(ValueError):
+        parse_front_matter("no colon here")
+
+
+def test_markdown_with_front_matter(tmp_path):
+    path = write(tmp_path / "post.md",
+                 "---\r\ntitle: Hello\r\ndate: 2024-01-02\r\ntags: a, b\r\ncategory: Dev\r\n---\r\n\r\nBody «text»\r\n")
+    assert parse_markdown(path) == {"title": "Hello", "content": "Body «text»", "timestamp": "2024-01-02 00:00:00",
+                                    "category": "Dev", "tags": ["a", "b"]}
+
+
+def test_markdown_title_falls_back_to_heading_then_file_name(tmp_path):
+    data = parse_markdown(write(tmp_path / "first.md", "---\ndate: 2024-01-02T03:04:05Z\n---\n# Heading\n\nBody\n"))
+    assert (data["title"], data["content"], data["timestamp"]) == ("Heading", "Body", "2024-01-02 03:04:05")
+    data = parse_markdown(write(tmp_path / "second-post.md", "Just a body\n"))
+    assert (data["title"], data["content"], data["category"], data["tags"]) == ("second-post", "Just a body", "", [])
+
+
+def test_jsonl_line():
+    line = json.dumps({"title": 7, "content": "Body", "timestamp": "2024-01-02 03:04:05",
+                       "category": None, "tags": "x, y,", "extra": True})
+    assert parse_jsonl(line) == {"title": "7", "content": "Body", "timestamp": "2024-01-02 03:04:05",
+                                 "category": "", "tags": ["x", "y"]}
+    with pytest.raises(ValueError):
+        parse_jsonl("[1, 2]")
+
+
+@pytest.mark.parametrize("line", ['{"title": "No content"}', '{"title": " ", "content": "Body"}', "{not json",
+                                  '"a string"'])
+def test_bad_sources_become_errors(line):
+    data, error = parse_source(("jsonl", line, "posts.jsonl:3"))
+    assert data is None
+    assert error.startswith("posts.jsonl:3: ")
+
+
+def import_into(tmp_path, path, batch_size):
+    storage = open_storage("json", str(tmp_path / "blog_posts.json"))
+    storage.replace([{"id": 1, "title": "Existing", "content": "Body", "timestamp": "2024-01-01 00:00:00",
+                      "category": "", "tags": []}])
+    next_id = [2]
+
+    def allocate_ids(count):
+        first = next_id[0]
+        next_id[0] += count
+        return first
+    result = import_posts(storage, path, allocate_ids, workers=1, batch_size=batch_size)
+    storage.close()
+    return result, [post.to_dict() for post in open_storage("json", storage.data_file).load()]
+
+
+def test_import_jsonl_file(tmp_path):
+    lines = [json.dumps({"title": f"Post {i}", "content": f"Body {i}", "timestamp": "2024-01-02 03:04:05"})
+             for i in range(5)]
+    lines[2] = '{"title": "broken"'
+    path = write(tmp_path / "posts.jsonl", "\n".join(lines[:3]) + "\n\n" + "\n".join(lines[3:]) + "\n")
+    result, posts = import_into(tmp_path, path, batch_size=2)
+    assert (result["imported"], result["skipped"]) == (4, 1)
+    assert result["errors"][0].startswith(f"{path}:3: ")
+    assert [(post["id"], post["title"]) for post in posts] == [
+        (1, "Existing"), (2, "Post 0"), (3, "Post 1"), (4, "Post 3"), (5, "Post 4")]
+
+
+def test_import_markdown_directory(tmp_path):
+    folder = tmp_path / "posts"
+    os.makedirs(folder / "sub")
+    write(folder / "b.md", "# B\nBody b")
+    write(folder / "a.markdown", "# A\nBody a")
+    write(folder / "sub" / "c.MD", "# C\nBody c")
+    write(folder / "notes.txt", "Not a post")
+    write(folder / "empty.md", "")
+    result, posts = import_into(tmp_path, str(folder), batch_size=10)
+    assert (result["imported"], result["skipped"]) == (3, 1)
+    assert [post["title"] for post in posts] == ["Existing", "A", "B", "C"]
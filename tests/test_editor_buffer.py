@@ -0,0 +1,61 @@
+from editor_buffer import EditorBuffer
+
+
+def test_unedited_text_is_the_loaded_text():
+    buffer = EditorBuffer("one\ntwo")
+    assert buffer.text() == "one\ntwo"
+    assert not buffer.modified
+
+
+def test_edit_marks_text_modified():
+    buffer = EditorBuffer("one\ntwo\nthree")
+    buffer.replace_lines(1, 2, ["TWO", "more"])
+    assert buffer.text() == "one\nTWO\nmore\nthree"
+    assert buffer.modified
+
+
+def test_edit_typed_back_is_not_modified():
+    buffer = EditorBuffer("one\ntwo\nthree")
+    buffer.replace_lines(1, 2, ["tw"])
+    buffer.replace_lines(1, 2, ["two"])
+    assert buffer.text() == "one\ntwo\nthree"
+    assert not buffer.modified
+
+
+def test_inserted_and_deleted_lines_typed_back_are_not_modified():
+    buffer = EditorBuffer("a\nb\nc\nd")
+    buffer.replace_lines(0, 1, ["a", "new"])
+    buffer.replace_lines(4, 5, ["D"])
+    assert buffer.modified
+    buffer.replace_lines(1, 2, [])
+    buffer.replace_lines(3, 4, ["d"])
+    assert buffer.text() == "a\nb\nc\nd"
+    assert not buffer.modified
+
+
+def test_runs_that_line_up_again_are_not_modified():
+    buffer = EditorBuffer("a\nb\nb\na")
+    buffer.replace_lines(0, 1, ["a", "b"])
+    buffer.replace_lines(3, 5, ["a"])
+    assert buffer.text() == "a\nb\nb\na"
+    assert not buffer.modified
+
+
+def test_reset_compares_whole_text():
+    buffer = EditorBuffer("one\ntwo")
+    buffer.reset("one\ntwo")
+    assert not buffer.modified
+    buffer.reset("one")
+    assert buffer.modified
+    assert buffer.text() == "one"
+
+
+def test_edits_while_filling_are_ignored():
+    buffer = EditorBuffer()
+    buffer.load("one\ntwo", filling=True)
+    buffer.replace_lines(0, 1, ["one\ntwo"])
+    assert buffer.text() == "one\ntwo"
+    buffer.fill_done()
+    buffer.replace_lines(1, 2, ["three"])
+    assert buffer.text() == "one\nthree"
+    assert buffer.modified
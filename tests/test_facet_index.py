@@ -0,0 +1,61 @@
+import random
+
+from blog_post import BlogPost
+from facet_index import FacetIndex
+
+CATEGORIES = ["", "Dev", "dev", "Café"]
+TAGS = ["python", "tk", "Python", "perf"]
+
+
+def make_post(rng, post_id):
+    return BlogPost(f"Post {post_id}", "", "2024-01-02 03:04:05", rng.choice(CATEGORIES),
+                    rng.sample(TAGS, rng.randrange(3)), post_id)
+
+
+def scan(posts, category=None, tags=()):
+    return [post.post_id for post in posts
+            if (not category or post.category == category) and all(tag in post.tags for tag in tags)]
+
+
+def counts(posts):
+    categories, tags = {}, {}
+    for post in posts:
+        if post.category:
+            categories[post.category] = categories.get(post.category, 0) + 1
+        for tag in set(post.tags):
+            tags[tag] = tags.get(tag, 0) + 1
+    return sorted(categories.items()), sorted(tags.items())
+
+
+def test_counts_and_filters_follow_edits():
+    rng = random.Random(1)
+    posts = {post_id: make_post(rng, post_id) for post_id in range(1, 80)}
+    index = FacetIndex(posts.values())
+    for post in list(posts.values())[::3]:
+        # Edited in place, so the index must remember the old facets
+        post.category = rng.choice(CATEGORIES)
+        post.tags = rng.sample(TAGS, rng.randrange(3))
+        index.update(post)
+    for post_id in list(posts)[1::4]:
+        index.remove(posts.pop(post_id))
+
+    remaining = sorted(posts.values(), key=lambda post: post.post_id)
+    assert (index.category_counts(), index.tag_counts()) == counts(remaining)
+    for category in CATEGORIES + ["Missing"]:
+        for tags in [(), ("python",), ("python", "tk"), ("perf", "Python", "tk"), ("missing",)]:
+            if not category and not tags:
+                assert index.filter(category, tags) is None
+            else:
+                assert index.filter(category, tags) == scan(remaining, category, tags), (category, tags)
+
+
+def test_facets_without_posts_are_dropped():
+    post = BlogPost("a", "", "2024-01-02 03:04:05", "Dev", ["python", "python"], 1)
+    index = FacetIndex([post])
+    assert index.tag_counts() == [("python", 1)]
+    index.remove(post)
+    assert index.category_counts() == []
+    assert index.tag_counts() == []
+    # Removing it again changes nothing
+    index.remove(post)
+    assert index.filter("Dev") == []
@@ -0,0 +1,107 @@
+import random
+
+import pytest
+
+from blog_post import BlogPost
+from search_index import WORD_RE, FuzzyTermIndex, edit_distance, typo_limit
+
+WORDS = ["python", "pyhton", "pythonic", "tkinter", "search", "serach", "index", "indexes", "café",
+         "cafe", "blog", "bog", "log", "post", "posts", "ab", "a"]
+
+
+def levenshtein(a, b):
+    previous = list(range(len(b) + 1))
+    for i, char in enumerate(a, 1):
+        current = [i]
+        for j, other in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char != other)))
+        previous = current
+    return previous[-1]
+
+
+def make_posts(count, seed=1):
+    rng = random.Random(seed)
+    return [BlogPost(" ".join(rng.choice(WORDS) for _ in range(rng.randrange(1, 4))).title(), "ignored body",
+                     "2024-01-02 03:04:05", "", [rng.choice(WORDS) for _ in range(rng.randrange(3))], post_id)
+            for post_id in range(1, count + 1)]
+
+
+def post_words(post):
+    words = set(WORD_RE.findall(post.title.lower()))
+    for tag in post.tags:
+        words.update(WORD_RE.findall(tag.lower()))
+    return words
+
+
+def expected(posts, query):
+    """Match every query word by edit distance, and the last one also as a prefix"""
+    words = WORD_RE.findall(query.lower())
+    result = []
+    for post in posts:
+        indexed = post_words(post)
+        if words and all(any(levenshtein(word, other) <= typo_limit(word)
+                             or (position == len(words) - 1 and other.startswith(word))
+                             for other in indexed)
+                         for position, word in enumerate(words)):
+            result.append(post.post_id)
+    return result
+
+
+@pytest.mark.parametrize("limit", [0, 1, 2, 3])
+def test_edit_distance_is_bounded(limit):
+    for a in WORDS:
+        for b in WORDS:
+            distance = levenshtein(a, b)
+            assert edit_distance(a, b, limit) == (distance if distance <= limit else limit + 1), (a, b)
+
+
+def test_similar_words_match_scan():
+    posts = make_posts(100)
+    index = FuzzyTermIndex(posts)
+    indexed = set().union(*map(post_words, posts))
+    for word in WORDS + ["pythn", "xyz", "serch", "indx", "caffe"]:
+        for limit in (None, 1, 2):
+            tolerated = typo_limit(word) if limit is None else limit
+            assert index.similar_words(word, limit) == {
+                other: levenshtein(word, other) for other in indexed
+                if levenshtein(word, other) <= tolerated}, (word, limit)
+
+
+def test_search_matches_scan():
+    posts = make_posts(150, seed=2)
+    index = FuzzyTermIndex(posts)
+    for query in ["pyton", "Serch inde", "cafe", "bl", "post pyth", "ab", "a", "xyz", "", "body"]:
+        assert index.search(query) == expected(posts, query), query
+    within = {post.post_id for post in posts[::2]}
+    assert index.search("pyton", within) == [post_id for post_id in expected(posts, "pyton") if post_id in within]
+
+
+def test_search_follows_updates_and_removals():
+    posts = make_posts(80, seed=3)
+    index = FuzzyTermIndex(posts)
+    for post in posts[::3]:
+        post.title = "Rewritten"
+        post.tags = ["fresh"]
+        index.update(post)
+    for post in posts[1::5]:
+        index.remove(post)
+    remaining = [post for post in posts if post not in posts[1::5]]
+    assert len(index) == len(remaining)
+    for query in ["rewriten", "frsh", "python", "pos", "tkintr"]:
+        assert index.search(query) == expected(remaining, query), query
+    assert index.completions("rew") == ["rewritten"]
+
+
+def test_completions_and_suggestions_prefer_widely_used_words():
+    posts = [BlogPost("Python tips", "", "2024-01-02 03:04:05", "", ["pythonic"], 1),
+             BlogPost("Python again", "", "2024-01-02 03:04:05", "", [], 2),
+             BlogPost("Pylint", "", "2024-01-02 03:04:05", "", ["python"], 3),
+             BlogPost("Typhon", "", "2024-01-02 03:04:05", "", [], 4)]
+    index = FuzzyTermIndex(posts)
+    assert index.completions("py") == ["python", "pylint", "pythonic"]
+    assert index.completions("py", 1) == ["python"]
+    assert index.completions("zz") == []
+    assert index.suggest("python") == "python"
+    assert index.suggest("pythn") == "python"
+    assert index.suggest("pyhton") == "python"
+    assert index.suggest("qqqqqq") is None
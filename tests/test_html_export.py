@@ -0,0 +1,52 @@
+from html_export import RenderCache, render_markup, render_post_html
+
+
+def test_html_is_escaped():
+    assert render_markup('<script>alert("x") & \'y\'</script>') == \
+        "<p>&lt;script&gt;alert(&quot;x&quot;) &amp; &#x27;y&#x27;&lt;/script&gt;</p>"
+
+
+def test_markers_render_around_escaped_text():
+    assert render_markup("**<b>** and *a&b* and __u__") == \
+        "<p><strong>&lt;b&gt;</strong> and <em>a&amp;b</em> and <u>u</u></p>"
+
+
+def test_markers_nest():
+    assert render_markup("**bold *both* bold**") == "<p><strong>bold <em>both</em> bold</strong></p>"
+
+
+def test_open_markers_stay_text():
+    assert render_markup("2 * 3 = 6 and **open") == "<p>2 * 3 = 6 and **open</p>"
+    # The inner span is closed, the marker opened before it is not
+    assert render_markup("**a *b* c") == "<p>**a <em>b</em> c</p>"
+
+
+def test_spans_never_cross_lines_or_paragraphs():
+    assert render_markup("*a\nb*") == "<p>*a\nb*</p>"
+    assert render_markup("first\n\n\n\n**second**") == "<p>first</p>\n\n<p><strong>second</strong></p>"
+
+
+def test_marker_lookalikes_from_escaping():
+    # Escaping never produces a marker, so entities are not split
+    assert render_markup("*&quot;*") == "<p><em>&amp;quot;</em></p>"
+
+
+def test_post_fields_are_escaped():
+    html = render_post_html({"title": "<T>", "content": "<c>", "timestamp": "2024-01-02 03:04:05",
+                             "category": "a&b", "tags": ['"q"']}, " & more")
+    assert "<title>&lt;T&gt; &amp; more</title>" in html
+    assert "<h1>&lt;T&gt;</h1>" in html
+    assert "<p>&lt;c&gt;</p>" in html
+    assert "Category: a&amp;b" in html
+    assert '<span class="tag">&quot;q&quot;</span>' in html
+    assert "<c>" not in html and "<T>" not in html
+
+
+def test_cache_returns_same_rendering_and_stays_bounded():
+    cache = RenderCache(size=2)
+    assert cache.render("*a*") == render_markup("*a*")
+    cache.render("b")
+    cache.render("*a*")
+    cache.render("c")
+    assert len(cache.entries) == 2
+    assert cache.render("*a*") == "<p><em>a</em></p>"
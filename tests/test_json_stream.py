@@ -0,0 +1,47 @@
+import io
+import json
+
+import pytest
+
+from storage import iter_json_array
+
+TEXTS = [
+    "[]",
+    " \n[ ] ",
+    "[1]",
+    "[12345, 678, -9.5e3]",
+    '[ "a,b]", "esc \\" ] \\u00e9", {"x": [1, {"y": "}"}]}, [] , null, true ]',
+    '[{"id": 1, "title": "Post", "tags": ["a", "b"], "content": "' + "long " * 200 + '"}, 2]',
+    "[\n  {\n    \"id\": 10\n  },\n  {\n    \"id\": 20\n  }\n]\n",
+]
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_items_match_json_loads_for_every_chunk_size(text):
+    expected = json.loads(text)
+    for chunk_size in list(range(1, 40)) + [len(text) - 1, len(text), 1 << 16]:
+        items = list(iter_json_array(io.StringIO(text), chunk_size))
+        assert items == expected, chunk_size
+
+
+def test_number_split_across_chunks_is_read_whole():
+    # With 3 characters a chunk, "[12" ends the first one in mid-number
+    assert list(iter_json_array(io.StringIO("[1234,5]"), 3)) == [1234, 5]
+    # Chunks ending in "-9." and "-9.5e+" hold a valid number followed by a cut off part
+    for chunk_size in range(1, 10):
+        assert list(iter_json_array(io.StringIO("[-9.5e+3,7]"), chunk_size)) == [-9500.0, 7], chunk_size
+
+
+def test_items_come_before_the_file_is_read():
+    text = "[" + ", ".join(str(number) for number in range(1000)) + "]"
+    file = io.StringIO(text)
+    items = iter_json_array(file, 16)
+    assert next(items) == 0
+    assert file.tell() < 100
+
+
+@pytest.mark.parametrize("text", ["", "  ", "{}", "[1 2]", "[1,", "[1", '["open'])
+def test_malformed_data_raises(text):
+    for chunk_size in (1, 2, 5, 1 << 16):
+        with pytest.raises(ValueError):
+            list(iter_json_array(io.StringIO(text), chunk_size))
@@ -0,0 +1,63 @@
+import tkinter as tk
+
+from blog_post import BlogPost
+from post_list_view import PostListView
+
+
+class FakeListbox:
+    """Stands in for a Listbox, keeping the idle callbacks for the test to run"""
+
+    def __init__(self):
+        self.items = []
+        self.idle = []
+
+    def config(self, **options):
+        pass
+
+    def insert(self, index, *labels):
+        if index == tk.END:
+            index = len(self.items)
+        self.items[index:index] = labels
+
+    def delete(self, first, last=None):
+        if last == tk.END:
+            last = len(self.items) - 1
+        del self.items[first:(first if last is None else last) + 1]
+
+    def after_idle(self, callback, *args):
+        self.idle.append((callback, args))
+        return f"after#{len(self.idle)}"
+
+    def run_idle(self):
+        idle, self.idle = self.idle, []
+        for callback, args in idle:
+            callback(*args)
+
+
+def make_posts(count):
+    return [BlogPost(f"Post {i}", "", "2024-01-02 03:04:05", "", [], i) for i in range(count)]
+
+
+def test_scrolling_queues_one_page_at_a_time():
+    listbox = FakeListbox()
+    view = PostListView(listbox, page_size=10)
+    view.set_items(make_posts(35))
+    assert len(listbox.items) == 10
+    for _ in range(5):
+        view.on_scroll("0.5", "1.0")
+    assert len(listbox.idle) == 1
+    listbox.run_idle()
+    assert len(listbox.items) == 20
+
+    view.on_scroll("0.5", "1.0")
+    view.on_scroll("0.5", "1.0")
+    listbox.run_idle()
+    assert len(listbox.items) == 30
+
+
+def test_scrolling_above_the_end_renders_nothing():
+    listbox = FakeListbox()
+    view = PostListView(listbox, page_size=10)
+    view.set_items(make_posts(35))
+    view.on_scroll("0.0", "0.5")
+    assert listbox.idle == []
@@ -0,0 +1,41 @@
+import threading
+
+import preview_server
+from preview_server import PreviewServer
+
+
+def test_page_is_claimed_once():
+    server = PreviewServer()
+    assert server.claim_open("1")
+    assert not server.claim_open("1")
+    assert server.claim_open("2")
+
+
+def test_claims_race_for_one_tab():
+    server = PreviewServer()
+    barrier = threading.Barrier(8)
+    claimed = []
+
+    def claim():
+        barrier.wait()
+        claimed.append(server.claim_open("1"))
+    threads = [threading.Thread(target=claim) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert claimed.count(True) == 1
+
+
+def test_waiting_page_is_not_opened_again(monkeypatch):
+    monkeypatch.setattr(preview_server, "OPEN_GRACE", 0)
+    server = PreviewServer()
+    server.pages["1"] = ("old", b"")
+    waiting = threading.Thread(target=server.wait_for_change, args=("1", "old", 5))
+    waiting.start()
+    while not server.watchers.get("1"):
+        waiting.join(0.01)
+    assert not server.claim_open("1")
+    server.unpublish("1")
+    waiting.join()
+    assert server.claim_open("1")
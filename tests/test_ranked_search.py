@@ -0,0 +1,95 @@
+import math
+import random
+
+from blog_post import BlogPost
+from search_index import BM25_B, BM25_K1, FIELD_BOOSTS, WORD_RE, RankedSearchIndex
+
+WORDS = ["python", "tkinter", "search", "index", "café", "blog", "post", "rank", "bm25", "Python"]
+QUERIES = ["python", "PYTHON search", "café blog", "rank rank", "bm25 tkinter post", "no such", ""]
+
+
+def make_posts(count, seed=1):
+    rng = random.Random(seed)
+
+    def words(n):
+        return " ".join(rng.choice(WORDS) for _ in range(n))
+    return [BlogPost(words(rng.randrange(1, 4)), words(rng.randrange(0, 30)), "2024-01-02 03:04:05",
+                     rng.choice(["", "Dev", "Python"]), [rng.choice(WORDS) for _ in range(rng.randrange(3))],
+                     post_id) for post_id in range(1, count + 1)]
+
+
+def field_words(post, field):
+    text = " ".join(post.tags) if field == "tags" else getattr(post, field)
+    return WORD_RE.findall(text.lower())
+
+
+def scores(posts, query):
+    """Score every matching post with BM25 straight from the definition"""
+    lengths = {post.post_id: sum(boost * len(field_words(post, field)) for field, boost in FIELD_BOOSTS.items())
+               for post in posts}
+    average = sum(lengths.values()) / len(posts) or 1.0
+    result = {}
+    for word in set(WORD_RE.findall(query.lower())):
+        frequencies = {}
+        for post in posts:
+            frequency = sum(boost * field_words(post, field).count(word) for field, boost in FIELD_BOOSTS.items())
+            if frequency:
+                frequencies[post.post_id] = frequency
+        idf = math.log(1 + (len(posts) - len(frequencies) + 0.5) / (len(frequencies) + 0.5))
+        for post_id, frequency in frequencies.items():
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[post_id] / average)
+            result[post_id] = result.get(post_id, 0.0) + idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+    return result
+
+
+def assert_ranked(index, posts, query, limit=10, within=None):
+    expected = scores(posts, query)
+    if within is not None:
+        expected = {post_id: score for post_id, score in expected.items() if post_id in within}
+    best, count = index.search(query, limit, within)
+    assert count == len(expected), query
+    assert all(expected[a] >= expected[b] - 1e-9 for a, b in zip(best, best[1:])), query
+    # The best ones, up to ties at the cut
+    if best:
+        cut = expected[best[-1]]
+        assert all(score <= cut + 1e-9 for post_id, score in expected.items() if post_id not in best), query
+
+
+def test_ranking_matches_bm25():
+    posts = make_posts(200)
+    index = RankedSearchIndex(posts)
+    for query in QUERIES:
+        assert_ranked(index, posts, query)
+        assert_ranked(index, posts, query, within={post.post_id for post in posts[::2]})
+
+
+def test_ranking_follows_updates_and_removals():
+    posts = make_posts(100, seed=2)
+    index = RankedSearchIndex(posts)
+    for post in posts[::3]:
+        post.title = "rewritten search"
+        post.tags = ["rank"]
+        index.update(post)
+    for post in posts[1::5]:
+        index.remove(post)
+    remaining = [post for post in posts if post not in posts[1::5]]
+    assert len(index) == len(remaining)
+    for query in QUERIES + ["rewritten"]:
+        assert_ranked(index, remaining, query)
+
+
+def test_title_counts_more_than_content():
+    posts = [BlogPost("Other", "python here", "2024-01-02 03:04:05", "", [], 1),
+             BlogPost("Python", "words here", "2024-01-02 03:04:05", "", [], 2),
+             BlogPost("Other", "words here", "2024-01-02 03:04:05", "", ["python"], 3),
+             BlogPost("Other", "nothing", "2024-01-02 03:04:05", "", [], 4)]
+    best, count = RankedSearchIndex(posts).search("python")
+    assert best == [2, 3, 1]
+    assert count == 3
+
+
+def test_ties_go_to_newer_post_and_limit_applies():
+    posts = [BlogPost("Same", "", "2024-01-02 03:04:05", "", [], post_id) for post_id in range(1, 6)]
+    index = RankedSearchIndex(posts)
+    assert index.search("same", limit=3) == ([5, 4, 3], 5)
+    assert RankedSearchIndex().search("same") == ([], 0)
@@ -0,0 +1,65 @@
+import random
+
+from blog_post import BlogPost
+from search_index import PostSearchIndex
+
+WORDS = ["python", "Pythonic", "tkinter", "search", "index", "café", "naïve", "STRASSE", "straße",
+         "blog", "post", "x", "a1", "rust-lang", "C++", "e-mail"]
+QUERIES = ["", "p", "py", "pyt", "python", "PYTHON", "thon", "ic t", "café", "CAFÉ", "aïv", "strasse",
+           "straße", "c++", "-lang", "e-mail", "mail", "x", "a1 ", " ", "blog post", "no such word",
+           "rch ind", "\x00"]
+
+
+def make_posts(count, seed=1):
+    rng = random.Random(seed)
+    posts = []
+    for post_id in range(1, count + 1):
+        def words(n):
+            return " ".join(rng.choice(WORDS) for _ in range(n))
+        tags = [rng.choice(WORDS) for _ in range(rng.randrange(3))]
+        posts.append(BlogPost(words(3), words(rng.randrange(1, 20)), "2024-01-02 03:04:05",
+                              rng.choice(["", "Dev", "Café"]), tags, post_id))
+    return posts
+
+
+def expected(posts, query):
+    return [post.post_id for post in posts if post.matches_search(query)]
+
+
+def test_search_matches_scan():
+    posts = make_posts(300)
+    index = PostSearchIndex(posts)
+    for query in QUERIES:
+        assert index.search(query) == expected(posts, query), query
+
+
+def test_match_never_spans_two_fields():
+    post = BlogPost("alpha", "beta", "2024-01-02 03:04:05", "gamma", ["delta"], 1)
+    index = PostSearchIndex([post])
+    assert index.search("alpha") == [1]
+    assert index.search("alphabeta") == [] == expected([post], "alphabeta")
+    assert index.search("gammadelta") == [] == expected([post], "gammadelta")
+    assert index.search("a\x00b") == [] == expected([post], "a\x00b")
+
+
+def test_search_follows_updates_and_removals():
+    posts = make_posts(100, seed=2)
+    index = PostSearchIndex(posts)
+    for post in posts[::3]:
+        post.content = "rewritten with tkinter"
+        post.tags = ["fresh"]
+        index.update(post)
+    for post in posts[1::5]:
+        index.remove(post)
+    remaining = [post for post in posts if post not in posts[1::5]]
+    for query in QUERIES + ["rewritten", "fresh", "kinter w"]:
+        assert index.search(query) == expected(remaining, query), query
+
+
+def test_search_within_keeps_order_and_drops_removed():
+    posts = make_posts(50, seed=3)
+    index = PostSearchIndex(posts)
+    within = [post.post_id for post in reversed(posts)]
+    index.remove(posts[-1])
+    result = index.search("py", within)
+    assert result == [post_id for post_id in within[1:] if posts[post_id - 1].matches_search("py")]
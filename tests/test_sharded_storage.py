@@ -0,0 +1,121 @@
+import json
+import os
+
+import pytest
+
+from sharded_storage import UNDATED_SHARD, ShardedStorage
+
+
+def post_dict(post_id, month, title=None):
+    return {"id": post_id, "title": title or f"Post {post_id}", "content": f"Body {post_id}",
+            "timestamp": f"{month}-02 03:04:05", "category": "", "tags": []}
+
+
+def read_manifest(storage):
+    with open(storage.manifest_file, encoding="utf-8") as file:
+        return json.load(file)
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = ShardedStorage(str(tmp_path / "blog_posts.json"))
+    storage.replace([post_dict(1, "2024-01"), post_dict(2, "2024-01"), post_dict(3, "2024-02"),
+                     post_dict(4, "2024-03"), {**post_dict(5, "2024-03"), "timestamp": "someday"}])
+    storage.flush()
+    return storage
+
+
+def test_manifest_lists_each_month(storage):
+    shards = read_manifest(storage)["shards"]
+    assert sorted(shards) == ["2024-01", "2024-02", "2024-03", UNDATED_SHARD]
+    assert shards["2024-01"] == {"file": "2024-01.1.json", "count": 2, "first_id": 1, "last_id": 2}
+    assert sorted(os.listdir(storage.shard_dir)) == sorted(info["file"] for info in shards.values())
+
+
+def test_flush_rewrites_only_changed_shards(storage):
+    before = read_manifest(storage)["shards"]
+    # An edit moves post 1 from its old month to the current one
+    storage.record("update", 1, post_dict(1, "2024-03", "Edited"))
+    storage.flush()
+    manifest = read_manifest(storage)
+    shards = manifest["shards"]
+    assert manifest["generation"] == 2
+    assert shards["2024-02"] == before["2024-02"]
+    assert shards[UNDATED_SHARD] == before[UNDATED_SHARD]
+    assert shards["2024-01"]["file"] == "2024-01.2.json" and shards["2024-01"]["count"] == 1
+    assert shards["2024-03"] == {"file": "2024-03.2.json", "count": 2, "first_id": 1, "last_id": 4}
+    # Files of the old generation are gone once the manifest no longer names them
+    assert sorted(os.listdir(storage.shard_dir)) == sorted(info["file"] for info in shards.values())
+
+
+def test_emptied_shard_is_dropped(storage):
+    storage.record("delete", 3)
+    storage.flush()
+    assert "2024-02" not in read_manifest(storage)["shards"]
+    assert [post.post_id for post in ShardedStorage(storage.data_file).load()] == [1, 2, 4, 5]
+
+
+def test_flush_without_changes_writes_nothing(storage):
+    storage.flush()
+    assert read_manifest(storage)["generation"] == 1
+
+
+def test_crash_before_manifest_keeps_old_shards(storage):
+    storage.record("create", 6, post_dict(6, "2024-02"))
+    # Crash: the new shard file is written but the manifest still names the old one
+    stray = os.path.join(storage.shard_dir, "2024-02.2.json")
+    with open(stray, "w", encoding="utf-8") as file:
+        json.dump([post_dict(3, "2024-02"), post_dict(6, "2024-02")], file)
+
+    reopened = ShardedStorage(storage.data_file)
+    assert [post.post_id for post in reopened.load()] == [1, 2, 3, 4, 5]
+    reopened.record("delete", 4)
+    reopened.flush()
+    assert not os.path.exists(stray)
+    assert [post.post_id for post in ShardedStorage(storage.data_file).load()] == [1, 2, 3, 5]
+
+
+def test_iter_load_hands_out_posts_in_id_order(storage):
+    # Post 1 now lives in the same shard as post 4, so shard id ranges overlap
+    storage.record("update", 1, post_dict(1, "2024-03", "Edited"))
+    storage.record("create", 6, post_dict(6, "2024-01"))
+    storage.flush()
+    reopened = ShardedStorage(storage.data_file)
+    batches = list(reopened.iter_load(2))
+    assert [post.post_id for batch, _ in batches for post in batch] == [1, 2, 3, 4, 5, 6]
+    assert batches[-1][1] == 1.0
+    reopened.record("delete", 2)
+    reopened.flush()
+    assert [post.post_id for post in ShardedStorage(storage.data_file).load()] == [1, 3, 4, 5, 6]
+
+
+def test_load_months_reads_only_those_months(storage):
+    reopened = ShardedStorage(storage.data_file)
+    assert [post.post_id for post in reopened.load_months("2024-02", "2024-03")] == [3, 4]
+    assert [post.post_id for post in reopened.load_months(last="2024-01")] == [1, 2]
+    assert [post.post_id for post in reopened.load_months()] == [1, 2, 3, 4]
+
+
+def test_load_months_leaves_storage_read_only(storage):
+    reopened = ShardedStorage(storage.data_file)
+    reopened.load_months("2024-02", "2024-02")
+    with pytest.raises(RuntimeError):
+        reopened.record("create", 6, post_dict(6, "2024-02"))
+    reopened.flush()
+    assert [post.post_id for post in ShardedStorage(storage.data_file).load()] == [1, 2, 3, 4, 5]
+    # A full load makes it writable again
+    reopened.load()
+    reopened.record("create", 6, post_dict(6, "2024-02"))
+    reopened.flush()
+    assert [post.post_id for post in ShardedStorage(storage.data_file).load()] == [1, 2, 3, 4, 5, 6]
+
+
+def test_first_use_splits_json_data_file(tmp_path):
+    data_file = tmp_path / "blog_posts.json"
+    posts_data = [post_dict(None, "2023-12"), post_dict(None, "2024-01")]
+    for data in posts_data:
+        del data["id"]
+    data_file.write_text(json.dumps(posts_data), encoding="utf-8")
+    storage = ShardedStorage(str(data_file))
+    assert [(post.post_id, post.timestamp[:7]) for post in storage.load()] == [(1, "2023-12"), (2, "2024-01")]
+    assert sorted(read_manifest(storage)["shards"]) == ["2023-12", "2024-01"]
@@ -0,0 +1,67 @@
+import random
+
+import pytest
+
+from blog_post import BlogPost
+from sorted_index import SORT_KEYS, CreationOrder, SortedPostIndex
+
+TITLES = ["alpha", "Alpha", "beta", "Émile", "zeta", "ß"]
+TIMESTAMPS = ["2024-01-02 03:04:05", "2023-12-31 23:59:59", "2024-01-02 03:04:05", "yesterday", ""]
+
+
+def make_post(rng, post_id):
+    return BlogPost(rng.choice(TITLES), "", rng.choice(TIMESTAMPS), rng.choice(["", "Dev", "dev", "Café"]),
+                    [], post_id)
+
+
+@pytest.mark.parametrize("order", sorted(SORT_KEYS))
+def test_index_follows_adds_updates_and_removals(order):
+    rng = random.Random(order)
+    key = SORT_KEYS[order]
+    posts = {post_id: make_post(rng, post_id) for post_id in range(1, 60)}
+    index = SortedPostIndex(key, posts.values())
+    next_id = len(posts) + 1
+    for _ in range(200):
+        action = rng.random()
+        if action < 0.3:
+            post = make_post(rng, next_id)
+            next_id += 1
+            posts[post.post_id] = post
+            index.add(post)
+        elif action < 0.7 and posts:
+            post = rng.choice(list(posts.values()))
+            post.title = rng.choice(TITLES)
+            post.category = rng.choice(["", "Dev", "Web"])
+            index.update(post)
+        elif posts:
+            post = posts.pop(rng.choice(list(posts)))
+            index.remove(post)
+        assert index.ids() == [post.post_id for post in sorted(posts.values(), key=key)]
+
+    some = rng.sample(list(posts), 10)
+    assert index.order(some) == [post.post_id for post in sorted((posts[i] for i in some), key=key)]
+    assert index.keys_of(some) == [key(posts[i]) for i in some]
+
+
+def test_odd_timestamps_sort_last_and_ties_by_id():
+    posts = [BlogPost("a", "", timestamp, "", [], post_id) for post_id, timestamp in
+             enumerate(["not a date", "2024-01-02 03:04:05", "2023-01-02 03:04:05", "2024-01-02 03:04:05"], 1)]
+    assert SortedPostIndex(SORT_KEYS["newest"], posts).ids() == [4, 2, 3, 1]
+    assert SortedPostIndex(SORT_KEYS["oldest"], posts).ids() == [3, 2, 4, 1]
+
+
+def test_removing_unknown_post_is_ignored():
+    post = BlogPost("a", "", "2024-01-02 03:04:05", "", [], 1)
+    index = SortedPostIndex(SORT_KEYS["title"])
+    index.remove(post)
+    index.add(post)
+    index.remove(post)
+    index.remove(post)
+    assert index.ids() == []
+
+
+def test_creation_order_is_id_order():
+    posts = {post_id: BlogPost("a", "", "", "", [], post_id) for post_id in (1, 2, 5)}
+    order = CreationOrder(posts)
+    assert order.ids() == [1, 2, 5]
+    assert order.order({5, 1}) == [1, 5]
@@ -0,0 +1,50 @@
+import sqlite3
+
+import pytest
+
+from blog_post import BlogPost
+from sqlite_storage import SqliteStorage
+
+# Letters str.lower and the trigram tokenizer's case folding disagree on
+TITLES = ["AAΣ", "xAAΣ y", "ẞẞΣ", "Hello İstanbul", "Ꭰ Cherokee", "ſtraße", "Kelvin", "plain"]
+QUERIES = ["aaσ", "aaς", "AAΣ", "ẞẞΣ", "ßßς", "ßßσ", "i̇stan", "istan", "İSTAN", "ꭰ c", "Ꭰ C",
+           "ſtr", "str", "kel", "kelvin", "AIN", "pl", "a", "Σ", ""]
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = SqliteStorage(str(tmp_path / "blog_posts.json"))
+    yield storage
+    storage.close()
+
+
+def posts_data():
+    return [{"id": post_id, "title": title, "content": f"Body {post_id}", "timestamp": "2024-01-02 03:04:05",
+             "category": "Café" if post_id % 2 else "", "tags": ["ΣΑΣ", "Tag"] if post_id % 3 else []}
+            for post_id, title in enumerate(TITLES, 1)]
+
+
+def expected(query):
+    return [data["id"] for data in posts_data() if BlogPost.from_dict(data).matches_search(query)]
+
+
+def test_search_folds_case_like_matches_search(storage):
+    storage.replace(posts_data())
+    for query in QUERIES + ["café", "CAFÉ", "σας", "ΣΑΣ", "tag"]:
+        assert sorted(storage.search(query)) == expected(query), query
+
+
+def test_search_table_of_older_database_is_rebuilt(storage):
+    storage.replace(posts_data())
+    storage.close()
+    # A database from before the search text was lowercased
+    connection = sqlite3.connect(storage.db_file)
+    connection.execute("DELETE FROM posts_search")
+    connection.execute("CREATE VIRTUAL TABLE posts_fts USING fts5(title, content, category, tags, tokenize='trigram')")
+    connection.commit()
+    connection.close()
+
+    for query in QUERIES + ["café", "σας", "tag"]:
+        assert sorted(storage.search(query)) == expected(query), query
+    tables = [name for (name,) in storage.connect().execute("SELECT name FROM sqlite_master")]
+    assert "posts_fts" not in tables
@@ -0,0 +1,141 @@
+import json
+import os
+
+import pytest
+
+from storage import JournalStorage, encode_posts, open_storage, write_atomic
+
+MODES = ["json", "journal", "sqlite", "lazy", "sharded"]
+
+
+def post_dict(post_id, month="2024-01", **fields):
+    data = {"id": post_id, "title": f"Post {post_id}", "content": f"Body of post {post_id}\nwith «unicode»",
+            "timestamp": f"{month}-02 03:04:05", "category": "Dev", "tags": ["a", "b"]}
+    data.update(fields)
+    return data
+
+
+def stored(mode, data_file):
+    """Return the post dicts a fresh storage of mode reads back"""
+    storage = open_storage(mode, data_file)
+    try:
+        return [post.to_dict() for post in storage.load()]
+    finally:
+        storage.close()
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_replace_round_trip(tmp_path, mode):
+    data_file = str(tmp_path / "blog_posts.json")
+    posts_data = [post_dict(1), post_dict(2, "2024-02", tags=[]), post_dict(5, "2023-12", category="")]
+    storage = open_storage(mode, data_file)
+    storage.replace([dict(data) for data in posts_data])
+    storage.close()
+    assert stored(mode, data_file) == posts_data
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_records_round_trip(tmp_path, mode):
+    data_file = str(tmp_path / "blog_posts.json")
+    storage = open_storage(mode, data_file)
+    storage.replace([post_dict(1), post_dict(2), post_dict(3)])
+    storage.flush()
+    storage.record("create", 4, post_dict(4, "2024-03"))
+    storage.record("update", 2, post_dict(2, "2024-03", title="Edited"))
+    storage.record("delete", 1)
+    storage.close()
+    expected = [post_dict(2, "2024-03", title="Edited"), post_dict(3), post_dict(4, "2024-03")]
+    assert stored(mode, data_file) == expected
+
+    # Records made after loading what the first storage wrote
+    storage = open_storage(mode, data_file)
+    storage.load()
+    storage.record("delete", 3)
+    storage.close()
+    assert stored(mode, data_file) == [expected[0], expected[2]]
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_reads_json_data_file(tmp_path, mode):
+    data_file = str(tmp_path / "blog_posts.json")
+    # Written before posts had ids
+    posts_data = [post_dict(None), post_dict(None, title="Second")]
+    for data in posts_data:
+        del data["id"]
+    with open(data_file, "w", encoding="utf-8") as file:
+        json.dump(posts_data, file)
+    assert [(data["id"], data["title"]) for data in stored(mode, data_file)] == [(1, "Post None"), (2, "Second")]
+
+
+@pytest.mark.parametrize("mode", ["json", "journal", "lazy", "sharded"])
+def test_write_before_load_is_refused(tmp_path, mode):
+    data_file = str(tmp_path / "blog_posts.json")
+    storage = open_storage(mode, data_file)
+    storage.replace([post_dict(1)])
+    storage.close()
+    storage = open_storage(mode, data_file)
+    with pytest.raises(RuntimeError):
+        storage.record("create", 2, post_dict(2))
+    storage.close()
+    assert stored(mode, data_file) == [post_dict(1)]
+
+
+def make_journal(tmp_path):
+    data_file = str(tmp_path / "blog_posts.json")
+    storage = JournalStorage(data_file)
+    storage.replace([post_dict(1), post_dict(2)])
+    storage.flush()
+    storage.load()
+    return storage
+
+
+def test_journal_replays_without_compacting(tmp_path):
+    storage = make_journal(tmp_path)
+    storage.record("create", 3, post_dict(3))
+    storage.record("update", 1, post_dict(1, title="Edited"))
+    storage.flush()
+    # Crash: the records are only in the journal
+    with open(storage.data_file, "rb") as file:
+        assert [data["id"] for data in json.load(file)] == [1, 2]
+    assert stored("journal", storage.data_file) == [post_dict(1, title="Edited"), post_dict(2), post_dict(3)]
+    storage.journal.close()
+
+
+def test_journal_records_after_replace_apply_to_replaced_posts(tmp_path):
+    storage = make_journal(tmp_path)
+    storage.record("create", 3, post_dict(3))
+    storage.replace([post_dict(7)])
+    storage.record("create", 8, post_dict(8))
+    # Crash before the next flush, with the record written out
+    storage.journal.flush()
+    assert stored("journal", storage.data_file) == [post_dict(7), post_dict(8)]
+    storage.journal.close()
+
+
+def test_journal_drops_torn_tail(tmp_path):
+    storage = make_journal(tmp_path)
+    storage.record("delete", 2)
+    storage.flush()
+    storage.journal.close()
+    size = os.path.getsize(storage.journal_file)
+    with open(storage.journal_file, "ab") as file:
+        file.write(b'{"op": "create", "id": 3, "post": {"id": 3, "ti')
+
+    storage = JournalStorage(storage.data_file)
+    assert [post.post_id for post in storage.load()] == [1]
+    assert os.path.getsize(storage.journal_file) == size
+    # New records start on a clean line
+    storage.record("create", 4, post_dict(4))
+    storage.close()
+    assert stored("journal", storage.data_file) == [post_dict(1), post_dict(4)]
+
+
+def test_journal_for_older_snapshot_is_ignored(tmp_path):
+    storage = make_journal(tmp_path)
+    storage.record("create", 3, post_dict(3))
+    storage.flush()
+    storage.journal.close()
+    # Crash after the snapshot was written but before the journal was reset
+    write_atomic(storage.data_file, encode_posts(storage.posts_data))
+    # Replaying the create again would raise
+    assert stored("journal", storage.data_file) == [post_dict(1), post_dict(2), post_dict(3)]
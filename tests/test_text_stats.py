@@ -0,0 +1,91 @@
+import random
+import tkinter
+
+import pytest
+
+from text_stats import TextStats, TextStatsTracker
+
+# Stands in for a Text widget's command: anything about the selection fails
+# as it does in Tk when nothing is selected
+FAKE_TEXT = """
+proc .text {args} {
+    if {[lsearch $args sel.*] >= 0} {
+        error {text doesn't contain any characters tagged with "sel"}
+    }
+    if {[lindex $args 0] eq "index"} {
+        return 1.0
+    }
+    return ""
+}
+"""
+
+
+class FakeText:
+    _w = ".text"
+
+    def __init__(self, interp):
+        self.tk = interp
+
+    def get(self, first, last):
+        return self.tk.call(self._w, "get", first, last)
+
+
+@pytest.fixture
+def interp():
+    try:
+        interp = tkinter.Tcl()
+    except tkinter.TclError as e:
+        pytest.skip(f"Tcl is not available: {e}")
+    interp.eval(FAKE_TEXT)
+    return interp
+
+
+@pytest.mark.parametrize("script", [
+    "catch {.text get sel.first sel.last}",  # Copy with nothing selected
+    "catch {.text insert sel.first **}",  # Bold with nothing selected
+    "catch {.text delete sel.first sel.last}",  # Cut with nothing selected
+])
+def test_errors_in_the_proxy_are_not_raised_again_from_mainloop(interp, script):
+    changes = []
+    TextStatsTracker(FakeText(interp), changed=lambda: changes.append(1))
+    interp.eval(script)
+    # Returns at once as there is no window; raises an error a Python
+    # command left behind
+    interp.mainloop()
+    assert changes == []
+
+
+def test_failed_command_returns_empty_result(interp):
+    tracker = TextStatsTracker(FakeText(interp))
+    assert interp.call(".text", "get", "sel.first", "sel.last") == ""
+    assert tracker.stats.words == 0
+    interp.mainloop()
+
+
+def recount(lines):
+    paragraphs = sum(1 for i, line in enumerate(lines) if line.strip() and (i == 0 or not lines[i - 1].strip()))
+    text = "\n".join(lines)
+    return len(text.split()), len(text), paragraphs
+
+
+def test_counts_follow_line_replacements():
+    rng = random.Random(1)
+    choices = ["", "  ", "one", "two words", " three  more words ", "naïve café"]
+    lines = [rng.choice(choices) for _ in range(20)]
+    stats = TextStats("\n".join(lines))
+    for _ in range(500):
+        first = rng.randrange(len(lines) + 1)
+        last = rng.randrange(first, min(len(lines), first + 3) + 1)
+        new_lines = [rng.choice(choices) for _ in range(rng.randrange(4))]
+        if len(lines) - (last - first) + len(new_lines) == 0:
+            # A text always has at least one line
+            new_lines = [""]
+        lines[first:last] = new_lines
+        stats.replace_lines(first, last, new_lines)
+        assert (stats.words, stats.chars, stats.paragraphs) == recount(lines)
+
+
+def test_reading_time_rounds_up():
+    assert TextStats("").reading_minutes == 0
+    assert TextStats("word").reading_minutes == 1
+    assert TextStats(" ".join(["word"] * 201)).reading_minutes == 2
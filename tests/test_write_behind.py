@@ -0,0 +1,101 @@
+import threading
+
+from write_behind import WriteBehindSaver
+
+
+class FakeStorage:
+    def __init__(self):
+        self.records = []
+        self.flushed = []  # Records written at each flush
+        self.closed = False
+
+    def record(self, op, post_id, data=None):
+        self.records.append((op, post_id))
+
+    def replace(self, posts_data):
+        self.records = [("replace", len(posts_data))]
+
+    def flush(self):
+        self.flushed.append(list(self.records))
+
+    def close(self):
+        self.closed = True
+
+
+def blocking_job():
+    started = threading.Event()
+    release = threading.Event()
+
+    def job():
+        started.set()
+        release.wait(10)
+    return job, started, release
+
+
+def flushes_while_job_runs(saver, release):
+    """Return whether flush() returned while the blocking job was still running"""
+    flusher = threading.Thread(target=saver.flush)
+    flusher.start()
+    flusher.join(2)
+    returned = not flusher.is_alive()
+    release.set()
+    flusher.join()
+    return returned
+
+
+def test_writes_are_applied_in_order_and_flushed():
+    storage = FakeStorage()
+    saver = WriteBehindSaver(storage)
+    saver.record("create", 1)
+    saver.record("update", 1)
+    saver.flush()
+    assert storage.flushed[-1] == [("create", 1), ("update", 1)]
+    saver.close()
+    assert storage.closed
+
+
+def test_flush_does_not_wait_for_a_running_job():
+    storage = FakeStorage()
+    saver = WriteBehindSaver(storage)
+    job, started, release = blocking_job()
+    saver.submit(job)
+    assert started.wait(10)
+    # No write is queued, only the job is running
+    assert flushes_while_job_runs(saver, release)
+    saver.close()
+
+
+def test_writes_ahead_of_a_job_are_flushed_before_it_runs():
+    storage = FakeStorage()
+    saver = WriteBehindSaver(storage)
+    job, started, release = blocking_job()
+    # Held in one batch by the coalescing delay
+    saver.record("create", 1)
+    saver.submit(job)
+    assert started.wait(10)
+    assert flushes_while_job_runs(saver, release)
+    assert storage.flushed[0] == [("create", 1)]
+    saver.close()
+
+
+def test_replace_drops_waiting_writes():
+    storage = FakeStorage()
+    saver = WriteBehindSaver(storage)
+    job, started, release = blocking_job()
+    saver.submit(job)
+    assert started.wait(10)
+    saver.record("create", 1)
+    saver.replace([{"id": 2}])
+    release.set()
+    saver.flush()
+    assert storage.flushed == [[("replace", 1)]]
+    saver.close()
+
+
+def test_job_results_reach_poll():
+    saver = WriteBehindSaver(FakeStorage())
+    results = []
+    saver.submit(lambda value: value * 2, 21, done=results.append)
+    saver.submit(lambda: 1 / 0, failed=lambda error: results.append(type(error)))
+    saver.close()
+    assert results == [42, ZeroDivisionError]
@@ -0,0 +1,122 @@
+import math
+from tkinter import TclError
+
+# Average silent reading speed used for the reading time estimate
+WORDS_PER_MINUTE = 200
+
+
+class TextStats:
+    """Word, character and paragraph counts kept per line
+
+    replace_lines() swaps a run of lines for new ones and only counts the
+    new lines, so an edit costs the lines it touched rather than the whole
+    text. A paragraph is a run of non-blank lines.
+    """
+
+    def __init__(self, text=""):
+        self.reset(text)
+
+    def reset(self, text):
+        """Count text from scratch"""
+        self.line_words = []
+        self.line_chars = []
+        self.blank = []
+        self.words = 0
+        self.line_char_total = 0
+        self.paragraphs = 0
+        self.replace_lines(0, 0, text.split("\n"))
+
+    @property
+    def chars(self):
+        # Every line but the last ends with a newline
+        return self.line_char_total + len(self.line_chars) - 1
+
+    @property
+    def reading_minutes(self):
+        return math.ceil(self.words / WORDS_PER_MINUTE)
+
+    def replace_lines(self, first, last, lines):
+        """Replace lines first..last-1 (counted from 0) with lines"""
+        # Whether a line starts a paragraph also depends on the line before,
+        # so the line after the replaced run is recounted too
+        self.paragraphs -= self._paragraph_starts(first, min(last + 1, len(self.blank)))
+        self.words -= sum(self.line_words[first:last])
+        self.line_char_total -= sum(self.line_chars[first:last])
+
+        line_words = [len(line.split()) for line in lines]
+        line_chars = [len(line) for line in lines]
+        self.line_words[first:last] = line_words
+        self.line_chars[first:last] = line_chars
+        self.blank[first:last] = [not line.strip() for line in lines]
+        self.words += sum(line_words)
+        self.line_char_total += sum(line_chars)
+        self.paragraphs += self._paragraph_starts(first, min(first + len(lines) + 1, len(self.blank)))
+
+    def _paragraph_starts(self, first, last):
+        blank = self.blank
+        return sum(1 for i in range(first, last) if not blank[i] and (i == 0 or blank[i - 1]))
+
+
+class TextStatsTracker:
+    """Keep TextStats in step with a Tk Text widget
+
+    The widget's Tcl command is renamed and replaced by a proxy that sees
+    every insert, delete and replace, including those made by key bindings,
+    and recounts only the lines each one touched. An EditorBuffer given as
+    buffer is handed the same changed lines.
+    """
+
+    def __init__(self, widget, changed=None, buffer=None):
+        self.widget = widget
+        self.changed = changed  # Called after every edit
+        self.buffer = buffer
+        self.stats = TextStats(widget.get("1.0", "end-1c"))
+        self.original = widget._w + "_original"
+        widget.tk.call("rename", widget._w, self.original)
+        widget.tk.createcommand(widget._w, self.dispatch)
+
+    def dispatch(self, command, *args):
+        """Run a widget command, updating the counts if it edits the text"""
+        # A Tcl error raised in here is kept by _tkinter and raised again
+        # from mainloop() even when the caller catches it, e.g. a get of
+        # sel.first with nothing selected, so it becomes an empty result as
+        # in idlelib's WidgetRedirector
+        try:
+            return self._dispatch(command, args)
+        except TclError:
+            return ""
+
+    def _dispatch(self, command, args):
+        call = self.widget.tk.call
+        if command in ("insert", "replace") or (command == "delete" and len(args) <= 2):
+            before = self._line_count()
+            first = min(self._line(args[0]), before)
+            last = first
+            if command != "insert":
+                end_index = args[1] if len(args) > 1 else f"{args[0]}+1c"
+                last = max(first, min(self._line(end_index), before))
+            result = call((self.original, command) + args)
+            end = last + self._line_count() - before
+            text = str(call(self.original, "get", f"{first}.0", f"{end}.end"))
+            lines = text.split("\n")
+            self.stats.replace_lines(first - 1, last, lines)
+            if self.buffer is not None:
+                self.buffer.replace_lines(first - 1, last, lines)
+        elif command == "delete" or (command == "edit" and args and args[0] in ("undo", "redo")):
+            # Multi-range deletes, undo and redo are recounted in full
+            result = call((self.original, command) + args)
+            text = str(call(self.original, "get", "1.0", "end-1c"))
+            self.stats.reset(text)
+            if self.buffer is not None:
+                self.buffer.reset(text)
+        else:
+            return call((self.original, command) + args)
+        if self.changed is not None:
+            self.changed()
+        return result
+
+    def _line(self, index):
+        return int(str(self.widget.tk.call(self.original, "index", index)).split(".")[0])
+
+    def _line_count(self):
+        return self._line("end-1c")
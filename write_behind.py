@@ -0,0 +1,145 @@
+import queue
+import threading
+
+from instrumentation import TRACER
+
+# Seconds the worker waits after the first queued change, so the rest of a
+# burst of saves lands in the same batch
+COALESCE_DELAY = 0.05
+
+
+class WriteBehindSaver:
+    """Apply storage writes on a background thread
+
+    Changes are queued by the UI thread and applied in order by a worker
+    thread. Everything queued while the worker is busy is applied as one
+    batch followed by a single storage flush, so a burst of saves costs
+    one write. A full replace drops the writes still waiting, since the
+    new contents supersede them. Writes queued ahead of a job are flushed
+    before it runs, so flush() never waits for a long job such as an
+    import or a background load.
+
+    The worker never touches Tk. Results are put on a queue and handed to
+    the done/failed callbacks by poll(), which the UI calls from root.after.
+    """
+
+    def __init__(self, storage, saved=None, failed=None):
+        self.storage = storage
+        self.saved = saved  # Called with the number of changes written
+        self.failed = failed  # Called with the exception of a failed flush
+        self.condition = threading.Condition()
+        self.pending = []  # (job, args, done, failed, is_write) waiting for the worker
+        self.unwritten = 0  # Writes queued or being applied and not flushed yet
+        self.closed = False
+        self.results = queue.Queue()
+        self.thread = threading.Thread(target=self.run, name="write-behind", daemon=True)
+        self.thread.start()
+
+    def record(self, op, post_id, data=None):
+        """Queue a single create, update or delete"""
+        self._queue(self.storage.record, (op, post_id, data), None, None, True)
+
+    def replace(self, posts_data):
+        """Queue a replacement of every stored post"""
+        with self.condition:
+            # Writes still waiting are superseded by the new contents
+            kept = [entry for entry in self.pending if not entry[4]]
+            self.unwritten -= len(self.pending) - len(kept)
+            self.pending = kept
+        self._queue(self.storage.replace, (posts_data,), None, None, True)
+
+    def submit(self, job, *args, done=None, failed=None):
+        """Queue job(*args) for the worker
+
+        done(result) or failed(error) is later called on the UI thread.
+        """
+        self._queue(job, args, done, failed, False)
+
+    def poll(self):
+        """Run the callbacks of finished jobs, call from the UI thread"""
+        while True:
+            try:
+                callback, value = self.results.get_nowait()
+            except queue.Empty:
+                return
+            callback(value)
+
+    def flush(self):
+        """Block until every queued write has reached the disk
+
+        Jobs queued with submit() are not waited for.
+        """
+        with self.condition:
+            while self.unwritten:
+                self.condition.wait()
+
+    def close(self):
+        """Flush pending writes, stop the worker and close the storage"""
+        with self.condition:
+            if self.closed:
+                return
+            self.closed = True
+            self.condition.notify_all()
+        self.thread.join()
+        self.poll()
+        self.storage.close()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.pending and not self.closed:
+                    self.condition.wait()
+                if not self.pending:
+                    return
+                if not self.closed:
+                    self.condition.wait(COALESCE_DELAY)
+                batch = self.pending
+                self.pending = []
+
+            changes = writes = 0
+            for job, args, done, failed, is_write in batch:
+                if writes and not is_write:
+                    # Writes queued ahead of the job reach the disk before it runs
+                    self._write_out(changes, writes)
+                    changes = writes = 0
+                if is_write:
+                    writes += 1
+                try:
+                    with TRACER.span(f"saver.{getattr(job, '__name__', 'job')}", "saver"):
+                        result = job(*args)
+                except Exception as error:
+                    self._report(failed or self.failed, error)
+                    continue
+                if is_write:
+                    changes += 1
+                else:
+                    self._report(done, result)
+            self._write_out(changes, writes)
+
+    def _write_out(self, changes, writes):
+        """Flush the storage after a run of writes, changes of which succeeded"""
+        if changes:
+            try:
+                with TRACER.span("storage.flush", "io"):
+                    self.storage.flush()
+            except Exception as error:
+                self._report(self.failed, error)
+            else:
+                self._report(self.saved, changes)
+        if writes:
+            with self.condition:
+                self.unwritten -= writes
+                self.condition.notify_all()
+
+    def _queue(self, job, args, done, failed, is_write):
+        with self.condition:
+            if self.closed:
+                raise RuntimeError("Saver is closed")
+            self.pending.append((job, args, done, failed, is_write))
+            if is_write:
+                self.unwritten += 1
+            self.condition.notify()
+
+    def _report(self, callback, value):
+        if callback is not None:
+            self.results.put((callback, value))